@@ -0,0 +1,346 @@
+"""
+Append-only binary audit log of every prediction, written off the request path.
+"""
+import numpy as np
+from typing import Dict, Any, Iterator, List
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from pathlib import Path
+
+from .config import (
+    AUDIT_LOG_DIR,
+    AUDIT_QUEUE_SIZE,
+    AUDIT_BATCH_SIZE,
+    AUDIT_POLL_SECONDS,
+    AUDIT_SEGMENT_MAX_BYTES,
+    AUDIT_SEGMENT_MAX_SECONDS,
+    AUDIT_FSYNC,
+    AUDIT_FSYNC_SECONDS
+)
+from .schemas import ApplicantRequest
+
+logger = logging.getLogger(__name__)
+
+# Segment layout: MAGIC, a length-prefixed JSON header, then frames of
+# (payload length, CRC-32 of payload, payload). A payload starts with its type.
+MAGIC = b"CRAUDIT\x01"
+SEGMENT_SUFFIX = ".seg"
+
+_FRAME = struct.Struct("<II")
+_STRING = struct.Struct("<BH")  # type, string id; UTF-8 bytes follow
+_DECISION = struct.Struct("<BddHH")  # type, timestamp, probability, risk label id, model version id
+_FACTOR = struct.Struct("<HHHd")  # feature id, direction id, reason id, impact
+
+_STRING_RECORD = 1
+_DECISION_RECORD = 2
+
+FSYNC_POLICIES = ("batch", "interval", "rotate")
+
+
+class _Segment:
+    """One open segment file and the string table its decisions refer to."""
+
+    def __init__(self, path: Path, fields: List[str]):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.opened = time.monotonic()
+        self.strings = {}
+
+        header = json.dumps({'fields': fields, 'created': time.time(), 'pid': os.getpid()}).encode()
+        self.file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        self.size = self.file.tell()
+
+    def string_id(self, value: str, out: bytearray) -> int:
+        """Id of ``value`` in this segment, defining it in ``out`` the first time it is seen."""
+
+        string_id = self.strings.get(value)
+        if string_id is None:
+            string_id = self.strings[value] = len(self.strings)
+            _frame(out, _STRING.pack(_STRING_RECORD, string_id) + value.encode())
+        return string_id
+
+
+def _frame(out: bytearray, payload: bytes):
+    out += _FRAME.pack(len(payload), zlib.crc32(payload))
+    out += payload
+
+
+class AuditLog:
+    """Records every decision on a background thread.
+
+    ``record`` only appends a reference to the applicant and the response to
+    a bounded ``deque`` (atomic in CPython, so producer and writer share it
+    without a lock) and counts a drop when the queue is full instead of ever
+    blocking a request. The writer thread drains up to ``batch_size``
+    decisions at a time, encodes them into one buffer and writes it with a
+    single call. Inputs are stored as float64 in header order (NaN for a
+    missing value) and repeated strings such as factor names and reasons
+    once per segment. Segments rotate by size and age, checked between
+    batches, so a segment ends within one batch of the limit; ``fsync`` is
+    ``"batch"`` (after every write), ``"interval"`` (at most every
+    ``fsync_seconds``) or ``"rotate"`` (when a segment is closed).
+    """
+
+    def __init__(self, directory: Path = AUDIT_LOG_DIR,
+                 queue_size: int = AUDIT_QUEUE_SIZE,
+                 batch_size: int = AUDIT_BATCH_SIZE,
+                 segment_max_bytes: int = AUDIT_SEGMENT_MAX_BYTES,
+                 segment_max_seconds: float = AUDIT_SEGMENT_MAX_SECONDS,
+                 fsync: str = AUDIT_FSYNC,
+                 fsync_seconds: float = AUDIT_FSYNC_SECONDS,
+                 fields: List[str] = None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r}, expected one of {FSYNC_POLICIES}")
+
+        self.directory = Path(directory)
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_seconds = segment_max_seconds
+        self.fsync = fsync
+        self.fsync_seconds = fsync_seconds
+        self.fields = list(fields or ApplicantRequest.model_fields)
+
+        self._queue = deque()
+        self._stop = threading.Event()
+        self._thread = None
+        self._segment = None
+        self._sequence = 0
+        self._last_fsync = time.monotonic()
+
+        # Counters: the producer only touches accepted/dropped/high_water, the writer the rest
+        self.accepted = 0
+        self.dropped = 0
+        self.high_water = 0
+        self.written = 0
+        self.bytes_written = 0
+        self.segments = 0
+        self.write_errors = 0
+
+    def start(self) -> 'AuditLog':
+        """Start the writer thread."""
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def record(self, applicant_data: Dict[str, Any], response: Dict[str, Any]) -> bool:
+        """Queue one decision; False if the queue was full and it was dropped."""
+
+        depth = len(self._queue)
+        if depth >= self.queue_size:
+            self.dropped += 1
+            return False
+
+        self._queue.append((time.time(), applicant_data, response))
+        self.accepted += 1
+        if depth >= self.high_water:
+            self.high_water = depth + 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'accepted': self.accepted,
+            'dropped': self.dropped,
+            'written': self.written,
+            'queued': len(self._queue),
+            'queue_high_water': self.high_water,
+            'queue_size': self.queue_size,
+            'segments': self.segments,
+            'bytes_written': self.bytes_written,
+            'write_errors': self.write_errors,
+            'current_segment': self._segment.path.name if self._segment else None
+        }
+
+    def close(self):
+        """Write everything still queued, sync and close the segment."""
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        try:
+            while True:
+                stopping = self._stop.is_set()
+                if self._queue:
+                    self._write_batch()
+                else:
+                    if stopping:
+                        break
+                    self._maybe_rotate()
+                    self._maybe_fsync()
+                    self._stop.wait(AUDIT_POLL_SECONDS)
+        finally:
+            self._close_segment()
+
+    def _open_segment(self):
+        stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        path = self.directory / f"audit-{stamp}-{os.getpid()}-{self._sequence:06d}{SEGMENT_SUFFIX}"
+        self._sequence += 1
+        self._segment = _Segment(path, self.fields)
+        self.segments += 1
+        logger.info(f"Opened audit segment {path.name}")
+
+    def _close_segment(self):
+        if self._segment is None:
+            return
+        self._segment.file.flush()
+        os.fsync(self._segment.file.fileno())
+        self._segment.file.close()
+        self._segment = None
+
+    def _maybe_rotate(self):
+        segment = self._segment
+        if segment is not None and (segment.size >= self.segment_max_bytes
+                                    or time.monotonic() - segment.opened >= self.segment_max_seconds):
+            self._close_segment()
+
+    def _maybe_fsync(self):
+        if self._segment is None or self.fsync == "rotate":
+            return
+        now = time.monotonic()
+        if self.fsync == "batch" or now - self._last_fsync >= self.fsync_seconds:
+            os.fsync(self._segment.file.fileno())
+            self._last_fsync = now
+
+    def _encode(self, decision, out: bytearray):
+        timestamp, applicant_data, response = decision
+        segment = self._segment
+
+        header = _DECISION.pack(
+            _DECISION_RECORD, timestamp, response['default_probability'],
+            segment.string_id(response['risk_label'], out),
+            segment.string_id(str(response.get('model_version', '')), out)
+        )
+        inputs = np.array(
+            [np.nan if applicant_data.get(field) is None else applicant_data[field] for field in self.fields],
+            dtype='<f8'
+        ).tobytes()
+        factors = [
+            _FACTOR.pack(
+                segment.string_id(factor['feature'], out),
+                segment.string_id(factor['direction'], out),
+                segment.string_id(factor['human_readable_reason'], out),
+                factor['impact']
+            )
+            for factor in response['top_factors']
+        ]
+
+        _frame(out, b"".join([header, inputs, bytes([len(factors)])] + factors))
+
+    def _write_batch(self):
+        self._maybe_rotate()
+        if self._segment is None:
+            self._open_segment()
+
+        out = bytearray()
+        count = 0
+        while count < self.batch_size and self._queue:
+            decision = self._queue.popleft()
+            try:
+                self._encode(decision, out)
+                count += 1
+            except Exception as e:
+                self.write_errors += 1
+                logger.error(f"Could not encode audit record: {e}")
+
+        try:
+            self._segment.file.write(out)
+            self._segment.file.flush()
+        except OSError as e:
+            self.write_errors += count
+            logger.error(f"Audit log write failed, {count} records lost: {e}")
+            self._segment = None
+            return
+
+        self._segment.size += len(out)
+        self.written += count
+        self.bytes_written += len(out)
+        self._maybe_fsync()
+
+
+def read_segment(path: Path, with_factors: bool = True) -> Iterator[Dict[str, Any]]:
+    """Decisions in one segment, in write order; stops at a torn or corrupt tail.
+
+    Without ``with_factors`` the explanation of each decision is skipped,
+    which is most of the decoding work.
+    """
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not an audit segment")
+    offset = len(MAGIC)
+    (header_length,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    fields = json.loads(data[offset:offset + header_length])['fields']
+    offset += header_length
+    inputs = struct.Struct(f"<{len(fields)}d")
+
+    strings = []
+    while offset + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, offset)
+        payload = data[offset + _FRAME.size:offset + _FRAME.size + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            logger.warning(f"{path}: stopping at a torn or corrupt record at byte {offset}")
+            return
+        offset += _FRAME.size + length
+
+        if payload[0] == _STRING_RECORD:
+            strings.append(payload[_STRING.size:].decode())
+            continue
+
+        _, timestamp, probability, label, version = _DECISION.unpack_from(payload)
+        position = _DECISION.size
+        values = inputs.unpack_from(payload, position)
+        position += inputs.size
+        n_factors = payload[position]
+        position += 1
+
+        factors = []
+        for _ in range(n_factors if with_factors else 0):
+            feature, direction, reason, impact = _FACTOR.unpack_from(payload, position)
+            position += _FACTOR.size
+            factors.append({
+                'feature': strings[feature],
+                'impact': impact,
+                'direction': strings[direction],
+                'human_readable_reason': strings[reason]
+            })
+
+        yield {
+            'timestamp': timestamp,
+            'applicant': {field: (None if np.isnan(value) else value) for field, value in zip(fields, values)},
+            'default_probability': probability,
+            'risk_label': strings[label],
+            'top_factors': factors,
+            'model_version': strings[version]
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Print audit log segments as JSON lines")
+    parser.add_argument("segments", type=Path, nargs="+", help="Segment files or directories of segments")
+    args = parser.parse_args()
+
+    for target in args.segments:
+        paths = sorted(target.glob(f"*{SEGMENT_SUFFIX}")) if target.is_dir() else [target]
+        for path in paths:
+            for decision in read_segment(path):
+                sys.stdout.write(json.dumps(decision) + "\n")
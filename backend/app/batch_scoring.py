@@ -0,0 +1,354 @@
+"""
+Offline bulk scoring of applicant portfolios from CSV or Parquet files.
+"""
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Iterator, List, Tuple
+import json
+import logging
+import multiprocessing as mp
+import os
+import fnmatch
+import time
+from collections import deque
+from pathlib import Path
+
+from .config import (
+    ARTIFACTS_ROOT,
+    N_JOBS,
+    BATCH_CHUNK_SIZE,
+    BATCH_MAX_IN_FLIGHT,
+    BATCH_CHECKPOINT_NAME
+)
+from .preprocessing import Preprocessor
+from .inference import SHAPExplainer, top_impacts
+from .shared_batch import SharedBatch, BatchSpec, row_ranges
+from .utils import load_model_artifacts, determine_risk_tiers, predict_default_probability
+
+logger = logging.getLogger(__name__)
+
+# Fields every input row needs (the required fields of ApplicantRequest)
+REQUIRED_COLUMNS = [
+    'age', 'annual_income', 'debt_to_income_ratio',
+    'revolving_utilization', 'open_credit_lines',
+    'delinquencies_2yrs', 'dependents', 'fico_score'
+]
+
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+
+
+def _factor_columns(scored: pd.DataFrame, shap_values: np.ndarray, top_k: int,
+                    feature_names) -> pd.DataFrame:
+    """Add the ``top_k`` largest SHAP factors of each row as named columns."""
+
+    order, impacts = top_impacts(shap_values, top_k)
+    names = np.asarray(feature_names)
+    for i in range(order.shape[1]):
+        scored[f'factor_{i + 1}'] = names[order[:, i]]
+        scored[f'factor_{i + 1}_impact'] = impacts[:, i]
+
+    return scored
+
+
+def score_frame(df: pd.DataFrame, model, preprocessor: Preprocessor,
+                explainer: SHAPExplainer = None, top_k: int = 0,
+                num_threads: int = None) -> pd.DataFrame:
+    """Probability, risk tier and optionally the top-k SHAP factors for each row."""
+
+    X = preprocessor.transform_batch(df)
+    probability = predict_default_probability(model, X, num_threads)
+
+    scored = pd.DataFrame({
+        'default_probability': probability,
+        'risk_label': determine_risk_tiers(probability)
+    }, index=df.index)
+
+    if explainer is not None and top_k:
+        _factor_columns(scored, explainer.shap_values_batch(X), top_k, explainer.feature_names)
+
+    return scored
+
+
+# Model, explainer and attached shared batches of each scoring worker
+_worker = {}
+
+
+def _init_worker(explain: bool, num_threads: int, artifacts_dir: Path = ARTIFACTS_ROOT):
+    """Load the model and (if needed) the explainer once per worker."""
+
+    artifacts = load_model_artifacts(artifacts_dir)
+
+    explainer = None
+    if explain:
+        explainer = SHAPExplainer()
+        explainer.load_model_and_setup(artifacts['model'], artifacts['feature_names'])
+
+    _worker.update(model=artifacts['model'], explainer=explainer,
+                   num_threads=num_threads, batches={})
+
+
+def _score_rows(spec: BatchSpec, start: int, stop: int) -> int:
+    """Fill probabilities (and SHAP values) for rows ``start:stop`` of a shared batch."""
+
+    batches = _worker['batches']
+    if spec.name not in batches:
+        batches[spec.name] = SharedBatch.attach(spec)
+    batch = batches[spec.name]
+
+    X = batch.X[start:stop]
+    batch.probability[start:stop] = predict_default_probability(_worker['model'], X, _worker['num_threads'])
+    if spec.with_shap:
+        batch.shap[start:stop] = _worker['explainer'].shap_values_batch(X)
+
+    return stop - start
+
+
+def iter_chunks(path: Path, chunk_size: int = BATCH_CHUNK_SIZE,
+                skip_rows: int = 0) -> Iterator[pd.DataFrame]:
+    """Stream a CSV or Parquet file in chunks indexed by absolute row position."""
+
+    path = Path(path)
+    offset = skip_rows
+
+    if path.suffix.lower() in PARQUET_SUFFIXES:
+        import pyarrow.parquet as pq
+
+        seen = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            start = max(0, skip_rows - seen)
+            seen += batch.num_rows
+            if start >= batch.num_rows:
+                continue
+            chunk = batch.slice(start).to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+    else:
+        reader = pd.read_csv(path, chunksize=chunk_size,
+                             skiprows=range(1, skip_rows + 1) if skip_rows else None)
+        for chunk in reader:
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+
+
+class BatchScoringJob:
+    """Scores an input file into a directory of ordered Parquet parts.
+
+    The parent reads and preprocesses each chunk straight into a shared-memory
+    batch, and pool workers fill in probabilities and SHAP values for the
+    row ranges they are handed, so no features or results are pickled.
+    ``BATCH_MAX_IN_FLIGHT`` batches rotate, letting the next chunk be
+    prepared while the workers score the current one. Results are written
+    strictly in input order as ``part-NNNNNN.parquet``, and after every part
+    a checkpoint records how many rows are done, so a rerun after a crash
+    continues where the last complete part ended.
+    """
+
+    def __init__(self, input_path: Path, output_dir: Path,
+                 chunk_size: int = BATCH_CHUNK_SIZE, top_k: int = 0,
+                 n_workers: int = None, id_column: str = None,
+                 artifacts_dir: Path = ARTIFACTS_ROOT):
+        self.input_path = Path(input_path)
+        self.output_dir = Path(output_dir)
+        self.chunk_size = chunk_size
+        self.top_k = top_k
+        self.n_workers = n_workers or N_JOBS
+        self.id_column = id_column
+        self.artifacts_dir = Path(artifacts_dir)
+        self.checkpoint_path = self.output_dir / BATCH_CHECKPOINT_NAME
+
+    def _job_spec(self) -> Dict[str, Any]:
+        """What a checkpoint must match to be resumed."""
+
+        stat = self.input_path.stat()
+        return {
+            'input': str(self.input_path.resolve()),
+            'input_size': stat.st_size,
+            'input_mtime_ns': stat.st_mtime_ns,
+            'top_k': self.top_k,
+            'id_column': self.id_column,
+            'artifacts': str(self.artifacts_dir.resolve())
+        }
+
+    def _load_checkpoint(self, restart: bool) -> Dict[str, Any]:
+        """Resume state from a matching checkpoint, or a clean output directory."""
+
+        spec = self._job_spec()
+
+        if not restart and self.checkpoint_path.exists():
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            if checkpoint['job'] == spec:
+                logger.info(f"Resuming from checkpoint: {checkpoint['rows_done']} rows, "
+                            f"{checkpoint['parts_done']} parts done")
+                return checkpoint
+            logger.info("Checkpoint belongs to a different input, starting over")
+
+        self._clear_output_dir()
+
+        return {'job': spec, 'rows_done': 0, 'parts_done': 0, 'complete': False}
+
+    def _owned_files(self) -> List[Path]:
+        """Files of the output directory this job writes: parts, their temp files and the checkpoint."""
+
+        return [path for path in self.output_dir.iterdir()
+                if fnmatch.fnmatch(path.name, "part-*.parquet")
+                or fnmatch.fnmatch(path.name, ".part-*.tmp")
+                or path in (self.checkpoint_path, self.checkpoint_path.with_suffix('.tmp'))]
+
+    def _clear_output_dir(self):
+        """Remove a previous run's output, refusing directories that hold anything else."""
+
+        if not self.output_dir.exists():
+            self.output_dir.mkdir(parents=True)
+            return
+
+        owned = self._owned_files()
+        others = sorted(path.name for path in self.output_dir.iterdir() if path not in owned)
+        if others:
+            raise ValueError(f"Output directory {self.output_dir} contains files not written by "
+                             f"batch scoring ({', '.join(others[:5])}); choose an empty or new directory")
+
+        for path in owned:
+            path.unlink()
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]):
+        tmp_path = self.checkpoint_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _write_part(self, scored: pd.DataFrame, checkpoint: Dict[str, Any]):
+        """Publish one part atomically, then advance the checkpoint past it."""
+
+        part_path = self.output_dir / f"part-{checkpoint['parts_done']:06d}.parquet"
+        tmp_path = self.output_dir / f".{part_path.name}.tmp"
+        scored.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, part_path)
+
+        checkpoint['rows_done'] += len(scored)
+        checkpoint['parts_done'] += 1
+        self._save_checkpoint(checkpoint)
+
+    def run(self, restart: bool = False) -> Dict[str, Any]:
+        """Score the remaining rows and return throughput statistics."""
+
+        checkpoint = self._load_checkpoint(restart)
+        resumed_from = checkpoint['rows_done']
+
+        if checkpoint['complete']:
+            logger.info(f"{self.input_path} already scored into {self.output_dir}")
+            return {'rows': 0, 'resumed_from': resumed_from, 'wall_time': 0.0, 'rows_per_second': 0.0}
+
+        num_threads = max(1, N_JOBS // self.n_workers)
+        explain = self.top_k > 0
+
+        preprocessor = Preprocessor()
+        preprocessor.load_artifacts(self.artifacts_dir)
+        feature_names = preprocessor.feature_names
+
+        logger.info(f"Scoring {self.input_path} with {self.n_workers} workers "
+                    f"({self.chunk_size} rows per chunk, top_k={self.top_k})")
+
+        start = time.perf_counter()
+        rows = 0
+        ring = []
+        pending = deque()
+
+        def drain():
+            nonlocal rows
+            chunk_index, ids, batch, tasks = pending.popleft()
+            for task in tasks:
+                task.get()
+
+            n = len(chunk_index)
+            probability = batch.probability[:n].copy()
+            scored = pd.DataFrame({
+                'row_index': chunk_index,
+                'default_probability': probability,
+                'risk_label': determine_risk_tiers(probability)
+            })
+            if ids is not None:
+                scored.insert(0, self.id_column, ids)
+            if explain:
+                _factor_columns(scored, batch.shap[:n], self.top_k, feature_names)
+
+            self._write_part(scored, checkpoint)
+            rows += n
+            elapsed = time.perf_counter() - start
+            logger.info(f"{checkpoint['rows_done']} rows scored ({rows / elapsed:,.0f} rows/s)")
+
+        ctx = mp.get_context('spawn')
+        try:
+            with ctx.Pool(processes=self.n_workers, initializer=_init_worker,
+                          initargs=(explain, num_threads, self.artifacts_dir)) as pool:
+                for i, chunk in enumerate(iter_chunks(self.input_path, self.chunk_size,
+                                                      checkpoint['rows_done'])):
+                    if i == 0:
+                        missing = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+                        if missing:
+                            raise ValueError(f"Input is missing required columns: {missing}")
+
+                    # Reusing a batch means its previous chunk must be written first
+                    if len(pending) == BATCH_MAX_IN_FLIGHT:
+                        drain()
+                    if len(ring) < BATCH_MAX_IN_FLIGHT:
+                        ring.append(SharedBatch.create(self.chunk_size, len(feature_names), explain))
+                    batch = ring[i % BATCH_MAX_IN_FLIGHT]
+
+                    n = len(chunk)
+                    batch.X[:n] = preprocessor.transform_batch(chunk)
+                    ids = chunk[self.id_column].to_numpy() if self.id_column else None
+                    tasks = [pool.apply_async(_score_rows, (batch.spec, lo, hi))
+                             for lo, hi in row_ranges(n, self.n_workers)]
+                    pending.append((chunk.index.to_numpy(), ids, batch, tasks))
+
+                while pending:
+                    drain()
+        finally:
+            for batch in ring:
+                batch.close()
+
+        checkpoint['complete'] = True
+        self._save_checkpoint(checkpoint)
+
+        wall_time = time.perf_counter() - start
+        summary = {
+            'rows': rows,
+            'resumed_from': resumed_from,
+            'parts': checkpoint['parts_done'],
+            'wall_time': wall_time,
+            'rows_per_second': rows / wall_time if wall_time > 0 else 0.0
+        }
+        logger.info(f"Scored {rows} rows in {wall_time:.1f}s "
+                    f"({summary['rows_per_second']:,.0f} rows/s) into {self.output_dir}")
+
+        return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet portfolio of applicants offline")
+    parser.add_argument("input", type=Path, help="CSV or Parquet file with ApplicantRequest fields as columns")
+    parser.add_argument("output", type=Path, help="Output directory of ordered Parquet parts")
+    parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE)
+    parser.add_argument("--top-k", type=int, default=0,
+                        help="Add the k largest SHAP factors per row (0 disables explanations)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Scoring processes (default: {N_JOBS})")
+    parser.add_argument("--id-column", default=None,
+                        help="Input column copied to the output to identify each loan")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore any checkpoint and score from the first row")
+    parser.add_argument("--artifacts", type=Path, default=ARTIFACTS_ROOT,
+                        help="Model artifact directory to score with (default: the deployed model)")
+    args = parser.parse_args()
+
+    job = BatchScoringJob(args.input, args.output, chunk_size=args.chunk_size,
+                          top_k=args.top_k, n_workers=args.workers, id_column=args.id_column,
+                          artifacts_dir=args.artifacts)
+    job.run(restart=args.restart)
@@ -8,10 +8,10 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent.parent.parent  # Go up to project root
 BACKEND_ROOT = PROJECT_ROOT / "backend"
 DATA_ROOT = PROJECT_ROOT / "data"
-ARTIFACTS_ROOT = BACKEND_ROOT / "artifacts"
+ARTIFACTS_ROOT = Path(os.environ.get("ARTIFACTS_ROOT", BACKEND_ROOT / "artifacts"))
 
 # Data paths
-LOAN_DATA_PATH = DATA_ROOT / "loan_processed_data.csv"
+LOAN_DATA_PATH = Path(os.environ.get("LOAN_DATA_PATH", DATA_ROOT / "loan_processed_data.csv"))
 HOME_CREDIT_TRAIN_PATH = DATA_ROOT / "homecreditdata" / "application_train.csv"
 
 # Model artifacts
@@ -19,11 +19,31 @@ MODEL_PATH = ARTIFACTS_ROOT / "model.pkl"
 FEATURE_LIST_PATH = ARTIFACTS_ROOT / "feature_list.json"
 SCALER_PATH = ARTIFACTS_ROOT / "scaler.pkl"
 PREPROCESSOR_PATH = ARTIFACTS_ROOT / "preprocessor.pkl"
+DATASET_CACHE_DIR = ARTIFACTS_ROOT / "dataset_cache"
+PREDICTIONS_DIR = ARTIFACTS_ROOT / "predictions"
+STAGE_CACHE_DIR = ARTIFACTS_ROOT / "stage_cache"
+TRAINING_PROFILE_PATH = ARTIFACTS_ROOT / "training_profile.json"
+TRAINING_PROFILE_HISTORY_PATH = ARTIFACTS_ROOT / "training_profile_history.jsonl"
+EVALUATION_CURVES_PATH = ARTIFACTS_ROOT / "evaluation_curves.npz"
+PLOTS_DIR = ARTIFACTS_ROOT / "plots"
+DRIFT_REFERENCE_PATH = ARTIFACTS_ROOT / "drift_reference.npz"
+DRIFT_SNAPSHOT_DIR = ARTIFACTS_ROOT / "drift"
+AUDIT_LOG_DIR = BACKEND_ROOT / "audit_log"
+CHALLENGERS_DIR = ARTIFACTS_ROOT / "challengers"
 
 # Training parameters
 RANDOM_STATE = 42
 TEST_SIZE = 0.2
 VALIDATION_SIZE = 0.2
+CV_FOLDS = 5
+
+# Parallel training
+N_JOBS = os.cpu_count() or 1  # Total thread budget shared by concurrent jobs
+
+# Distributed LightGBM (socket-based data-parallel training)
+DISTRIBUTED_WORKERS = 2
+DISTRIBUTED_BASE_PORT = 12400  # Listen port on each host when the machine list has no ports
+DISTRIBUTED_TIME_OUT = 120  # minutes a worker waits for its peers
 
 # Model parameters
 MODEL_PARAMS = {
@@ -60,6 +80,67 @@ MODEL_PARAMS = {
     }
 }
 
+# Bootstrap confidence intervals and permutation importance
+BOOTSTRAP_RESAMPLES = 1000
+BOOTSTRAP_CONFIDENCE = 0.95
+BOOTSTRAP_BLOCK_ELEMENTS = 2_000_000  # Resample weights materialized per block
+PERMUTATION_REPEATS = 5
+
+# Training profiler
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between RSS polls / stack samples
+
+# Evaluation plots
+CURVE_MAX_POINTS = 1000  # Points kept per saved ROC/PR curve
+PLOT_DPI = 300
+
+# Segmented evaluation
+SEGMENT_FICO_BANDS = [300, 580, 670, 740, 800, 851]  # Band edges, lower bound inclusive
+SEGMENT_INCOME_QUANTILES = 10
+SEGMENT_COMBINATIONS = [
+    ["fico_band", "term_length"],
+    ["fico_band", "high_utilization"],
+    ["income_decile", "term_length"],
+    ["fico_band", "term_length", "high_utilization"],
+    ["fico_band", "income_decile", "term_length", "high_utilization"]
+]
+
+# Incremental retraining
+INCREMENTAL_BOOST_ROUNDS = 200  # Maximum trees added per warm-start update
+
+# Hyperparameter search space (values sampled per trial on top of MODEL_PARAMS)
+SEARCH_SPACE = {
+    "lightgbm": {
+        "num_leaves": [15, 31, 63, 127],
+        "learning_rate": [0.02, 0.05, 0.1],
+        "feature_fraction": [0.7, 0.8, 0.9, 1.0],
+        "bagging_fraction": [0.7, 0.8, 0.9],
+        "min_data_in_leaf": [20, 50, 100, 200],
+        "lambda_l2": [0.0, 1.0, 10.0]
+    },
+    "xgboost": {
+        "max_depth": [3, 4, 6, 8],
+        "learning_rate": [0.02, 0.05, 0.1],
+        "subsample": [0.7, 0.8, 0.9],
+        "colsample_bytree": [0.7, 0.8, 0.9, 1.0],
+        "min_child_weight": [1, 5, 10],
+        "reg_lambda": [0.0, 1.0, 10.0]
+    },
+    "catboost": {
+        "depth": [4, 6, 8],
+        "learning_rate": [0.02, 0.05, 0.1],
+        "l2_leaf_reg": [1, 3, 10],
+        "random_strength": [0.5, 1, 2]
+    }
+}
+
+# Successive halving settings
+SEARCH_TRIALS_PER_MODEL = 27
+SEARCH_MIN_ROUNDS = 50
+SEARCH_MAX_ROUNDS = 1350
+SEARCH_ETA = 3
+SEARCH_THREADS_PER_TRIAL = 2
+SEARCH_TIME_BUDGET = 1800  # seconds
+
 # Risk tier thresholds
 RISK_THRESHOLDS = {
     "LOW": 0.33,
@@ -87,3 +168,65 @@ CORS_ORIGINS = [
     "http://127.0.0.1:8081",
     "http://127.0.0.1:8082"
 ]
+
+# Offline batch scoring
+BATCH_CHUNK_SIZE = 50_000  # Rows per shared-memory batch, split across the scoring workers
+BATCH_MAX_IN_FLIGHT = 2  # Shared-memory batches in rotation between the reader and the workers
+BATCH_CHECKPOINT_NAME = "_checkpoint.json"
+
+# Synthetic loans and applicants for tests and scale benchmarks
+SYNTHETIC_CHUNK_SIZE = 1_000_000  # Rows generated and written at a time
+
+# Capture-and-replay of live traffic against candidate artifacts
+REPLAY_DELTA_THRESHOLDS = [0.01, 0.05, 0.1]  # Reported share of requests whose probability moved more than each
+
+# What-if sensitivity sweeps
+SENSITIVITY_MAX_POINTS = 2500  # Grid points per request (e.g. 50 x 50)
+
+# Counterfactual "path to lower risk" search
+# Fields an applicant can act on: direction of change, the largest change
+# considered (a fraction of the current value when relative, else field units)
+# and the ApplicantRequest bounds the changed value must stay within
+COUNTERFACTUAL_FIELDS = {
+    "loan_amount": {"direction": -1, "max_change": 0.9, "relative": True, "min": 100},
+    "revolving_utilization": {"direction": -1, "max_change": 1.0, "relative": True},
+    "debt_to_income_ratio": {"direction": -1, "max_change": 1.0, "relative": True},
+    "annual_income": {"direction": 1, "max_change": 0.5, "relative": True, "max": 10_000_000},
+    "employment_length": {"direction": 1, "max_change": 5, "relative": False, "max": 50, "integer": True}
+}
+COUNTERFACTUAL_STEPS = 10  # Lattice steps across each field's largest change
+COUNTERFACTUAL_BEAM_WIDTH = 32  # Candidates kept for expansion per iteration
+COUNTERFACTUAL_REFINE_POINTS = 20  # Scales tried when shrinking a found change
+COUNTERFACTUAL_TIME_BUDGET_MS = 250
+COUNTERFACTUAL_MAX_RESULTS = 3
+
+# Interactive scoring sessions
+SESSION_TTL_SECONDS = 1800  # Idle time before a session is dropped
+SESSION_MAX_ACTIVE = 10_000
+
+# Live feature-drift monitoring
+DRIFT_BINS = 20  # Quantile bins per feature in the training reference
+DRIFT_PSI_WARNING = 0.1
+DRIFT_PSI_ALERT = 0.25
+DRIFT_MIN_OBSERVATIONS = 100  # Live rows before a status other than insufficient_data
+DRIFT_SNAPSHOT_SECONDS = 30  # How often each worker writes its counts for the others to merge
+DRIFT_SNAPSHOT_MAX_AGE_SECONDS = 120  # Older snapshots belong to workers that are gone
+
+# Prediction audit log
+AUDIT_QUEUE_SIZE = 100_000  # Decisions waiting for the writer before new ones are dropped
+AUDIT_BATCH_SIZE = 1024  # Decisions encoded and written per write call
+AUDIT_POLL_SECONDS = 0.05  # Writer sleep when the queue is empty
+AUDIT_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+AUDIT_SEGMENT_MAX_SECONDS = 3600
+AUDIT_FSYNC = "interval"  # "batch" (every write), "interval" or "rotate" (only when a segment is closed)
+AUDIT_FSYNC_SECONDS = 1.0
+
+# Shadow (champion/challenger) scoring
+# Artifact directories of the challengers, separated by os.pathsep; empty disables shadow scoring
+SHADOW_MODEL_DIRS = [Path(path) for path in os.environ.get("SHADOW_MODEL_DIRS", "").split(os.pathsep) if path]
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", 1.0))  # Fraction of requests shadow-scored
+SHADOW_QUEUE_SIZE = 10_000  # Sampled requests waiting for the pool before new ones are dropped
+SHADOW_BATCH_SIZE = 256  # Requests sent to a worker at once
+SHADOW_FLUSH_SECONDS = 1.0  # Longest a sampled request waits for its batch to fill
+SHADOW_WORKERS = 1  # Processes scoring challengers
+SHADOW_DELTA_BINS = 200  # Histogram bins of |challenger - champion| probability over [0, 1]
@@ -0,0 +1,201 @@
+"""
+Counterfactual search for the smallest changes that lower an applicant's risk tier.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List
+import logging
+import time
+
+from .config import (
+    RISK_THRESHOLDS,
+    COUNTERFACTUAL_FIELDS,
+    COUNTERFACTUAL_STEPS,
+    COUNTERFACTUAL_BEAM_WIDTH,
+    COUNTERFACTUAL_REFINE_POINTS,
+    COUNTERFACTUAL_TIME_BUDGET_MS,
+    COUNTERFACTUAL_MAX_RESULTS
+)
+from .preprocessing import Preprocessor
+from .utils import determine_risk_tiers, predict_default_probability
+
+logger = logging.getLogger(__name__)
+
+
+class CounterfactualSearch:
+    """Beam search over actionable applicant fields for a lower risk tier.
+
+    Each field's largest allowed change is cut into ``steps`` equal steps, so
+    a candidate is a vector of step counts and its distance is the sum of the
+    fractions of each field's largest change it uses. Every iteration moves
+    each beam candidate by one to ``steps`` steps along each field, scores all
+    of them in one model call and keeps the ``beam_width`` lowest-probability
+    misses. Hits are kept per set of changed fields; once ``max_results`` sets
+    are found, anything no nearer than the furthest of them is pruned, as is
+    anything that only adds changes on top of a hit. Each hit is finally
+    shrunk towards the applicant in one more batch to find the smallest scale
+    of the change that still reaches the target.
+    """
+
+    def __init__(self, model, preprocessor: Preprocessor,
+                 fields: Dict[str, Dict[str, Any]] = COUNTERFACTUAL_FIELDS,
+                 steps: int = COUNTERFACTUAL_STEPS,
+                 beam_width: int = COUNTERFACTUAL_BEAM_WIDTH):
+        self.model = model
+        self.preprocessor = preprocessor
+        self.fields = fields
+        self.steps = steps
+        self.beam_width = beam_width
+
+    def _score(self, applicant_data: Dict[str, Any], features: List[str],
+               values: np.ndarray) -> np.ndarray:
+        """Default probability of the applicant with ``features`` set to each row of ``values``."""
+
+        candidates = pd.DataFrame([applicant_data] * len(values))
+        for j, feature in enumerate(features):
+            candidates[feature] = values[:, j]
+
+        return predict_default_probability(self.model, self.preprocessor.transform_batch(candidates))
+
+    def _values(self, base: np.ndarray, span: np.ndarray, fraction: np.ndarray,
+                features: List[str]) -> np.ndarray:
+        """Field values after moving ``fraction`` of each field's largest change."""
+
+        values = base + span * fraction
+        for j, feature in enumerate(features):
+            spec = self.fields[feature]
+            if spec.get('integer'):
+                values[:, j] = np.round(values[:, j])
+            values[:, j] = np.clip(values[:, j], spec.get('min', -np.inf), spec.get('max', np.inf))
+
+        return values
+
+    @staticmethod
+    def _bound(hits: Dict[tuple, tuple], max_results: int) -> float:
+        """Distance a candidate must beat once ``max_results`` change sets are found."""
+
+        if len(hits) < max_results:
+            return np.inf
+        return sorted(distance for _, distance in hits.values())[max_results - 1]
+
+    def search(self, applicant_data: Dict[str, Any], target_tier: str = "LOW",
+               max_results: int = COUNTERFACTUAL_MAX_RESULTS,
+               time_budget_ms: float = COUNTERFACTUAL_TIME_BUDGET_MS,
+               features: List[str] = None) -> Dict[str, Any]:
+        """Up to ``max_results`` minimal changes that bring the applicant to ``target_tier`` or lower.
+
+        Changes to different sets of fields are reported separately, nearest
+        first. The search stops early once ``time_budget_ms`` is spent and
+        returns whatever it found so far.
+        """
+
+        start = time.perf_counter()
+        deadline = start + time_budget_ms / 1000
+        tiers = list(RISK_THRESHOLDS)
+        allowed = tiers[:tiers.index(target_tier) + 1]
+
+        features = [
+            feature for feature in (features or self.fields)
+            if feature in self.fields and applicant_data.get(feature) is not None
+        ]
+        base = np.array([float(applicant_data[feature]) for feature in features])
+        span = np.array([
+            self.fields[feature]['direction'] * self.fields[feature]['max_change']
+            * (abs(value) if self.fields[feature]['relative'] else 1.0)
+            for feature, value in zip(features, base)
+        ])
+
+        # A relative change of a zero value cannot move it
+        movable = span != 0
+        features = [feature for feature, keep in zip(features, movable) if keep]
+        base, span = base[movable], span[movable]
+
+        base_probability = float(self._score(applicant_data, features, base[None, :])[0])
+        evaluated = 1
+        hits = {}  # changed fields -> (steps, distance)
+        iterations = 0
+        budget_exhausted = False
+
+        if determine_risk_tiers([base_probability])[0] not in allowed and features:
+            n_fields = len(features)
+            moves = np.concatenate([k * np.eye(n_fields, dtype=np.int64) for k in range(1, self.steps + 1)])
+            beam = np.zeros((1, n_fields), dtype=np.int64)
+            seen = set()
+
+            while len(beam):
+                if time.perf_counter() > deadline:
+                    budget_exhausted = True
+                    break
+
+                candidates = np.unique((beam[:, None, :] + moves[None, :, :]).reshape(-1, n_fields), axis=0)
+                candidates = candidates[(candidates <= self.steps).all(axis=1)]
+
+                # Prune by distance, and drop anything that only adds changes on top of a hit
+                distance = candidates.sum(axis=1) / self.steps
+                keep = distance < self._bound(hits, max_results)
+                if hits:
+                    hit_steps = np.array([steps for steps, _ in hits.values()])
+                    keep &= ~(candidates[:, None, :] >= hit_steps[None, :, :]).all(axis=2).any(axis=1)
+                keys = [row.tobytes() for row in candidates]
+                keep &= np.array([key not in seen for key in keys], dtype=bool)
+                seen.update(keys)
+                candidates, distance = candidates[keep], distance[keep]
+                if len(candidates) == 0:
+                    break
+
+                iterations += 1
+                values = self._values(base, span, candidates / self.steps, features)
+                probability = self._score(applicant_data, features, values)
+                evaluated += len(candidates)
+
+                reached = np.isin(determine_risk_tiers(probability), allowed)
+                for i in np.flatnonzero(reached):
+                    changed = tuple(np.flatnonzero(candidates[i]))
+                    if changed not in hits or distance[i] < hits[changed][1]:
+                        hits[changed] = (candidates[i], distance[i])
+
+                misses = np.flatnonzero(~reached & (distance < self._bound(hits, max_results)))
+                beam = candidates[misses[np.argsort(probability[misses], kind='stable')[:self.beam_width]]]
+
+        counterfactuals = []
+        if hits:
+            # Shrink every hit towards the applicant in one batch
+            scales = np.linspace(0, 1, COUNTERFACTUAL_REFINE_POINTS + 1)[1:]
+            found = [steps for steps, _ in hits.values()]
+            fractions = np.concatenate([scales[:, None] * steps / self.steps for steps in found])
+            values = self._values(base, span, fractions, features)
+            probability = self._score(applicant_data, features, values)
+            evaluated += len(values)
+            reached = np.isin(determine_risk_tiers(probability), allowed).reshape(len(found), len(scales))
+
+            for h in range(len(found)):
+                # The unscaled change is a hit, so there is always a first scale that reaches the target
+                best = h * len(scales) + int(np.argmax(reached[h]))
+                changes = [
+                    {'feature': features[j], 'from_value': float(base[j]), 'to_value': float(values[best, j])}
+                    for j in np.flatnonzero(values[best] != base)
+                ]
+                distance = float(np.sum(np.abs(values[best] - base) / np.abs(span)))
+                counterfactuals.append({
+                    'changes': changes,
+                    'default_probability': float(probability[best]),
+                    'risk_label': str(determine_risk_tiers([probability[best]])[0]),
+                    'distance': distance
+                })
+
+            counterfactuals.sort(key=lambda counterfactual: counterfactual['distance'])
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Counterfactual search: {len(counterfactuals)} found, {evaluated} candidates "
+                    f"in {iterations} iterations, {elapsed_ms:.1f} ms")
+
+        return {
+            'base_probability': base_probability,
+            'base_risk_label': str(determine_risk_tiers([base_probability])[0]),
+            'target_tier': target_tier,
+            'counterfactuals': counterfactuals[:max_results],
+            'candidates_evaluated': evaluated,
+            'iterations': iterations,
+            'elapsed_ms': elapsed_ms,
+            'budget_exhausted': budget_exhausted
+        }
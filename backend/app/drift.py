@@ -0,0 +1,210 @@
+"""
+Constant-memory monitoring of live applicants against the training distribution.
+"""
+import numpy as np
+from typing import Dict, Any, List
+import hashlib
+import logging
+import os
+import time
+from pathlib import Path
+
+from .config import (
+    DRIFT_REFERENCE_PATH,
+    DRIFT_SNAPSHOT_MAX_AGE_SECONDS,
+    DRIFT_PSI_WARNING,
+    DRIFT_PSI_ALERT,
+    DRIFT_MIN_OBSERVATIONS
+)
+
+logger = logging.getLogger(__name__)
+
+# Proportions are floored so empty bins do not make PSI infinite
+_MIN_PROPORTION = 1e-4
+
+_STATUS_ORDER = ["insufficient_data", "stable", "warning", "alert"]
+
+
+def psi(reference: np.ndarray, live: np.ndarray) -> np.ndarray:
+    """Population stability index of each row of ``live`` counts against ``reference`` counts."""
+
+    expected = np.maximum(reference / np.maximum(reference.sum(axis=-1, keepdims=True), 1), _MIN_PROPORTION)
+    actual = np.maximum(live / np.maximum(live.sum(axis=-1, keepdims=True), 1), _MIN_PROPORTION)
+
+    return np.sum((actual - expected) * np.log(actual / expected), axis=-1)
+
+
+def ks(reference: np.ndarray, live: np.ndarray) -> np.ndarray:
+    """Kolmogorov-Smirnov distance between binned distributions, evaluated at the bin edges."""
+
+    expected = np.cumsum(reference, axis=-1) / np.maximum(reference.sum(axis=-1, keepdims=True), 1)
+    actual = np.cumsum(live, axis=-1) / np.maximum(live.sum(axis=-1, keepdims=True), 1)
+
+    return np.abs(actual - expected).max(axis=-1)
+
+
+class DriftMonitor:
+    """Fixed-bin histograms of the transformed features and the predicted probability.
+
+    The bins are the training-time quantile bins saved by
+    ``CreditDataLoader.save_reference_distributions``, so memory is one
+    counter per bin whatever the traffic. ``update`` bins a whole row with
+    one comparison against the edge matrix and one fancy-indexed increment;
+    it never awaits, so on the event loop it cannot interleave with another
+    request and needs no lock. Counts are plain sums, so the monitors of
+    several workers merge by adding them: each worker ``save``s a snapshot
+    and ``merged`` folds in the recent snapshots of the others.
+    """
+
+    def __init__(self, feature_names: List[str], feature_edges: np.ndarray, reference_feature_counts: np.ndarray,
+                 probability_edges: np.ndarray, reference_probability_counts: np.ndarray):
+        self.feature_names = list(feature_names)
+        self.feature_edges = np.asarray(feature_edges, dtype=np.float64)
+        self.reference_feature_counts = np.asarray(reference_feature_counts, dtype=np.int64)
+        self.probability_edges = np.asarray(probability_edges, dtype=np.float64)
+        self.reference_probability_counts = np.asarray(reference_probability_counts, dtype=np.int64)
+
+        self.feature_counts = np.zeros_like(self.reference_feature_counts)
+        self.probability_counts = np.zeros_like(self.reference_probability_counts)
+        self.workers = 1
+        self._rows = np.arange(len(self.feature_names))
+
+        # Snapshots only merge with monitors binned the same way
+        digest = hashlib.sha1(self.feature_edges.tobytes() + self.probability_edges.tobytes())
+        self.reference_id = digest.hexdigest()[:16]
+
+    @classmethod
+    def load_reference(cls, path: Path = DRIFT_REFERENCE_PATH) -> 'DriftMonitor':
+        """Empty monitor binned like the saved training reference."""
+
+        with np.load(path) as reference:
+            return cls(
+                reference['feature_names'].tolist(),
+                reference['feature_edges'],
+                reference['feature_counts'],
+                reference['probability_edges'],
+                reference['probability_counts']
+            )
+
+    @property
+    def observations(self) -> int:
+        return int(self.probability_counts.sum())
+
+    def update(self, x: np.ndarray, probability: float):
+        """Count one transformed applicant row and its predicted probability."""
+
+        bins = (np.asarray(x, dtype=np.float64)[:, None] > self.feature_edges).sum(axis=1)
+        self.feature_counts[self._rows, bins] += 1
+        self.probability_counts[np.searchsorted(self.probability_edges, probability, side='left')] += 1
+
+    def merge(self, other: 'DriftMonitor'):
+        """Add another monitor's counts to this one."""
+
+        if other.reference_id != self.reference_id:
+            raise ValueError("Cannot merge drift monitors built on different references")
+
+        self.feature_counts += other.feature_counts
+        self.probability_counts += other.probability_counts
+        self.workers += other.workers
+
+    def _empty_copy(self) -> 'DriftMonitor':
+        return DriftMonitor(self.feature_names, self.feature_edges, self.reference_feature_counts,
+                            self.probability_edges, self.reference_probability_counts)
+
+    def save(self, path: Path):
+        """Write this monitor's counts for other workers to merge, atomically."""
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                reference_id=self.reference_id,
+                feature_counts=self.feature_counts,
+                probability_counts=self.probability_counts
+            )
+        os.replace(tmp_path, path)
+
+    def merged(self, snapshot_dir: Path, own_snapshot: Path = None,
+               max_age_seconds: float = DRIFT_SNAPSHOT_MAX_AGE_SECONDS) -> 'DriftMonitor':
+        """A new monitor with this one's counts plus every recent snapshot in ``snapshot_dir``.
+
+        ``own_snapshot`` is skipped because its counts are already included
+        (and fresher in memory); snapshots older than ``max_age_seconds`` or
+        taken against another reference are ignored.
+        """
+
+        combined = self._empty_copy()
+        combined.workers = 0
+        combined.merge(self)
+
+        snapshot_dir = Path(snapshot_dir)
+        if not snapshot_dir.exists():
+            return combined
+
+        now = time.time()
+        for path in sorted(snapshot_dir.glob("*.npz")):
+            if own_snapshot is not None and path == Path(own_snapshot):
+                continue
+            try:
+                if now - path.stat().st_mtime > max_age_seconds:
+                    continue
+                with np.load(path) as snapshot:
+                    if str(snapshot['reference_id']) != self.reference_id:
+                        continue
+                    other = self._empty_copy()
+                    other.feature_counts = snapshot['feature_counts']
+                    other.probability_counts = snapshot['probability_counts']
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Skipping unreadable drift snapshot {path}: {e}")
+                continue
+            combined.merge(other)
+
+        return combined
+
+    def _status(self, value: float) -> str:
+        if self.observations < DRIFT_MIN_OBSERVATIONS:
+            return "insufficient_data"
+        if value >= DRIFT_PSI_ALERT:
+            return "alert"
+        if value >= DRIFT_PSI_WARNING:
+            return "warning"
+        return "stable"
+
+    def report(self) -> Dict[str, Any]:
+        """PSI and KS of every feature and of the probability, most drifted feature first."""
+
+        feature_psi = psi(self.reference_feature_counts, self.feature_counts)
+        feature_ks = ks(self.reference_feature_counts, self.feature_counts)
+        probability_psi = float(psi(self.reference_probability_counts, self.probability_counts))
+
+        features = [
+            {
+                'feature': name,
+                'psi': float(feature_psi[j]),
+                'ks': float(feature_ks[j]),
+                'status': self._status(feature_psi[j])
+            }
+            for j, name in enumerate(self.feature_names)
+        ]
+        features.sort(key=lambda feature: feature['psi'], reverse=True)
+
+        probability = {
+            'feature': 'default_probability',
+            'psi': probability_psi,
+            'ks': float(ks(self.reference_probability_counts, self.probability_counts)),
+            'status': self._status(probability_psi)
+        }
+
+        statuses = [probability['status']] + [feature['status'] for feature in features]
+
+        return {
+            'status': max(statuses, key=_STATUS_ORDER.index),
+            'observations': self.observations,
+            'reference_rows': int(self.reference_feature_counts[0].sum()) if len(self.feature_names) else 0,
+            'workers': self.workers,
+            'probability': probability,
+            'features': features
+        }
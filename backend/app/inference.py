@@ -14,6 +14,15 @@ from .config import ARTIFACTS_ROOT
 logger = logging.getLogger(__name__)
 
 
+def top_impacts(shap_values: np.ndarray, top_n: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """Column indices and values of each row's ``top_n`` largest absolute SHAP values."""
+    
+    top_n = min(top_n, shap_values.shape[1])
+    order = np.argsort(-np.abs(shap_values), axis=1, kind='stable')[:, :top_n]
+    
+    return order, np.take_along_axis(shap_values, order, axis=1)
+
+
 class SHAPExplainer:
     """Handles SHAP-based explainability for credit risk predictions."""
     
@@ -86,7 +95,7 @@ class SHAPExplainer:
             prediction = self.model.predict(X)[0]
         
         # Create feature impact analysis
-        feature_impacts = self._analyze_feature_impacts(shap_values[0])
+        feature_impacts = self.analyze_feature_impacts(shap_values[0])
         
         return {
             'prediction': prediction,
@@ -94,7 +103,7 @@ class SHAPExplainer:
             'feature_impacts': feature_impacts
         }
     
-    def _analyze_feature_impacts(self, shap_values: np.ndarray) -> List[Dict[str, Any]]:
+    def analyze_feature_impacts(self, shap_values: np.ndarray) -> List[Dict[str, Any]]:
         """Analyze feature impacts and create human-readable explanations."""
         
         # Create feature impact pairs
@@ -176,6 +185,31 @@ class SHAPExplainer:
             else:
                 return f"Lower {feature_desc.lower()} decreases default risk"
     
+    def shap_values_batch(self, X: np.ndarray) -> np.ndarray:
+        """Positive-class SHAP values for every row of ``X``, shape (rows, features)."""
+        
+        if self.explainer is None:
+            raise ValueError("Explainer not initialized. Call load_model_and_setup first.")
+        
+        shap_values = self.explainer.shap_values(X)
+        
+        # Handle different SHAP output formats
+        if isinstance(shap_values, list):
+            shap_values = shap_values[1]
+        if shap_values.ndim == 3:
+            shap_values = shap_values[:, :, 1]
+        
+        return shap_values
+    
+    def top_factors_batch(self, X: np.ndarray, top_n: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """Feature indices and signed SHAP values of each row's ``top_n`` largest impacts.
+        
+        One explainer call covers the whole batch; rows are ordered by
+        absolute impact like ``explain_prediction``.
+        """
+        
+        return top_impacts(self.shap_values_batch(X), top_n)
+    
     def get_top_risk_factors(self, X: np.ndarray, top_n: int = 5) -> List[Dict[str, Any]]:
         """Get top risk factors for a prediction."""
         
@@ -1,28 +1,57 @@
 """
 FastAPI application for credit risk assessment.
 """
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+import asyncio
 import logging
+import os
 from typing import Dict, Any
 import numpy as np
+from pydantic import ValidationError
 
-from .config import API_TITLE, API_DESCRIPTION, API_VERSION, CORS_ORIGINS
+from .config import (
+    API_TITLE,
+    API_DESCRIPTION,
+    API_VERSION,
+    CORS_ORIGINS,
+    SENSITIVITY_MAX_POINTS,
+    COUNTERFACTUAL_FIELDS,
+    DRIFT_SNAPSHOT_DIR,
+    DRIFT_SNAPSHOT_SECONDS,
+    SHADOW_MODEL_DIRS
+)
 from .schemas import (
     ApplicantRequest, 
     PredictionResponse, 
     HealthResponse, 
     ErrorResponse,
-    ModelSchemaResponse
+    ModelSchemaResponse,
+    SensitivityRequest,
+    SensitivityResponse,
+    CounterfactualRequest,
+    CounterfactualResponse,
+    SessionResponse,
+    DriftResponse,
+    AuditStatsResponse,
+    ShadowResponse
 )
 from .preprocessing import Preprocessor
 from .inference import SHAPExplainer
+from .counterfactual import CounterfactualSearch
+from .scoring_sessions import TreeIndex, SessionStore
+from .drift import DriftMonitor
+from .audit_log import AuditLog
+from .shadow import ShadowScorer
 from .utils import (
     load_model_artifacts, 
     validate_applicant_data, 
     format_prediction_response,
-    get_model_schema
+    get_model_schema,
+    build_sensitivity_grid,
+    determine_risk_tiers,
+    predict_default_probability
 )
 
 # Configure logging
@@ -49,12 +78,32 @@ app.add_middleware(
 model_artifacts = None
 preprocessor = None
 shap_explainer = None
+counterfactual_search = None
+session_store = None
+drift_monitor = None
+audit_log = None
+shadow_scorer = None
+
+# Each worker process writes its drift counts here for the others to merge
+drift_snapshot_path = DRIFT_SNAPSHOT_DIR / f"worker-{os.getpid()}.npz"
+
+
+async def _write_drift_snapshots():
+    """Periodically publish this worker's drift counts."""
+    
+    while True:
+        await asyncio.sleep(DRIFT_SNAPSHOT_SECONDS)
+        try:
+            drift_monitor.save(drift_snapshot_path)
+        except Exception as e:
+            logger.warning(f"Failed to write drift snapshot: {e}")
 
 
 @app.on_event("startup")
 async def startup_event():
     """Load model artifacts on startup."""
-    global model_artifacts, preprocessor, shap_explainer
+    global model_artifacts, preprocessor, shap_explainer, counterfactual_search, session_store, drift_monitor
+    global audit_log, shadow_scorer
     
     try:
         logger.info("Loading model artifacts...")
@@ -73,6 +122,35 @@ async def startup_event():
             model_artifacts['feature_names']
         )
         
+        counterfactual_search = CounterfactualSearch(model_artifacts['model'], preprocessor)
+        
+        # Initialize incremental scoring sessions
+        try:
+            tree_index = TreeIndex(model_artifacts['model'], len(model_artifacts['feature_names']))
+            session_store = SessionStore(tree_index, preprocessor, shap_explainer)
+        except Exception as e:
+            logger.warning(f"Incremental scoring sessions unavailable for this model: {e}")
+        
+        # Initialize drift monitoring against the training reference
+        try:
+            drift_monitor = DriftMonitor.load_reference()
+            if drift_monitor.feature_names != list(preprocessor.feature_names):
+                raise ValueError("reference features do not match the deployed feature list")
+            asyncio.get_running_loop().create_task(_write_drift_snapshots())
+        except Exception as e:
+            drift_monitor = None
+            logger.warning(f"Drift monitoring unavailable: {e}")
+        
+        # Start the background audit log writer
+        audit_log = AuditLog().start()
+        
+        # Score challengers next to the champion when any are configured
+        if SHADOW_MODEL_DIRS:
+            try:
+                shadow_scorer = ShadowScorer(SHADOW_MODEL_DIRS).start()
+            except Exception as e:
+                logger.warning(f"Shadow scoring unavailable: {e}")
+        
         logger.info("Model artifacts loaded successfully")
         
     except Exception as e:
@@ -80,6 +158,16 @@ async def startup_event():
         raise
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Write out queued audit records and stop the shadow workers before exiting."""
+    
+    if audit_log is not None:
+        audit_log.close()
+    if shadow_scorer is not None:
+        shadow_scorer.close()
+
+
 @app.get("/api/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
@@ -120,11 +208,19 @@ async def predict_credit_risk(applicant: ApplicantRequest):
         else:
             probability = model.predict(X)[0]
         
+        if drift_monitor is not None:
+            drift_monitor.update(X[0], probability)
+        
         # Get SHAP explanations
         risk_factors = shap_explainer.get_top_risk_factors(X, top_n=5)
         
         # Format response
-        response = format_prediction_response(probability, risk_factors)
+        response = format_prediction_response(probability, risk_factors, model_artifacts['model_version'])
+        
+        if audit_log is not None:
+            audit_log.record(applicant_data, response)
+        if shadow_scorer is not None:
+            shadow_scorer.submit(applicant_data, probability)
         
         logger.info(f"Prediction completed: {probability:.3f} probability, {response['risk_label']} risk")
         
@@ -140,6 +236,264 @@ async def predict_credit_risk(applicant: ApplicantRequest):
         )
 
 
+@app.post("/api/sensitivity", response_model=SensitivityResponse)
+async def sensitivity_sweep(request: SensitivityRequest):
+    """Predict credit risk across a grid of values for one or two applicant fields."""
+    
+    try:
+        applicant_data = request.applicant.dict()
+        sweeps = [(sweep.feature, sweep.values) for sweep in request.sweeps]
+        
+        n_points = int(np.prod([len(values) for _, values in sweeps]))
+        if n_points > SENSITIVITY_MAX_POINTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Sweep has {n_points} grid points, the limit is {SENSITIVITY_MAX_POINTS}"
+            )
+        
+        # Every grid value has to be a valid input on its own
+        validation_errors = validate_applicant_data(applicant_data)
+        for feature, values in sweeps:
+            for value in values:
+                validation_errors.extend(validate_applicant_data({**applicant_data, feature: value}))
+        if validation_errors:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Validation errors: {', '.join(dict.fromkeys(validation_errors))}"
+            )
+        
+        # Base applicant and the whole grid go through the model in one call
+        grid = build_sensitivity_grid(applicant_data, sweeps)
+        X = preprocessor.transform_batch(grid)
+        probabilities = predict_default_probability(model_artifacts['model'], X)
+        risk_labels = determine_risk_tiers(probabilities)
+        
+        shap_values = shap_explainer.shap_values_batch(X[1:]) if request.explain else None
+        
+        features = [feature for feature, _ in sweeps]
+        grid_values = grid[features].to_numpy()
+        points = []
+        for i in range(1, len(grid)):
+            point = {
+                'values': dict(zip(features, grid_values[i].tolist())),
+                'default_probability': float(probabilities[i]),
+                'risk_label': str(risk_labels[i])
+            }
+            if shap_values is not None:
+                point['top_factors'] = shap_explainer.analyze_feature_impacts(shap_values[i - 1])[:request.top_n]
+            points.append(point)
+        
+        logger.info(f"Sensitivity sweep over {features}: {len(points)} points")
+        
+        return SensitivityResponse(
+            features=features,
+            base_probability=float(probabilities[0]),
+            base_risk_label=str(risk_labels[0]),
+            points=points,
+            model_version=model_artifacts['model_version']
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Sensitivity error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@app.post("/api/counterfactual", response_model=CounterfactualResponse)
+async def find_counterfactuals(request: CounterfactualRequest):
+    """Find the smallest changes to actionable fields that lower the applicant's risk tier."""
+    
+    try:
+        applicant_data = request.applicant.dict()
+        validation_errors = validate_applicant_data(applicant_data)
+        unknown = [field for field in request.fields or [] if field not in COUNTERFACTUAL_FIELDS]
+        if unknown:
+            validation_errors.append(
+                f"Not actionable: {', '.join(unknown)} (choose from {', '.join(COUNTERFACTUAL_FIELDS)})"
+            )
+        if validation_errors:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Validation errors: {', '.join(validation_errors)}"
+            )
+        
+        result = counterfactual_search.search(
+            applicant_data,
+            target_tier=request.target_tier,
+            max_results=request.max_results,
+            time_budget_ms=request.time_budget_ms,
+            features=request.fields
+        )
+        
+        return CounterfactualResponse(**result)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Counterfactual error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+def _require_sessions():
+    """Raise 503 when the deployed model cannot be scored incrementally."""
+    
+    if session_store is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Incremental scoring sessions are not available for the deployed model"
+        )
+
+
+@app.post("/api/sessions", response_model=SessionResponse)
+async def create_scoring_session(applicant: ApplicantRequest):
+    """Score an applicant and open a session for field-by-field edits."""
+    
+    _require_sessions()
+    
+    try:
+        applicant_data = applicant.dict()
+        validation_errors = validate_applicant_data(applicant_data)
+        if validation_errors:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Validation errors: {', '.join(validation_errors)}"
+            )
+        
+        return SessionResponse(**session_store.create(applicant_data),
+                               model_version=model_artifacts['model_version'])
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Session error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@app.patch("/api/sessions/{session_id}", response_model=SessionResponse)
+async def edit_scoring_session(session_id: str, changes: Dict[str, Any]):
+    """Change some applicant fields and rescore only the trees they affect."""
+    
+    _require_sessions()
+    
+    try:
+        try:
+            applicant_data = session_store.applicant_data(session_id)
+        except KeyError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Unknown or expired session: {session_id}"
+            )
+        
+        unknown = [field for field in changes if field not in ApplicantRequest.model_fields]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown applicant fields: {', '.join(unknown)}"
+            )
+        
+        try:
+            applicant = ApplicantRequest(**{**applicant_data, **changes})
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Validation errors: {', '.join(error['msg'] for error in e.errors())}"
+            )
+        validation_errors = validate_applicant_data(applicant.dict())
+        if validation_errors:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Validation errors: {', '.join(validation_errors)}"
+            )
+        
+        edited = applicant.dict()
+        return SessionResponse(**session_store.update(
+            session_id, {field: edited[field] for field in changes}
+        ), model_version=model_artifacts['model_version'])
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Session error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@app.delete("/api/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def close_scoring_session(session_id: str):
+    """Close a scoring session."""
+    
+    _require_sessions()
+    
+    if not session_store.delete(session_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown or expired session: {session_id}"
+        )
+    
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@app.get("/api/drift", response_model=DriftResponse)
+async def get_drift():
+    """PSI and KS of live traffic against the training distributions, merged across workers."""
+    
+    if drift_monitor is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Drift monitoring is not available: no training reference was loaded"
+        )
+    
+    try:
+        drift_monitor.save(drift_snapshot_path)
+        merged = drift_monitor.merged(DRIFT_SNAPSHOT_DIR, own_snapshot=drift_snapshot_path)
+        return DriftResponse(**merged.report())
+        
+    except Exception as e:
+        logger.error(f"Drift error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@app.get("/api/audit/stats", response_model=AuditStatsResponse)
+async def get_audit_stats():
+    """Queue depth, drops and write counters of this worker's audit log."""
+    
+    if audit_log is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Audit log is not running"
+        )
+    
+    return AuditStatsResponse(**audit_log.stats())
+
+
+@app.get("/api/shadow", response_model=ShadowResponse)
+async def get_shadow_agreement():
+    """Agreement of each challenger with the champion on shadow-scored traffic."""
+    
+    if shadow_scorer is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Shadow scoring is not enabled: set SHADOW_MODEL_DIRS to challenger artifact directories"
+        )
+    
+    return ShadowResponse(**shadow_scorer.report())
+
+
 @app.get("/api/schema", response_model=ModelSchemaResponse)
 async def get_model_schema():
     """Get model schema and feature definitions."""
@@ -7,6 +7,8 @@ from typing import Dict, Any, List
 import joblib
 from pathlib import Path
 import logging
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import StandardScaler
 
 from .config import ARTIFACTS_ROOT
 
@@ -22,14 +24,14 @@ class Preprocessor:
         self.feature_names = []
         self.feature_mapping = {}
         
-    def load_artifacts(self):
-        """Load preprocessing artifacts."""
+    def load_artifacts(self, artifacts_dir: Path = ARTIFACTS_ROOT):
+        """Load preprocessing artifacts, by default those of the deployed model."""
         try:
-            self.scaler = joblib.load(ARTIFACTS_ROOT / "scaler.pkl")
-            self.imputer = joblib.load(ARTIFACTS_ROOT / "imputer.pkl")
+            self.scaler = joblib.load(artifacts_dir / "scaler.pkl")
+            self.imputer = joblib.load(artifacts_dir / "imputer.pkl")
             
             import json
-            with open(ARTIFACTS_ROOT / "feature_list.json", 'r') as f:
+            with open(artifacts_dir / "feature_list.json", 'r') as f:
                 self.feature_names = json.load(f)
                 
             logger.info("Preprocessing artifacts loaded successfully")
@@ -41,17 +43,23 @@ class Preprocessor:
     def transform_applicant_data(self, applicant_data: Dict[str, Any]) -> np.ndarray:
         """Transform applicant data for model prediction."""
         
-        # Convert to DataFrame
-        df = pd.DataFrame([applicant_data])
+        return self.transform_batch(pd.DataFrame([applicant_data]))
+    
+    def transform_batch(self, df: pd.DataFrame) -> np.ndarray:
+        """Transform a frame of applicants, one per row, for model prediction.
+        
+        Runs the same steps as a single applicant column-wise, so a chunk of
+        any size costs one imputer and one scaler call.
+        """
         
         # Add derived features
-        df = self._add_derived_features(df)
+        df = self._add_derived_features(df.copy())
         
         # Ensure all required features are present
         df = self._ensure_feature_completeness(df)
         
-        # Reorder columns to match training order
-        df = df[self.feature_names]
+        # Reorder columns to match training order (optional fields may be None)
+        df = df[self.feature_names].astype(np.float64)
         
         # Handle missing values
         df_imputed = pd.DataFrame(
@@ -61,13 +69,7 @@ class Preprocessor:
         )
         
         # Scale features
-        df_scaled = pd.DataFrame(
-            self.scaler.transform(df_imputed),
-            columns=df_imputed.columns,
-            index=df_imputed.index
-        )
-        
-        return df_scaled.values
+        return self.scaler.transform(df_imputed)
     
     def _add_derived_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add derived features that were created during training."""
@@ -89,21 +91,59 @@ class Preprocessor:
     def _ensure_feature_completeness(self, df: pd.DataFrame) -> pd.DataFrame:
         """Ensure all required features are present with default values."""
         
-        # Default values for missing features
-        defaults = {
+        defaults = self._feature_defaults(
+            df['annual_income'].iloc[0] if 'annual_income' in df.columns else None
+        )
+        
+        # Add missing features with defaults
+        for feature, default_value in defaults.items():
+            if feature not in df.columns:
+                df[feature] = default_value
+        
+        return df
+    
+    def _feature_defaults(self, annual_income: float = None) -> Dict[str, Any]:
+        """Default values for features the input does not provide."""
+        
+        return {
             'age': 35,
             'dependents': 0,
             'employment_length': 5,
             'loan_amount': 10000,
             'term_length': 36,
-            'monthly_income': df['annual_income'].iloc[0] / 12 if 'annual_income' in df.columns else 5000,
+            'monthly_income': annual_income / 12 if annual_income is not None else 5000,
             'loan_to_income_ratio': 0.2,
             'high_utilization': 0
         }
+    
+    def transform_row(self, applicant_data: Dict[str, Any]) -> np.ndarray:
+        """``transform_applicant_data`` for one applicant without building a DataFrame.
         
-        # Add missing features with defaults
-        for feature, default_value in defaults.items():
-            if feature not in df.columns:
-                df[feature] = default_value
+        Applies the fitted median imputer and standard scaler as plain array
+        arithmetic, which gives the same values at a fraction of the per-call
+        overhead; any other transformers go through the DataFrame path.
+        """
         
-        return df
+        imputer, scaler = self.imputer, self.scaler
+        if not (isinstance(imputer, SimpleImputer) and isinstance(scaler, StandardScaler)
+                and scaler.with_mean and scaler.with_std and not imputer.add_indicator
+                and not np.isnan(imputer.statistics_).any()):
+            return self.transform_applicant_data(applicant_data)
+        
+        row = {field: np.nan if value is None else value for field, value in applicant_data.items()}
+        
+        # Same derived features as _add_derived_features
+        if 'annual_income' in row:
+            row['monthly_income'] = row['annual_income'] / 12
+        if 'loan_amount' in row and 'annual_income' in row:
+            row['loan_to_income_ratio'] = row['loan_amount'] / row['annual_income']
+        if 'revolving_utilization' in row:
+            row['high_utilization'] = int(row['revolving_utilization'] > 0.8)
+        
+        for feature, default_value in self._feature_defaults(row.get('annual_income')).items():
+            row.setdefault(feature, default_value)
+        
+        x = np.array([row[feature] for feature in self.feature_names], dtype=np.float64)
+        x = np.where(np.isnan(x), imputer.statistics_, x)
+        
+        return ((x - scaler.mean_) / scaler.scale_)[None, :]
@@ -0,0 +1,181 @@
+"""
+Capture files of live /api/predict traffic and their replay against candidate model artifacts.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from .config import N_JOBS, BATCH_CHUNK_SIZE, REPLAY_DELTA_THRESHOLDS
+from .audit_log import read_segment, SEGMENT_SUFFIX
+from .batch_scoring import BatchScoringJob
+from .utils import determine_risk_tiers
+
+logger = logging.getLogger(__name__)
+
+TIERS = ["LOW", "MEDIUM", "HIGH"]
+
+def _segment_paths(paths: List[Path]) -> List[Path]:
+    """Audit segments named directly or found in the given directories, in write order."""
+
+    segments = []
+    for path in map(Path, paths):
+        segments.extend(sorted(path.glob(f"*{SEGMENT_SUFFIX}")) if path.is_dir() else [path])
+    return segments
+
+
+def capture_from_audit_log(paths: List[Path]) -> pd.DataFrame:
+    """One row per recorded decision: the applicant fields plus what the server answered.
+
+    The audit log already records every request and response, so a capture
+    of a day of traffic is the segments written that day.
+    """
+
+    rows = []
+    for segment in _segment_paths(paths):
+        for decision in read_segment(segment, with_factors=False):
+            rows.append({
+                **decision['applicant'],
+                'timestamp': decision['timestamp'],
+                'recorded_probability': decision['default_probability'],
+                'recorded_risk_label': decision['risk_label'],
+                'model_version': decision['model_version']
+            })
+
+    return pd.DataFrame(rows)
+
+
+def write_capture(paths: List[Path], output_path: Path) -> int:
+    """Convert audit segments into a columnar Parquet capture; returns the number of requests."""
+
+    capture = capture_from_audit_log(paths)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    capture.to_parquet(output_path, index=False)
+
+    logger.info(f"Captured {len(capture)} requests into {output_path}")
+    return len(capture)
+
+
+def compare_predictions(recorded_probability: np.ndarray, recorded_label: np.ndarray,
+                        candidate_probability: np.ndarray) -> Dict[str, Any]:
+    """Distribution of probability deltas and tier changes of a candidate against recorded responses."""
+
+    delta = np.asarray(candidate_probability) - np.asarray(recorded_probability)
+    abs_delta = np.abs(delta)
+    candidate_label = determine_risk_tiers(candidate_probability)
+    recorded_label = np.asarray(recorded_label)
+
+    # Rows are recorded tiers, columns candidate tiers, both from lowest to highest risk
+    transitions = np.zeros((len(TIERS), len(TIERS)), dtype=np.int64)
+    np.add.at(transitions, (pd.Categorical(recorded_label, categories=TIERS).codes,
+                            pd.Categorical(candidate_label, categories=TIERS).codes), 1)
+    changed = recorded_label != candidate_label
+    quantiles = [0.01, 0.05, 0.5, 0.95, 0.99]
+
+    return {
+        'rows': len(delta),
+        'probability_delta': {
+            'mean': float(delta.mean()),
+            'std': float(delta.std()),
+            'mean_abs': float(abs_delta.mean()),
+            'max_abs': float(abs_delta.max()),
+            'quantiles': {f"p{round(q * 100)}": float(v) for q, v in zip(quantiles, np.quantile(delta, quantiles))},
+            'share_above': {str(t): float((abs_delta > t).mean()) for t in REPLAY_DELTA_THRESHOLDS}
+        },
+        'tier_changes': {
+            'changed': int(changed.sum()),
+            'changed_rate': float(changed.mean()),
+            'raised': int(np.triu(transitions, 1).sum()),
+            'lowered': int(np.tril(transitions, -1).sum()),
+            'transitions': {
+                recorded: {candidate: int(transitions[i, j]) for j, candidate in enumerate(TIERS)}
+                for i, recorded in enumerate(TIERS)
+            }
+        }
+    }
+
+
+def replay(capture_path: Path, artifacts_dir: Path, output_dir: Path = None,
+           n_workers: int = None, chunk_size: int = BATCH_CHUNK_SIZE) -> Dict[str, Any]:
+    """Score a capture with the model in ``artifacts_dir`` and diff it against the recorded responses.
+
+    Scoring goes through ``BatchScoringJob``: the capture is preprocessed in
+    chunks into shared memory and scored by ``n_workers`` processes. The
+    candidate's scores are kept in ``output_dir`` when one is given.
+    """
+
+    capture_path = Path(capture_path)
+    if capture_path.is_dir() or capture_path.suffix == SEGMENT_SUFFIX:
+        raise ValueError(f"{capture_path} is an audit log; convert it with `capture` first")
+
+    with tempfile.TemporaryDirectory(prefix="replay_") as tmp_dir:
+        output_dir = Path(output_dir) if output_dir else Path(tmp_dir) / "scored"
+        job = BatchScoringJob(capture_path, output_dir, chunk_size=chunk_size,
+                              n_workers=n_workers or N_JOBS, artifacts_dir=artifacts_dir)
+        scoring = job.run(restart=True)
+
+        start = time.perf_counter()
+        scored = pd.read_parquet(output_dir, columns=['row_index', 'default_probability'])
+        scored = scored.sort_values('row_index')
+        recorded = pd.read_parquet(capture_path, columns=['recorded_probability', 'recorded_risk_label'])
+
+    report = compare_predictions(
+        recorded['recorded_probability'].to_numpy(),
+        recorded['recorded_risk_label'].to_numpy(),
+        scored['default_probability'].to_numpy()
+    )
+    report['candidate'] = str(Path(artifacts_dir).resolve())
+    report['throughput'] = {
+        'rows': scoring['rows'],
+        'workers': job.n_workers,
+        'scoring_seconds': scoring['wall_time'],
+        'rows_per_second': scoring['rows_per_second'],
+        'compare_seconds': time.perf_counter() - start
+    }
+
+    logger.info(f"Replayed {report['rows']} requests at {scoring['rows_per_second']:,.0f} rows/s: "
+                f"{report['tier_changes']['changed']} tier changes, "
+                f"mean |delta| {report['probability_delta']['mean_abs']:.4f}")
+
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Capture /api/predict traffic and replay it against a candidate model")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    capture = commands.add_parser("capture", help="Convert audit log segments into a Parquet capture")
+    capture.add_argument("segments", type=Path, nargs="+", help="Segment files or directories of segments")
+    capture.add_argument("--output", type=Path, required=True, help="Capture file to write (.parquet)")
+
+    run = commands.add_parser("run", help="Score a capture with candidate artifacts and diff the outputs")
+    run.add_argument("capture", type=Path, help="Parquet capture written by `capture`")
+    run.add_argument("artifacts", type=Path, help="Candidate artifact directory (model.pkl, scaler.pkl, ...)")
+    run.add_argument("--output", type=Path, default=None, help="Keep the candidate's scores in this directory")
+    run.add_argument("--report", type=Path, default=None, help="Write the JSON report here instead of stdout")
+    run.add_argument("--workers", type=int, default=None, help=f"Scoring processes (default: {N_JOBS})")
+    run.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE)
+
+    args = parser.parse_args()
+
+    if args.command == "capture":
+        write_capture(args.segments, args.output)
+    else:
+        report = replay(args.capture, args.artifacts, output_dir=args.output,
+                        n_workers=args.workers, chunk_size=args.chunk_size)
+        if args.report:
+            with open(args.report, 'w') as f:
+                json.dump(report, f, indent=2)
+        else:
+            json.dump(report, sys.stdout, indent=2)
+            sys.stdout.write("\n")
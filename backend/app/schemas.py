@@ -1,10 +1,12 @@
 """
 Pydantic schemas for API request/response models.
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 from pydantic import BaseModel, Field, validator
 import numpy as np
 
+from .config import COUNTERFACTUAL_MAX_RESULTS, COUNTERFACTUAL_TIME_BUDGET_MS
+
 
 class ApplicantRequest(BaseModel):
     """Request schema for credit risk prediction."""
@@ -53,6 +55,170 @@ class PredictionResponse(BaseModel):
     model_version: str = Field(default="1.0", description="Model version used for prediction")
 
 
+class FeatureSweep(BaseModel):
+    """One applicant field and the values it takes in a sensitivity sweep."""
+    
+    feature: str = Field(..., description="ApplicantRequest field to vary, e.g. annual_income")
+    values: List[float] = Field(..., min_length=1, description="Grid of values for the field")
+    
+    @validator('feature')
+    def validate_feature(cls, v):
+        if v not in ApplicantRequest.model_fields:
+            raise ValueError(f"Unknown applicant field: {v}")
+        return v
+
+
+class SensitivityRequest(BaseModel):
+    """Request schema for a what-if sensitivity sweep around one applicant."""
+    
+    applicant: ApplicantRequest = Field(..., description="Base applicant the sweep starts from")
+    sweeps: List[FeatureSweep] = Field(..., min_length=1, max_length=2, description="One or two fields to vary")
+    explain: bool = Field(default=False, description="Include SHAP risk factors for every grid point")
+    top_n: int = Field(default=3, ge=1, le=10, description="Risk factors per grid point when explaining")
+    
+    @validator('sweeps')
+    def validate_distinct_features(cls, v):
+        features = [sweep.feature for sweep in v]
+        if len(set(features)) != len(features):
+            raise ValueError('Each field can only be swept once')
+        return v
+
+
+class SensitivityPoint(BaseModel):
+    """Prediction at one point of a sensitivity grid."""
+    
+    values: Dict[str, float] = Field(..., description="Swept field values at this point")
+    default_probability: float = Field(..., ge=0, le=1, description="Probability of default (0-1)")
+    risk_label: str = Field(..., description="Risk tier: LOW, MEDIUM, or HIGH")
+    top_factors: Optional[List[RiskFactor]] = Field(None, description="Top risk factors, when requested")
+
+
+class SensitivityResponse(BaseModel):
+    """Response schema for a sensitivity sweep."""
+    
+    features: List[str] = Field(..., description="Swept fields, outermost first")
+    base_probability: float = Field(..., ge=0, le=1, description="Probability of default for the base applicant")
+    base_risk_label: str = Field(..., description="Risk tier of the base applicant")
+    points: List[SensitivityPoint] = Field(..., description="Grid points in row-major order")
+    model_version: str = Field(default="1.0", description="Model version used for prediction")
+
+
+class CounterfactualRequest(BaseModel):
+    """Request schema for a search for the smallest changes that lower the risk tier."""
+    
+    applicant: ApplicantRequest = Field(..., description="Applicant to find changes for")
+    target_tier: Literal["LOW", "MEDIUM"] = Field(default="LOW", description="Highest acceptable risk tier")
+    max_results: int = Field(default=COUNTERFACTUAL_MAX_RESULTS, ge=1, le=10, description="Alternative changes to return")
+    time_budget_ms: float = Field(default=COUNTERFACTUAL_TIME_BUDGET_MS, gt=0, le=5000, description="Search time limit in milliseconds")
+    fields: Optional[List[str]] = Field(None, description="Restrict the search to these actionable fields")
+
+
+class FeatureChange(BaseModel):
+    """Change of one applicant field in a counterfactual."""
+    
+    feature: str = Field(..., description="Applicant field")
+    from_value: float = Field(..., description="Current value")
+    to_value: float = Field(..., description="Value that, with the other changes, reaches the target tier")
+
+
+class Counterfactual(BaseModel):
+    """One set of changes that brings the applicant to the target tier."""
+    
+    changes: List[FeatureChange] = Field(..., description="Field changes")
+    default_probability: float = Field(..., ge=0, le=1, description="Probability of default after the changes")
+    risk_label: str = Field(..., description="Risk tier after the changes")
+    distance: float = Field(..., description="Size of the change, in fractions of each field's largest allowed change")
+
+
+class CounterfactualResponse(BaseModel):
+    """Response schema for a counterfactual search."""
+    
+    base_probability: float = Field(..., ge=0, le=1, description="Probability of default for the applicant")
+    base_risk_label: str = Field(..., description="Current risk tier")
+    target_tier: str = Field(..., description="Highest acceptable risk tier")
+    counterfactuals: List[Counterfactual] = Field(..., description="Minimal changes, nearest first")
+    candidates_evaluated: int = Field(..., description="Candidate applicants scored")
+    iterations: int = Field(..., description="Search iterations run")
+    elapsed_ms: float = Field(..., description="Search time in milliseconds")
+    budget_exhausted: bool = Field(..., description="Whether the search stopped at the time budget")
+
+
+class SessionResponse(BaseModel):
+    """Response schema for creating or editing an interactive scoring session."""
+    
+    session_id: str = Field(..., description="Session to send further edits to")
+    default_probability: float = Field(..., ge=0, le=1, description="Probability of default (0-1)")
+    risk_label: str = Field(..., description="Risk tier: LOW, MEDIUM, or HIGH")
+    top_factors: List[RiskFactor] = Field(..., description="Top risk factors with explanations")
+    changed_features: List[str] = Field(..., description="Model features whose value the edit changed")
+    trees_evaluated: int = Field(..., description="Trees re-evaluated for this request")
+    total_trees: int = Field(..., description="Trees in the model")
+    elapsed_ms: float = Field(..., description="Scoring time in milliseconds")
+    model_version: str = Field(default="1.0", description="Model version used for prediction")
+
+
+class DistributionDrift(BaseModel):
+    """Drift of one feature (or of the predicted probability) from its training distribution."""
+    
+    feature: str = Field(..., description="Transformed feature name, or default_probability")
+    psi: float = Field(..., ge=0, description="Population stability index against the training reference")
+    ks: float = Field(..., ge=0, le=1, description="Kolmogorov-Smirnov distance on the reference bins")
+    status: str = Field(..., description="insufficient_data, stable, warning or alert")
+
+
+class DriftResponse(BaseModel):
+    """Response schema for live feature-drift monitoring."""
+    
+    status: str = Field(..., description="Worst status over the probability and all features")
+    observations: int = Field(..., description="Live predictions counted")
+    reference_rows: int = Field(..., description="Training rows behind the reference distributions")
+    workers: int = Field(..., description="Server workers whose counts are included")
+    probability: DistributionDrift = Field(..., description="Drift of the predicted default probability")
+    features: List[DistributionDrift] = Field(..., description="Drift per model feature, most drifted first")
+
+
+class AuditStatsResponse(BaseModel):
+    """Response schema for the prediction audit log counters."""
+    
+    accepted: int = Field(..., description="Decisions queued for writing")
+    dropped: int = Field(..., description="Decisions dropped because the queue was full")
+    written: int = Field(..., description="Decisions written to segment files")
+    queued: int = Field(..., description="Decisions currently waiting for the writer")
+    queue_high_water: int = Field(..., description="Deepest the queue has been")
+    queue_size: int = Field(..., description="Queue capacity")
+    segments: int = Field(..., description="Segment files opened")
+    bytes_written: int = Field(..., description="Bytes of records written")
+    write_errors: int = Field(..., description="Records lost to encoding or I/O errors")
+    current_segment: Optional[str] = Field(None, description="Segment file being written")
+
+
+class ChallengerAgreement(BaseModel):
+    """Agreement of one challenger model with the champion."""
+    
+    name: str = Field(..., description="Challenger artifact directory name")
+    scored: int = Field(..., description="Requests scored by both models")
+    tier_agreement: float = Field(..., ge=0, le=1, description="Fraction of requests given the same risk tier")
+    tier_flips: int = Field(..., description="Requests given a different risk tier")
+    tier_transitions: Dict[str, Dict[str, int]] = Field(..., description="Counts by champion tier, then challenger tier")
+    mean_delta: float = Field(..., description="Mean challenger minus champion probability")
+    mean_abs_delta: float = Field(..., description="Mean absolute probability difference")
+    p95_abs_delta: float = Field(..., description="95th percentile absolute difference (histogram bin edge)")
+    p99_abs_delta: float = Field(..., description="99th percentile absolute difference (histogram bin edge)")
+    max_abs_delta: float = Field(..., description="Largest absolute probability difference")
+
+
+class ShadowResponse(BaseModel):
+    """Response schema for champion/challenger shadow scoring."""
+    
+    sample_rate: float = Field(..., description="Fraction of requests sent to the challengers")
+    requests: int = Field(..., description="Prediction requests seen by this worker")
+    sampled: int = Field(..., description="Requests queued for shadow scoring")
+    dropped: int = Field(..., description="Sampled requests dropped because the queue was full")
+    errors: int = Field(..., description="Requests whose shadow scoring failed")
+    pending: int = Field(..., description="Requests waiting for a shadow worker")
+    challengers: List[ChallengerAgreement] = Field(..., description="Agreement per challenger")
+
+
 class HealthResponse(BaseModel):
     """Response schema for health check endpoint."""
     
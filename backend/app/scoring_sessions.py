@@ -0,0 +1,313 @@
+"""
+Interactive scoring sessions that rescore only the trees an edit can affect.
+"""
+import numpy as np
+from typing import Dict, Any, List
+import logging
+import time
+import uuid
+from collections import OrderedDict
+
+import shap
+from shap import _cext
+
+from .config import SESSION_TTL_SECONDS, SESSION_MAX_ACTIVE
+from .preprocessing import Preprocessor
+from .inference import SHAPExplainer
+from .utils import determine_risk_tier
+
+logger = logging.getLogger(__name__)
+
+# TreeExplainer's code for path-dependent TreeSHAP with raw (log-odds) output
+_TREE_PATH_DEPENDENT = 1
+_IDENTITY_TRANSFORM = 0
+
+# Floor for node cover: CatBoost leaves no training row reached have zero
+# cover, which path-dependent TreeSHAP would divide by
+_MIN_NODE_WEIGHT = 1e-9
+
+# threshold_types code of a categorical split, whose threshold is a bit mask
+# with bit ``c - 1`` set for each category ``c`` that goes left
+_CATEGORICAL_SPLIT = 1
+
+
+def _category_in_mask(mask: np.ndarray, category: np.ndarray) -> np.ndarray:
+    """Whether each category is in its split's mask, like TreeSHAP's ``category_in_threshold``."""
+
+    category = np.nan_to_num(category, nan=0).astype(np.int64)
+    bit = np.clip(category - 1, 0, 62)
+    return (category >= 1) & ((mask.astype(np.int64) >> bit) & 1 == 1)
+
+
+class TreeIndex:
+    """A tree ensemble as flat node arrays that can evaluate or explain any subset of trees.
+
+    The arrays come from SHAP's parsed ``TreeEnsemble``, so LightGBM,
+    XGBoost and CatBoost models share one representation, and SHAP values
+    of a subset of trees come from the same TreeSHAP kernel that
+    ``SHAPExplainer`` uses. TreeSHAP is additive over trees, so the SHAP
+    values of the whole model are the sum over any partition of its trees.
+    The kernel is private to SHAP; if a SHAP release changes it, the subset is
+    explained with a public ``shap.TreeExplainer`` built from the same arrays.
+    Categorical splits (LightGBM's) are routed as the kernel routes them: a
+    category goes left when its bit is set in the split's category mask.
+    """
+
+    def __init__(self, model, n_features: int):
+        ensemble = shap.TreeExplainer(model).model
+
+        if ensemble.values.shape[2] != 1 or ensemble.tree_output != "log_odds":
+            raise ValueError(f"Incremental scoring needs a binary log-odds model, got {ensemble.tree_output}")
+
+        self.children_left = ensemble.children_left
+        self.children_right = ensemble.children_right
+        self.children_default = ensemble.children_default
+        self.features = ensemble.features
+        self.thresholds = ensemble.thresholds
+        self.threshold_types = ensemble.threshold_types
+        self.values = ensemble.values
+        self.node_sample_weight = np.maximum(ensemble.node_sample_weight, _MIN_NODE_WEIGHT)
+        self.max_depth = ensemble.max_depth
+        self.base_offset = float(ensemble.base_offset[0])
+        self.input_dtype = ensemble.input_dtype
+        self.n_trees = self.values.shape[0]
+        self.use_kernel = True
+
+        # Which features each tree splits on
+        self.tree_features = np.zeros((self.n_trees, n_features), dtype=bool)
+        for tree in range(self.n_trees):
+            internal = self.children_left[tree] >= 0
+            self.tree_features[tree, self.features[tree][internal]] = True
+
+    def prepare(self, x: np.ndarray) -> np.ndarray:
+        """A transformed row at the precision the trees compare against."""
+
+        return np.asarray(x, dtype=self.input_dtype).astype(np.float64)
+
+    def trees_using(self, features: np.ndarray) -> np.ndarray:
+        """Indices of the trees that split on any of ``features``."""
+
+        return np.flatnonzero(self.tree_features[:, features].any(axis=1))
+
+    def leaves(self, x: np.ndarray, trees: np.ndarray) -> np.ndarray:
+        """Leaf node that ``x`` reaches in each of ``trees``, all trees stepped together."""
+
+        rows = np.arange(len(trees))
+        node = np.zeros(len(trees), dtype=np.int64)
+        left = self.children_left[trees]
+        right = self.children_right[trees]
+        default = self.children_default[trees]
+        features = self.features[trees]
+        thresholds = self.thresholds[trees]
+        threshold_types = self.threshold_types[trees]
+
+        for _ in range(self.max_depth):
+            child_left = left[rows, node]
+            value = x[features[rows, node]]
+            threshold = thresholds[rows, node]
+            go_left = np.where(threshold_types[rows, node] == _CATEGORICAL_SPLIT,
+                               _category_in_mask(threshold, value), value <= threshold)
+            child = np.where(go_left, child_left, right[rows, node])
+            child = np.where(np.isnan(value), default[rows, node], child)
+            node = np.where(child_left >= 0, child, node)
+
+        return node
+
+    def leaf_values(self, trees: np.ndarray, leaves: np.ndarray) -> np.ndarray:
+        """Raw (log-odds) output of each tree at its leaf."""
+
+        return self.values[trees, leaves, 0]
+
+    def shap_values(self, x: np.ndarray, trees: np.ndarray) -> np.ndarray:
+        """SHAP values of ``x`` over ``trees`` only, in log-odds."""
+
+        X = x[None, :].astype(self.input_dtype)
+
+        if self.use_kernel:
+            try:
+                return self._kernel_shap_values(X, trees)
+            except (AttributeError, TypeError) as e:
+                logger.warning(f"TreeSHAP kernel unavailable ({e}), falling back to shap.TreeExplainer")
+                self.use_kernel = False
+
+        return self._explainer_shap_values(X, trees)
+
+    def _kernel_shap_values(self, X: np.ndarray, trees: np.ndarray) -> np.ndarray:
+        phi = np.zeros((1, X.shape[1] + 1, 1))
+
+        _cext.dense_tree_shap(
+            self.children_left[trees],
+            self.children_right[trees],
+            self.children_default[trees],
+            self.features[trees],
+            self.thresholds[trees],
+            self.threshold_types[trees],
+            self.values[trees],
+            self.node_sample_weight[trees],
+            self.max_depth,
+            X,
+            np.isnan(X),
+            None,
+            None,
+            None,
+            len(trees),
+            np.zeros(1),
+            phi,
+            _TREE_PATH_DEPENDENT,
+            _IDENTITY_TRANSFORM,
+            False
+        )
+
+        return phi[0, :-1, 0]
+
+    def _explainer_shap_values(self, X: np.ndarray, trees: np.ndarray) -> np.ndarray:
+        """The same SHAP values through the public dictionary model format of ``shap.TreeExplainer``."""
+
+        # The dictionary format has no split types, so every split would be numerical
+        if (self.threshold_types[trees] == _CATEGORICAL_SPLIT).any():
+            raise ValueError("Explaining categorical splits needs SHAP's TreeSHAP kernel")
+
+        model = {
+            'trees': [
+                {
+                    'children_left': self.children_left[tree],
+                    'children_right': self.children_right[tree],
+                    'children_default': self.children_default[tree],
+                    'features': self.features[tree],
+                    'thresholds': self.thresholds[tree],
+                    'values': self.values[tree],
+                    'node_sample_weight': self.node_sample_weight[tree]
+                }
+                for tree in trees
+            ],
+            'base_offset': 0.0,
+            'tree_output': 'log_odds',
+            'input_dtype': self.input_dtype
+        }
+        explainer = shap.TreeExplainer(model, feature_perturbation='tree_path_dependent')
+
+        return np.asarray(explainer.shap_values(X)).reshape(-1)
+
+
+class ScoringSession:
+    """State kept for one applicant between edits."""
+
+    def __init__(self, applicant_data: Dict[str, Any], x: np.ndarray,
+                 leaves: np.ndarray, contributions: np.ndarray, shap_values: np.ndarray):
+        self.applicant_data = applicant_data
+        self.x = x
+        self.leaves = leaves
+        self.contributions = contributions
+        self.shap_values = shap_values
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    """Scoring sessions, each rescored incrementally as its applicant is edited.
+
+    A session keeps the transformed row, the leaf every tree puts it in, the
+    trees' outputs and the SHAP values. An edit is transformed like a new
+    applicant, and only the trees that split on a column whose value changed
+    (derived columns such as ``loan_to_income_ratio`` included) are walked
+    again; their old SHAP values are swapped for new ones. Sessions expire
+    after ``SESSION_TTL_SECONDS`` idle, and the least recently used go first
+    beyond ``SESSION_MAX_ACTIVE``.
+    """
+
+    def __init__(self, tree_index: TreeIndex, preprocessor: Preprocessor,
+                 explainer: SHAPExplainer, top_n: int = 5,
+                 ttl_seconds: float = SESSION_TTL_SECONDS,
+                 max_sessions: int = SESSION_MAX_ACTIVE):
+        self.tree_index = tree_index
+        self.preprocessor = preprocessor
+        self.explainer = explainer
+        self.top_n = top_n
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+
+    def _expire(self):
+        now = time.monotonic()
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if len(self.sessions) <= self.max_sessions and now - session.last_used < self.ttl_seconds:
+                break
+            del self.sessions[session_id]
+
+    def _result(self, session_id: str, session: ScoringSession, trees_evaluated: int,
+                changed: List[str], start: float) -> Dict[str, Any]:
+        margin = self.tree_index.base_offset + session.contributions.sum()
+        probability = float(1 / (1 + np.exp(-margin)))
+
+        return {
+            'session_id': session_id,
+            'default_probability': probability,
+            'risk_label': determine_risk_tier(probability),
+            'top_factors': self.explainer.analyze_feature_impacts(session.shap_values)[:self.top_n],
+            'changed_features': changed,
+            'trees_evaluated': trees_evaluated,
+            'total_trees': self.tree_index.n_trees,
+            'elapsed_ms': (time.perf_counter() - start) * 1000
+        }
+
+    def create(self, applicant_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Score an applicant in full and open a session for later edits."""
+
+        start = time.perf_counter()
+        self._expire()
+
+        index = self.tree_index
+        x = index.prepare(self.preprocessor.transform_row(applicant_data)[0])
+        trees = np.arange(index.n_trees)
+        leaves = index.leaves(x, trees)
+        session = ScoringSession(
+            dict(applicant_data), x, leaves, index.leaf_values(trees, leaves), index.shap_values(x, trees)
+        )
+
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = session
+
+        return self._result(session_id, session, index.n_trees, [], start)
+
+    def applicant_data(self, session_id: str) -> Dict[str, Any]:
+        """Current applicant fields of a session; KeyError if it does not exist or expired."""
+
+        self._expire()
+        return dict(self.sessions[session_id].applicant_data)
+
+    def update(self, session_id: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply field edits to a session's applicant and rescore only the affected trees."""
+
+        start = time.perf_counter()
+        self._expire()
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        self.sessions.move_to_end(session_id)
+        session.last_used = time.monotonic()
+
+        index = self.tree_index
+        applicant_data = {**session.applicant_data, **changes}
+        x = index.prepare(self.preprocessor.transform_row(applicant_data)[0])
+
+        changed = np.flatnonzero(x != session.x)
+        trees = index.trees_using(changed)
+
+        if len(trees):
+            leaves = index.leaves(x, trees)
+            session.shap_values = (session.shap_values
+                                   - index.shap_values(session.x, trees)
+                                   + index.shap_values(x, trees))
+            session.leaves[trees] = leaves
+            session.contributions[trees] = index.leaf_values(trees, leaves)
+
+        session.applicant_data = applicant_data
+        session.x = x
+
+        feature_names = self.preprocessor.feature_names
+        return self._result(session_id, session, len(trees), [feature_names[i] for i in changed], start)
+
+    def delete(self, session_id: str) -> bool:
+        """Close a session; False if it did not exist."""
+
+        return self.sessions.pop(session_id, None) is not None
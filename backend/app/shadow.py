@@ -0,0 +1,265 @@
+"""
+Shadow scoring of live traffic with challenger models, off the request path.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List
+import logging
+import multiprocessing as mp
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .config import (
+    RISK_THRESHOLDS,
+    SHADOW_SAMPLE_RATE,
+    SHADOW_QUEUE_SIZE,
+    SHADOW_BATCH_SIZE,
+    SHADOW_FLUSH_SECONDS,
+    SHADOW_WORKERS,
+    SHADOW_DELTA_BINS
+)
+from .preprocessing import Preprocessor
+from .utils import load_model_artifacts, predict_default_probability
+
+logger = logging.getLogger(__name__)
+
+TIERS = ["LOW", "MEDIUM", "HIGH"]
+
+# Worker niceness, so the champion's process wins the CPU when both want it
+_WORKER_NICE = 10
+
+# Dispatcher sleep while it has nothing to send or collect
+_POLL_SECONDS = 0.05
+
+# Per-process state of a pool worker
+_worker = {}
+
+
+def _init_worker(artifact_dirs: List[Path], num_threads: int):
+    """Load every challenger's model and preprocessing once per worker."""
+
+    try:
+        os.nice(_WORKER_NICE)
+    except OSError:
+        pass
+
+    challengers = []
+    for artifacts_dir in artifact_dirs:
+        preprocessor = Preprocessor()
+        preprocessor.load_artifacts(artifacts_dir)
+        challengers.append((load_model_artifacts(artifacts_dir)['model'], preprocessor))
+
+    _worker.update(challengers=challengers, num_threads=num_threads)
+
+
+def _score_challengers(applicants: List[Dict[str, Any]]) -> np.ndarray:
+    """Default probability of each applicant under each challenger, challengers by rows."""
+
+    frame = pd.DataFrame(applicants)
+    return np.stack([
+        predict_default_probability(model, preprocessor.transform_batch(frame), _worker['num_threads'])
+        for model, preprocessor in _worker['challengers']
+    ])
+
+
+class ChallengerAgreement:
+    """Running agreement of one challenger with the champion, in constant memory."""
+
+    def __init__(self, name: str, delta_bins: int = SHADOW_DELTA_BINS):
+        self.name = name
+        self.scored = 0
+        self.transitions = np.zeros((len(TIERS), len(TIERS)), dtype=np.int64)
+        self.delta_sum = 0.0
+        self.abs_delta_sum = 0.0
+        self.max_abs_delta = 0.0
+        self.abs_delta_counts = np.zeros(delta_bins, dtype=np.int64)
+
+    def update(self, champion: np.ndarray, challenger: np.ndarray):
+        """Add a batch of paired champion and challenger probabilities."""
+
+        delta = challenger - champion
+        abs_delta = np.abs(delta)
+
+        np.add.at(self.transitions, (self._tiers(champion), self._tiers(challenger)), 1)
+        bins = np.minimum((abs_delta * len(self.abs_delta_counts)).astype(np.int64), len(self.abs_delta_counts) - 1)
+        np.add.at(self.abs_delta_counts, bins, 1)
+
+        self.scored += len(delta)
+        self.delta_sum += float(delta.sum())
+        self.abs_delta_sum += float(abs_delta.sum())
+        self.max_abs_delta = max(self.max_abs_delta, float(abs_delta.max()))
+
+    @staticmethod
+    def _tiers(probabilities: np.ndarray) -> np.ndarray:
+        """Index into ``TIERS`` of each probability's risk tier, as ``determine_risk_tiers`` cuts them."""
+
+        return np.searchsorted([RISK_THRESHOLDS['LOW'], RISK_THRESHOLDS['MEDIUM']], probabilities, side='right')
+
+    def _abs_delta_quantile(self, q: float) -> float:
+        """Upper edge of the histogram bin holding the ``q`` quantile of |delta|."""
+
+        if self.scored == 0:
+            return 0.0
+        cumulative = np.cumsum(self.abs_delta_counts)
+        return float((np.searchsorted(cumulative, q * self.scored) + 1) / len(self.abs_delta_counts))
+
+    def report(self) -> Dict[str, Any]:
+        agreed = int(np.trace(self.transitions))
+
+        return {
+            'name': self.name,
+            'scored': self.scored,
+            'tier_agreement': agreed / self.scored if self.scored else 0.0,
+            'tier_flips': self.scored - agreed,
+            'tier_transitions': {
+                champion: {challenger: int(self.transitions[i, j]) for j, challenger in enumerate(TIERS)}
+                for i, champion in enumerate(TIERS)
+            },
+            'mean_delta': self.delta_sum / self.scored if self.scored else 0.0,
+            'mean_abs_delta': self.abs_delta_sum / self.scored if self.scored else 0.0,
+            'p95_abs_delta': self._abs_delta_quantile(0.95),
+            'p99_abs_delta': self._abs_delta_quantile(0.99),
+            'max_abs_delta': self.max_abs_delta
+        }
+
+
+class ShadowScorer:
+    """Scores a sample of live requests with challenger models in a background process pool.
+
+    ``submit`` is all the request path pays: a sampling draw and an append
+    to a bounded ``deque``, dropping (and counting) the request when the
+    queue is full. A dispatcher thread sends batches of up to ``batch_size``
+    queued applicants (sooner once the oldest has waited ``flush_seconds``)
+    to ``n_workers`` spawned processes, at most one batch per worker in
+    flight. Each worker holds every challenger with its own preprocessing
+    and runs at lower priority. Only raw applicant fields go out and one probability
+    per challenger comes back; the dispatcher pairs them with the champion's
+    probabilities and folds them into a ``ChallengerAgreement`` each.
+    """
+
+    def __init__(self, artifact_dirs: List[Path],
+                 sample_rate: float = SHADOW_SAMPLE_RATE,
+                 queue_size: int = SHADOW_QUEUE_SIZE,
+                 batch_size: int = SHADOW_BATCH_SIZE,
+                 flush_seconds: float = SHADOW_FLUSH_SECONDS,
+                 n_workers: int = SHADOW_WORKERS):
+        if not artifact_dirs:
+            raise ValueError("Shadow scoring needs at least one challenger artifact directory")
+
+        self.artifact_dirs = [Path(path) for path in artifact_dirs]
+        for artifacts_dir in self.artifact_dirs:
+            if not (artifacts_dir / "model.pkl").exists():
+                raise FileNotFoundError(f"No model.pkl in challenger directory {artifacts_dir}")
+
+        self.sample_rate = sample_rate
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.n_workers = n_workers
+        self.agreement = [ChallengerAgreement(path.name) for path in self.artifact_dirs]
+
+        self._queue = deque()
+        self._stop = threading.Event()
+        self._pool = None
+        self._thread = None
+
+        self.requests = 0
+        self.sampled = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def start(self) -> 'ShadowScorer':
+        """Spawn the worker pool and the dispatcher thread."""
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            mp_context=mp.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.artifact_dirs, 1)
+        )
+        # Workers start on demand; start them now so their imports and model
+        # loading do not compete with the first requests
+        for warm_up in [self._pool.submit(os.getpid) for _ in range(self.n_workers)]:
+            warm_up.result()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="shadow-dispatcher", daemon=True)
+        self._thread.start()
+
+        logger.info(f"Shadow scoring {', '.join(a.name for a in self.agreement)} "
+                    f"on {self.sample_rate:.0%} of requests")
+        return self
+
+    def submit(self, applicant_data: Dict[str, Any], champion_probability: float) -> bool:
+        """Queue a request for the challengers if it is sampled; False if it was not queued."""
+
+        self.requests += 1
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return False
+
+        if len(self._queue) >= self.queue_size:
+            self.dropped += 1
+            return False
+
+        self._queue.append((applicant_data, float(champion_probability)))
+        self.sampled += 1
+        return True
+
+    def _run(self):
+        in_flight = deque()
+        waiting_since = None
+        while not (self._stop.is_set() and not self._queue and not in_flight):
+            # A batch goes out when full, when its oldest request has waited
+            # flush_seconds, or on shutdown; one batch per worker in flight
+            if self._queue and waiting_since is None:
+                waiting_since = time.monotonic()
+            while self._queue and len(in_flight) < self.n_workers and (
+                    len(self._queue) >= self.batch_size or self._stop.is_set()
+                    or time.monotonic() - waiting_since >= self.flush_seconds):
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                applicants = [applicant for applicant, _ in batch]
+                champion = np.array([probability for _, probability in batch])
+                in_flight.append((self._pool.submit(_score_challengers, applicants), champion))
+                waiting_since = time.monotonic() if self._queue else None
+
+            if not in_flight:
+                self._stop.wait(_POLL_SECONDS)
+                continue
+
+            future, champion = in_flight.popleft()
+            try:
+                probabilities = future.result()
+            except Exception as e:
+                self.errors += len(champion)
+                logger.error(f"Shadow scoring batch failed: {e}")
+                continue
+
+            for agreement, challenger in zip(self.agreement, probabilities):
+                agreement.update(champion, challenger)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'sample_rate': self.sample_rate,
+            'requests': self.requests,
+            'sampled': self.sampled,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'pending': len(self._queue),
+            'challengers': [agreement.report() for agreement in self.agreement]
+        }
+
+    def close(self):
+        """Score what is still queued, then stop the dispatcher and the pool."""
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
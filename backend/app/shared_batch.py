@@ -0,0 +1,112 @@
+"""
+Shared-memory feature matrices and outputs for multi-process scoring.
+"""
+import numpy as np
+from typing import Dict, NamedTuple, Tuple
+import logging
+from multiprocessing import shared_memory
+
+logger = logging.getLogger(__name__)
+
+# Offsets of the arrays inside the segment are rounded up to a cache line
+_ALIGNMENT = 64
+
+
+class BatchSpec(NamedTuple):
+    """Everything a worker needs to attach to a batch: picklable and a few bytes."""
+
+    name: str
+    n_rows: int
+    n_features: int
+    with_shap: bool
+
+
+def _layout(n_rows: int, n_features: int, with_shap: bool) -> Tuple[Dict[str, Tuple[int, Tuple[int, ...]]], int]:
+    """Byte offset and shape of each float64 array, plus the total size."""
+
+    shapes = {'X': (n_rows, n_features), 'probability': (n_rows,)}
+    if with_shap:
+        shapes['shap'] = (n_rows, n_features)
+
+    layout = {}
+    offset = 0
+    for key, shape in shapes.items():
+        layout[key] = (offset, shape)
+        nbytes = int(np.prod(shape)) * np.dtype(np.float64).itemsize
+        offset += -(-nbytes // _ALIGNMENT) * _ALIGNMENT
+
+    return layout, max(offset, 1)
+
+
+class SharedBatch:
+    """The feature matrix of a batch and its outputs in one shared-memory segment.
+
+    The parent creates the segment and writes the preprocessed rows into
+    ``X``; workers attach by ``spec`` and fill ``probability`` (and ``shap``)
+    for the row range they are given, so neither features nor results are
+    ever pickled. Only the creator unlinks the segment.
+    """
+
+    def __init__(self, spec: BatchSpec, create: bool = False):
+        self.spec = spec
+        layout, size = _layout(spec.n_rows, spec.n_features, spec.with_shap)
+
+        if create:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self.spec = spec._replace(name=self._shm.name)
+        else:
+            # Pool workers share the parent's resource tracker, so attaching
+            # does not make a worker's exit unlink the segment
+            self._shm = shared_memory.SharedMemory(name=spec.name)
+        self._owner = create
+
+        self.arrays = {
+            key: np.ndarray(shape, dtype=np.float64, buffer=self._shm.buf, offset=offset)
+            for key, (offset, shape) in layout.items()
+        }
+
+    @classmethod
+    def create(cls, n_rows: int, n_features: int, with_shap: bool = False) -> 'SharedBatch':
+        """Allocate a new segment sized for ``n_rows`` rows."""
+
+        return cls(BatchSpec('', n_rows, n_features, with_shap), create=True)
+
+    @classmethod
+    def attach(cls, spec: BatchSpec) -> 'SharedBatch':
+        """Map a segment created by another process."""
+
+        return cls(spec)
+
+    @property
+    def X(self) -> np.ndarray:
+        return self.arrays['X']
+
+    @property
+    def probability(self) -> np.ndarray:
+        return self.arrays['probability']
+
+    @property
+    def shap(self) -> np.ndarray:
+        return self.arrays.get('shap')
+
+    def close(self):
+        """Drop this process's mapping, and the segment itself if we created it."""
+
+        # Views must go before the buffer can be released
+        self.arrays = {}
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self) -> 'SharedBatch':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def row_ranges(n_rows: int, n_parts: int):
+    """Split ``range(n_rows)`` into at most ``n_parts`` contiguous (start, stop) ranges."""
+
+    bounds = np.linspace(0, n_rows, min(n_parts, n_rows) + 1).astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
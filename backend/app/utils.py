@@ -3,39 +3,44 @@ Utility functions for the credit risk API.
 """
 import logging
 import json
-from typing import Dict, Any, List
+import hashlib
+from typing import Dict, Any, List, Tuple
 from pathlib import Path
 import joblib
+import numpy as np
+import pandas as pd
 
 from .config import ARTIFACTS_ROOT, RISK_THRESHOLDS
 
 logger = logging.getLogger(__name__)
 
 
-def load_model_artifacts() -> Dict[str, Any]:
-    """Load all model artifacts for inference."""
+def load_model_artifacts(artifacts_dir: Path = ARTIFACTS_ROOT) -> Dict[str, Any]:
+    """Load all model artifacts for inference, by default those of the deployed model."""
     
     artifacts = {}
     
     try:
         # Load model
-        artifacts['model'] = joblib.load(ARTIFACTS_ROOT / "model.pkl")
+        artifacts['model'] = joblib.load(artifacts_dir / "model.pkl")
         
         # Load preprocessing artifacts
-        artifacts['scaler'] = joblib.load(ARTIFACTS_ROOT / "scaler.pkl")
-        artifacts['imputer'] = joblib.load(ARTIFACTS_ROOT / "imputer.pkl")
+        artifacts['scaler'] = joblib.load(artifacts_dir / "scaler.pkl")
+        artifacts['imputer'] = joblib.load(artifacts_dir / "imputer.pkl")
         
         # Load feature names
-        with open(ARTIFACTS_ROOT / "feature_list.json", 'r') as f:
+        with open(artifacts_dir / "feature_list.json", 'r') as f:
             artifacts['feature_names'] = json.load(f)
         
         # Load model metadata
         try:
-            with open(ARTIFACTS_ROOT / "model_metadata.json", 'r') as f:
+            with open(artifacts_dir / "model_metadata.json", 'r') as f:
                 artifacts['metadata'] = json.load(f)
         except FileNotFoundError:
             artifacts['metadata'] = {'model_name': 'unknown', 'model_type': 'unknown'}
         
+        artifacts['model_version'] = get_model_version(artifacts_dir, artifacts['metadata'])
+        
         logger.info("Model artifacts loaded successfully")
         
     except Exception as e:
@@ -45,6 +50,21 @@ def load_model_artifacts() -> Dict[str, Any]:
     return artifacts
 
 
+def get_model_version(artifacts_dir: Path, metadata: Dict[str, Any]) -> str:
+    """Version of the model in ``artifacts_dir``: its name and a digest of model.pkl.
+
+    The digest changes with every retraining, even of the same model type,
+    so decisions can be traced back to the exact model that made them.
+    """
+    
+    digest = hashlib.sha256()
+    with open(artifacts_dir / "model.pkl", 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    
+    return f"{metadata.get('model_name', 'unknown')}-{digest.hexdigest()[:12]}"
+
+
 def determine_risk_tier(probability: float) -> str:
     """Determine risk tier based on default probability."""
     
@@ -56,6 +76,54 @@ def determine_risk_tier(probability: float) -> str:
         return "HIGH"
 
 
+def determine_risk_tiers(probabilities: np.ndarray) -> np.ndarray:
+    """Vectorized ``determine_risk_tier`` for an array of probabilities."""
+    
+    tiers = np.array(["LOW", "MEDIUM", "HIGH"])
+    cuts = [RISK_THRESHOLDS['LOW'], RISK_THRESHOLDS['MEDIUM']]
+    
+    return tiers[np.searchsorted(cuts, np.asarray(probabilities), side='right')]
+
+
+def predict_default_probability(model, X: np.ndarray, num_threads: int = None) -> np.ndarray:
+    """Default probability for every row of ``X``, for any of the supported model types.
+    
+    ``num_threads`` caps prediction threads, which matters when several
+    worker processes score at once.
+    """
+    
+    if hasattr(model, 'predict_proba'):
+        if num_threads and hasattr(model, 'get_best_iteration'):
+            # CatBoost takes the thread count per call
+            return model.predict_proba(X, thread_count=num_threads)[:, 1]
+        if num_threads and hasattr(model, 'get_booster'):
+            model.set_params(n_jobs=num_threads)
+        return model.predict_proba(X)[:, 1]
+    
+    # LightGBM boosters return probabilities from predict
+    if num_threads:
+        return model.predict(X, num_threads=num_threads)
+    return model.predict(X)
+
+
+def build_sensitivity_grid(applicant_data: Dict[str, Any],
+                           sweeps: List[Tuple[str, List[float]]]) -> pd.DataFrame:
+    """Base applicant followed by every combination of the swept values.
+    
+    Row 0 is the unchanged applicant; the grid follows in row-major order,
+    the first swept feature varying slowest.
+    """
+    
+    features = [feature for feature, _ in sweeps]
+    grids = np.meshgrid(*[np.asarray(values, dtype=float) for _, values in sweeps], indexing='ij')
+    
+    grid = pd.DataFrame([applicant_data] * (grids[0].size + 1))
+    for feature, values in zip(features, grids):
+        grid[feature] = np.concatenate([[applicant_data[feature]], values.ravel()]).astype(float)
+    
+    return grid
+
+
 def validate_applicant_data(data: Dict[str, Any]) -> List[str]:
     """Validate applicant data and return list of errors."""
     
@@ -110,7 +178,8 @@ def validate_applicant_data(data: Dict[str, Any]) -> List[str]:
     return errors
 
 
-def format_prediction_response(probability: float, risk_factors: List[Dict[str, Any]]) -> Dict[str, Any]:
+def format_prediction_response(probability: float, risk_factors: List[Dict[str, Any]],
+                               model_version: str) -> Dict[str, Any]:
     """Format prediction response according to API schema."""
     
     risk_tier = determine_risk_tier(probability)
@@ -129,7 +198,7 @@ def format_prediction_response(probability: float, risk_factors: List[Dict[str,
         'default_probability': float(probability),
         'risk_label': risk_tier,
         'top_factors': formatted_factors,
-        'model_version': '1.0'
+        'model_version': model_version
     }
 
 
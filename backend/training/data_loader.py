@@ -19,8 +19,11 @@ from app.config import (
     RANDOM_STATE, 
     TEST_SIZE, 
     VALIDATION_SIZE,
-    ARTIFACTS_ROOT
+    ARTIFACTS_ROOT,
+    DRIFT_REFERENCE_PATH,
+    DRIFT_BINS
 )
+from .profiler import TrainingProfiler
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -36,16 +39,17 @@ class CreditDataLoader:
         self.label_encoders = {}
         self.feature_names = []
         
-    def load_loan_data(self) -> pd.DataFrame:
+    def load_loan_data(self, path: Path = None) -> pd.DataFrame:
         """Load the loan processed data."""
-        logger.info(f"Loading data from {LOAN_DATA_PATH}")
+        path = path or LOAN_DATA_PATH
+        logger.info(f"Loading data from {path}")
         
         try:
             # Load data in chunks to handle large file
             chunk_size = 100000
             chunks = []
             
-            for chunk in pd.read_csv(LOAN_DATA_PATH, chunksize=chunk_size):
+            for chunk in pd.read_csv(path, chunksize=chunk_size):
                 chunks.append(chunk)
                 
             df = pd.concat(chunks, ignore_index=True)
@@ -297,6 +301,36 @@ class CreditDataLoader:
         
         return X_scaled
     
+    def update_preprocessing_statistics(self, df: pd.DataFrame, n_seen: int) -> Dict[str, float]:
+        """Fold newly arrived rows into the fitted preprocessing statistics.
+        
+        Imputer medians are updated as a row-weighted blend of the previous and
+        new medians. The scaler is left unchanged because boosted trees fitted
+        on the current scaling must see the same transform; instead the shift of
+        each feature's mean, in units of the fitted standard deviation, is
+        returned so a full retrain can be scheduled when it grows large.
+        """
+        logger.info(f"Updating preprocessing statistics with {len(df)} new rows")
+        
+        X = df.drop('target_default', axis=1) if 'target_default' in df.columns else df
+        X = X[self.feature_names]
+        n_new = len(X)
+        
+        # Blend medians weighted by row counts
+        new_medians = X.median().reindex(X.columns).values
+        old_medians = self.imputer.statistics_
+        blended = np.where(
+            np.isnan(new_medians),
+            old_medians,
+            (old_medians * n_seen + new_medians * n_new) / (n_seen + n_new)
+        )
+        self.imputer.statistics_ = blended
+        
+        # Mean shift of the new rows relative to the frozen scaler
+        mean_shift = (X.mean().values - self.scaler.mean_) / self.scaler.scale_
+        
+        return dict(zip(X.columns, np.round(mean_shift, 4).tolist()))
+    
     def split_data(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         """Split data into train, validation, and test sets."""
         from sklearn.model_selection import train_test_split
@@ -343,6 +377,91 @@ class CreditDataLoader:
         
         logger.info("Preprocessing artifacts saved")
     
+    @staticmethod
+    def _reference_histogram(values: np.ndarray, n_bins: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Quantile bin edges of ``values`` padded to ``n_bins - 1`` with +inf, and the count per bin.
+        
+        A value falls in the bin of the number of edges below it, so ties
+        collapse into one bin and the padding bins stay empty.
+        """
+        
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        edges = np.concatenate([edges, np.full(n_bins - 1 - len(edges), np.inf)])
+        counts = np.bincount(np.searchsorted(edges, values, side='left'), minlength=n_bins)
+        
+        return edges, counts
+    
+    def save_reference_distributions(self, X_train: pd.DataFrame, probabilities: np.ndarray,
+                                     n_bins: int = DRIFT_BINS):
+        """Save training-time histograms that the serving drift monitor compares live traffic with.
+        
+        ``X_train`` is the transformed training matrix and ``probabilities``
+        the deployed model's scores on held-out rows.
+        """
+        logger.info("Saving drift reference distributions")
+        
+        ARTIFACTS_ROOT.mkdir(exist_ok=True)
+        
+        feature_edges = np.empty((X_train.shape[1], n_bins - 1))
+        feature_counts = np.empty((X_train.shape[1], n_bins), dtype=np.int64)
+        for j, column in enumerate(X_train.columns):
+            feature_edges[j], feature_counts[j] = self._reference_histogram(X_train[column].to_numpy(), n_bins)
+        
+        probability_edges, probability_counts = self._reference_histogram(probabilities, n_bins)
+        
+        np.savez(
+            DRIFT_REFERENCE_PATH,
+            feature_names=np.array(list(X_train.columns)),
+            feature_edges=feature_edges,
+            feature_counts=feature_counts,
+            probability_edges=probability_edges,
+            probability_counts=probability_counts
+        )
+        
+        logger.info(f"Drift reference saved: {X_train.shape[1]} features, {n_bins} bins")
+    
+    def merge_reference_distributions(self, X_new: pd.DataFrame, probabilities: np.ndarray):
+        """Add new rows to the saved drift reference without moving its bin edges.
+        
+        The new rows are binned with the existing edges and their counts added
+        to the reference, so an incremental update grows the full-training
+        reference instead of replacing it. Without a saved reference this is
+        ``save_reference_distributions``.
+        """
+        if not DRIFT_REFERENCE_PATH.exists():
+            self.save_reference_distributions(X_new, probabilities)
+            return
+        
+        logger.info("Merging new rows into drift reference distributions")
+        
+        with np.load(DRIFT_REFERENCE_PATH) as reference:
+            reference = dict(reference)
+        
+        feature_names = list(reference['feature_names'])
+        if feature_names != list(X_new.columns):
+            raise ValueError("New rows do not match the features of the saved drift reference")
+        
+        n_bins = reference['feature_counts'].shape[1]
+        for j, column in enumerate(feature_names):
+            values = X_new[column].to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            reference['feature_counts'][j] += np.bincount(
+                np.searchsorted(reference['feature_edges'][j], values, side='left'), minlength=n_bins
+            )
+        
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        probabilities = probabilities[~np.isnan(probabilities)]
+        reference['probability_counts'] += np.bincount(
+            np.searchsorted(reference['probability_edges'], probabilities, side='left'), minlength=n_bins
+        )
+        
+        np.savez(DRIFT_REFERENCE_PATH, **reference)
+        
+        logger.info(f"Drift reference updated with {len(X_new)} rows")
+
     def load_preprocessing_artifacts(self):
         """Load preprocessing artifacts for inference."""
         logger.info("Loading preprocessing artifacts")
@@ -361,30 +480,66 @@ class CreditDataLoader:
         logger.info("Preprocessing artifacts loaded")
 
 
-def load_and_preprocess_data() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-    """Main function to load and preprocess data."""
+def load_and_preprocess_data(cache=None, profiler: TrainingProfiler = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Main function to load and preprocess data.
+    
+    With a ``StageCache`` the stages resume after the last one whose key is
+    unchanged instead of starting from the raw CSV. With a ``TrainingProfiler``
+    every stage is timed and its output frame measured.
+    """
     
     loader = CreditDataLoader()
+    profiler = profiler or TrainingProfiler(enabled=False)
+    
+    if cache is not None:
+        from .stage_cache import data_stages
+        
+        with profiler.stage('data_stages'):
+            outputs = cache.run_pipeline(data_stages(loader, profiler))
+        train, val, test = outputs['train'], outputs['val'], outputs['test']
+        
+        # Restore the fitted preprocessing state of the cached run
+        loader.imputer = outputs['imputer']
+        loader.scaler = outputs['scaler']
+        loader.feature_names = [col for col in train.columns if col != 'target_default']
+        
+        loader.save_preprocessing_artifacts()
+        
+        return train, val, test
     
     # Load data
-    df = loader.load_loan_data()
+    with profiler.stage('load') as stage:
+        df = loader.load_loan_data()
+        stage.frame(df)
     
     # Create target variable
-    df = loader.create_target_variable(df)
+    with profiler.stage('target') as stage:
+        df = loader.create_target_variable(df)
+        stage.frame(df)
     
     # Select features
-    df = loader.select_features(df)
+    with profiler.stage('select') as stage:
+        df = loader.select_features(df)
+        stage.frame(df)
     
     # Clean data
-    df = loader.clean_data(df)
+    with profiler.stage('clean') as stage:
+        df = loader.clean_data(df)
+        stage.frame(df)
     
     # Preprocess features
-    df = loader.preprocess_features(df, fit=True)
+    with profiler.stage('preprocess') as stage:
+        df = loader.preprocess_features(df, fit=True)
+        stage.frame(df)
     
     # Split data
-    train, val, test = loader.split_data(df)
+    with profiler.stage('split') as stage:
+        train, val, test = loader.split_data(df)
+        for label, frame in (('train', train), ('val', val), ('test', test)):
+            stage.frame(frame, label)
     
     # Save preprocessing artifacts
-    loader.save_preprocessing_artifacts()
+    with profiler.stage('save_preprocessing'):
+        loader.save_preprocessing_artifacts()
     
     return train, val, test
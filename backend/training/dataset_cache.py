@@ -0,0 +1,167 @@
+"""
+On-disk cache of constructed LightGBM and CatBoost training datasets.
+
+XGBoost is not cached: its binary DMatrix buffer holds the parsed data but not
+the quantile sketch, so loading it saves no binning work over building the
+DMatrix from the frames, and a QuantileDMatrix cannot be saved at all.
+"""
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Tuple
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import lightgbm as lgb
+from catboost import Pool
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import DATASET_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Parameters that change how LightGBM bins features when a Dataset is constructed
+LIGHTGBM_BINNING_PARAMS = [
+    'max_bin',
+    'min_data_in_bin',
+    'bin_construct_sample_cnt',
+    'feature_pre_filter',
+    'min_data_in_leaf',
+    'use_missing',
+    'zero_as_missing'
+]
+
+# Parameters that change how CatBoost quantizes a Pool
+CATBOOST_BINNING_PARAMS = [
+    'border_count',
+    'feature_border_type',
+    'nan_mode'
+]
+
+
+def fingerprint_frame(X: pd.DataFrame, y: pd.Series = None) -> str:
+    """Hash the contents and column layout of a feature frame and its labels."""
+
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps(list(map(str, X.columns))).encode())
+    hasher.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+
+    if y is not None:
+        hasher.update(np.asarray(y).tobytes())
+
+    return hasher.hexdigest()[:16]
+
+
+class DatasetCache:
+    """Caches binned/quantized training datasets keyed by data fingerprint and binning parameters.
+
+    Constructed datasets are written once under ``cache_dir`` and loaded back on
+    later runs (and by every hyperparameter trial) instead of being rebuilt from
+    pandas frames.
+    """
+
+    def __init__(self, cache_dir: Path = DATASET_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, model_name: str, X_train: pd.DataFrame, y_train: pd.Series,
+             X_val: pd.DataFrame, y_val: pd.Series, binning: Dict[str, Any]) -> str:
+        """Build the cache key for one model's train/validation pair."""
+
+        payload = json.dumps({
+            'model': model_name,
+            'train': fingerprint_frame(X_train, y_train),
+            'val': fingerprint_frame(X_val, y_val),
+            'binning': binning
+        }, sort_keys=True, default=str)
+
+        return f"{model_name}_{hashlib.sha256(payload.encode()).hexdigest()[:16]}"
+
+    def _lookup(self, key: str) -> Tuple[Path, bool]:
+        """Return the entry directory for a key and whether it is already populated."""
+
+        entry_dir = self.cache_dir / key
+        if entry_dir.exists():
+            self.hits += 1
+            logger.info(f"Dataset cache hit: {key}")
+            return entry_dir, True
+
+        self.misses += 1
+        logger.info(f"Dataset cache miss: {key}")
+        return entry_dir, False
+
+    def _publish(self, tmp_dir: Path, entry_dir: Path):
+        """Atomically move a freshly written entry into place."""
+
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another worker published the same entry first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _staging_dir(self) -> Path:
+        """Create a temporary directory next to the cache entries."""
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp_"))
+
+    def lightgbm(self, X_train: pd.DataFrame, y_train: pd.Series,
+                 X_val: pd.DataFrame, y_val: pd.Series,
+                 params: Dict[str, Any]) -> Tuple[lgb.Dataset, lgb.Dataset]:
+        """Return binned LightGBM train/validation Datasets."""
+
+        binning = {k: params[k] for k in LIGHTGBM_BINNING_PARAMS if k in params}
+        key = self._key('lightgbm', X_train, y_train, X_val, y_val, binning)
+        entry_dir, found = self._lookup(key)
+
+        if not found:
+            tmp_dir = self._staging_dir()
+            train_ds = lgb.Dataset(X_train, label=y_train, params=binning, free_raw_data=False)
+            val_ds = lgb.Dataset(X_val, label=y_val, reference=train_ds, params=binning)
+            train_ds.save_binary(str(tmp_dir / "train.bin"))
+            val_ds.save_binary(str(tmp_dir / "val.bin"))
+            self._publish(tmp_dir, entry_dir)
+
+        train_ds = lgb.Dataset(str(entry_dir / "train.bin"), params=binning)
+        val_ds = lgb.Dataset(str(entry_dir / "val.bin"), reference=train_ds, params=binning)
+
+        return train_ds, val_ds
+
+    def catboost(self, X_train: pd.DataFrame, y_train: pd.Series,
+                 X_val: pd.DataFrame, y_val: pd.Series,
+                 params: Dict[str, Any]) -> Tuple[Pool, Pool]:
+        """Return quantized CatBoost train/validation Pools sharing the same borders."""
+
+        binning = {k: params[k] for k in CATBOOST_BINNING_PARAMS if k in params}
+        key = self._key('catboost', X_train, y_train, X_val, y_val, binning)
+        entry_dir, found = self._lookup(key)
+
+        if not found:
+            tmp_dir = self._staging_dir()
+            train_pool = Pool(X_train, label=y_train)
+            train_pool.quantize(**binning)
+            train_pool.save(str(tmp_dir / "train.qpool"))
+            train_pool.save_quantization_borders(str(tmp_dir / "borders.tsv"))
+
+            val_pool = Pool(X_val, label=y_val)
+            val_pool.quantize(input_borders=str(tmp_dir / "borders.tsv"))
+            val_pool.save(str(tmp_dir / "val.qpool"))
+            self._publish(tmp_dir, entry_dir)
+
+        train_pool = Pool(f"quantized://{entry_dir / 'train.qpool'}")
+        val_pool = Pool(f"quantized://{entry_dir / 'val.qpool'}")
+
+        return train_pool, val_pool
+
+    def clear(self):
+        """Remove every cached dataset."""
+
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        logger.info(f"Cleared dataset cache at {self.cache_dir}")
@@ -0,0 +1,253 @@
+"""
+Data-parallel LightGBM training over sockets, across local worker processes or hosts.
+"""
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, List, Tuple
+import json
+import logging
+import multiprocessing as mp
+import socket
+import tempfile
+import time
+from pathlib import Path
+
+import lightgbm as lgb
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import (
+    RANDOM_STATE,
+    N_JOBS,
+    DISTRIBUTED_WORKERS,
+    DISTRIBUTED_BASE_PORT,
+    DISTRIBUTED_TIME_OUT
+)
+
+logger = logging.getLogger(__name__)
+
+TARGET = 'target_default'
+
+
+def shard_frame(X: pd.DataFrame, y: pd.Series, n_shards: int,
+                random_state: int = RANDOM_STATE) -> List[pd.DataFrame]:
+    """Split rows into ``n_shards`` partitions with the same default rate.
+
+    Rows are shuffled within each class and dealt round-robin, so every
+    shard sees both classes in the global proportion.
+    """
+
+    rng = np.random.default_rng(random_state)
+    labels = np.asarray(y)
+    shard_of = np.empty(len(labels), dtype=np.int64)
+
+    for value in np.unique(labels):
+        rows = rng.permutation(np.flatnonzero(labels == value))
+        shard_of[rows] = np.arange(len(rows)) % n_shards
+
+    frame = X.assign(**{TARGET: labels})
+    return [frame.iloc[np.flatnonzero(shard_of == i)] for i in range(n_shards)]
+
+
+def parse_machines(machines: str) -> List[Tuple[str, int]]:
+    """``host[:port],...`` to (host, port) pairs, defaulting to ``DISTRIBUTED_BASE_PORT``."""
+
+    pairs = []
+    for entry in machines.split(','):
+        host, _, port = entry.strip().partition(':')
+        pairs.append((host, int(port) if port else DISTRIBUTED_BASE_PORT))
+
+    return pairs
+
+
+def local_machines(n_workers: int) -> str:
+    """Machine list of free loopback ports for local multi-process training."""
+
+    sockets = []
+    try:
+        for _ in range(n_workers):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(('127.0.0.1', 0))
+            sockets.append(sock)
+        return ','.join(f"127.0.0.1:{sock.getsockname()[1]}" for sock in sockets)
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def train_worker(rank: int, params: Dict[str, Any], shard_path: str, validation_path: str,
+                 machines: str, num_threads: int = 1,
+                 num_boost_round: int = None) -> Tuple[str, Dict[str, float]]:
+    """Train on one shard as machine ``rank`` of the machine list.
+
+    Every worker gets the full validation set so all of them see the same
+    metric and stop early at the same iteration. Only rank 0 returns the
+    model text; the trees are identical on every machine.
+    """
+
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+
+    shard = pd.read_parquet(shard_path)
+    validation = pd.read_parquet(validation_path)
+    hosts = parse_machines(machines)
+
+    params = dict(params)
+    rounds = params.pop('num_iterations', 1000)
+    params['num_threads'] = num_threads
+    if len(hosts) > 1:
+        params.update({
+            'tree_learner': 'data',
+            'num_machines': len(hosts),
+            'machines': ','.join(f"{host}:{port}" for host, port in hosts),
+            'local_listen_port': hosts[rank][1],
+            'pre_partition': True,
+            'time_out': DISTRIBUTED_TIME_OUT
+        })
+
+    train_ds = lgb.Dataset(shard.drop(TARGET, axis=1), label=shard[TARGET])
+    val_ds = lgb.Dataset(validation.drop(TARGET, axis=1), label=validation[TARGET], reference=train_ds)
+
+    booster = lgb.train(
+        params,
+        train_ds,
+        valid_sets=[val_ds],
+        num_boost_round=num_boost_round or rounds,
+        callbacks=[lgb.early_stopping(100, verbose=False), lgb.log_evaluation(0)]
+    )
+
+    wall_time = time.perf_counter() - start_wall
+    cpu_time = time.process_time() - start_cpu
+    stats = {
+        'rank': rank,
+        'rows': len(shard),
+        'wall_time': wall_time,
+        'cpu_time': cpu_time,
+        'best_iteration': int(booster.best_iteration or booster.current_iteration())
+    }
+
+    return (booster.model_to_string() if rank == 0 else None), stats
+
+
+def write_shards(X_train: pd.DataFrame, y_train: pd.Series,
+                 X_val: pd.DataFrame, y_val: pd.Series,
+                 n_shards: int, output_dir: Path) -> List[Path]:
+    """Write training shards and the shared validation set as Parquet."""
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    paths = []
+    for i, shard in enumerate(shard_frame(X_train, y_train, n_shards)):
+        path = output_dir / f"shard_{i}.parquet"
+        shard.to_parquet(path)
+        paths.append(path)
+
+    X_val.assign(**{TARGET: np.asarray(y_val)}).to_parquet(output_dir / "validation.parquet")
+
+    return paths
+
+
+def train_distributed_lightgbm(params: Dict[str, Any],
+                               X_train: pd.DataFrame, y_train: pd.Series,
+                               X_val: pd.DataFrame, y_val: pd.Series,
+                               num_workers: int = DISTRIBUTED_WORKERS,
+                               n_jobs: int = None,
+                               num_boost_round: int = None) -> Tuple[lgb.Booster, Dict[str, Any]]:
+    """Data-parallel LightGBM over ``num_workers`` local processes.
+
+    The training rows are sharded to Parquet, every worker loads only its own
+    shard, and the workers build each tree together over loopback sockets.
+    Returns a regular ``lgb.Booster`` plus the same timing statistics as
+    ``_fit_candidate``.
+    """
+
+    n_jobs = n_jobs or N_JOBS
+    num_threads = max(1, n_jobs // num_workers)
+    start_wall = time.perf_counter()
+
+    logger.info(f"Training LightGBM data-parallel on {num_workers} workers ({num_threads} threads each)")
+
+    with tempfile.TemporaryDirectory(prefix="lgb_shards_") as shard_dir:
+        shard_paths = write_shards(X_train, y_train, X_val, y_val, num_workers, shard_dir)
+        validation_path = str(Path(shard_dir) / "validation.parquet")
+        machines = local_machines(num_workers)
+
+        # Every rank has to be running at once for the sockets to connect
+        ctx = mp.get_context('spawn')
+        with ctx.Pool(processes=num_workers) as pool:
+            results = pool.starmap(train_worker, [
+                (rank, params, str(path), validation_path, machines, num_threads, num_boost_round)
+                for rank, path in enumerate(shard_paths)
+            ])
+
+    model_str = results[0][0]
+    worker_stats = [stats for _, stats in results]
+    booster = lgb.Booster(model_str=model_str)
+
+    wall_time = time.perf_counter() - start_wall
+    cpu_time = sum(stats['cpu_time'] for stats in worker_stats)
+    stats = {
+        'wall_time': wall_time,
+        'cpu_time': cpu_time,
+        'num_threads': num_threads * num_workers,
+        'cpu_utilization': cpu_time / (wall_time * num_threads * num_workers) if wall_time > 0 else 0.0,
+        'best_iteration': worker_stats[0]['best_iteration'],
+        'distributed_workers': num_workers
+    }
+
+    return booster, stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Distributed LightGBM training across hosts")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    shard_parser = subparsers.add_parser("shard", help="Write processed training shards for each host")
+    shard_parser.add_argument("--num-shards", type=int, required=True)
+    shard_parser.add_argument("--output", type=Path, required=True,
+                              help="Directory for shard_<rank>.parquet, validation.parquet and params.json")
+
+    worker_parser = subparsers.add_parser("worker", help="Run one rank; start one per host")
+    worker_parser.add_argument("--rank", type=int, required=True)
+    worker_parser.add_argument("--machines", required=True,
+                               help="Comma-separated host[:port] list, identical on every host")
+    worker_parser.add_argument("--data", type=Path, required=True,
+                               help="Directory written by the shard command")
+    worker_parser.add_argument("--num-threads", type=int, default=N_JOBS)
+    worker_parser.add_argument("--output", type=Path, default=Path("lightgbm_distributed.txt"),
+                               help="Model file written by rank 0")
+    args = parser.parse_args()
+
+    if args.command == "shard":
+        from .data_loader import load_and_preprocess_data
+        from .train_model import class_weighted_params
+        from app.config import MODEL_PARAMS
+
+        train, val, _ = load_and_preprocess_data()
+        y_train = train[TARGET]
+        write_shards(train.drop(TARGET, axis=1), y_train,
+                     val.drop(TARGET, axis=1), val[TARGET], args.num_shards, args.output)
+
+        params = class_weighted_params({'lightgbm': MODEL_PARAMS['lightgbm']}, y_train)['lightgbm']
+        with open(args.output / "params.json", 'w') as f:
+            json.dump(params, f, indent=2, default=float)
+        logger.info(f"Wrote {args.num_shards} shards to {args.output}")
+    else:
+        with open(args.data / "params.json") as f:
+            params = json.load(f)
+
+        model_str, stats = train_worker(
+            args.rank, params, str(args.data / f"shard_{args.rank}.parquet"),
+            str(args.data / "validation.parquet"), args.machines, args.num_threads
+        )
+        logger.info(f"Rank {args.rank} finished: {stats}")
+
+        if model_str is not None:
+            args.output.write_text(model_str)
+            logger.info(f"Model saved to {args.output}")
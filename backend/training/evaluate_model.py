@@ -4,124 +4,302 @@ Model evaluation utilities and metrics.
 import pandas as pd
 import numpy as np
 from typing import Dict, Any, Tuple
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.metrics import (
-    roc_auc_score, 
-    precision_score, 
-    recall_score, 
-    f1_score,
     confusion_matrix,
-    classification_report,
-    precision_recall_curve,
-    roc_curve
+    classification_report
 )
-from scipy import stats
 import logging
 
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import RISK_THRESHOLDS, CURVE_MAX_POINTS
+
 logger = logging.getLogger(__name__)
 
+# np.trapz was renamed np.trapezoid in numpy 2.0 (and deprecated there)
+trapezoid = getattr(np, 'trapezoid', None) or np.trapz
 
-def calculate_ks_statistic(y_true: np.ndarray, y_pred_proba: np.ndarray) -> float:
-    """Calculate Kolmogorov-Smirnov statistic."""
+
+class MetricsEngine:
+    """Binary classification metrics derived from a single sort of the scores.
+    
+    The scores are sorted once (descending, stable, as scikit-learn does) and
+    cumulative true/false positive counts are taken at every distinct score.
+    AUC, KS, ROC/PR curves and confusion counts at any threshold are then read
+    off those cumulative sums in O(n) instead of re-sorting per metric.
+    """
+    
+    def __init__(self, y_true: np.ndarray, y_score: np.ndarray):
+        y_true = np.asarray(y_true).ravel()
+        y_score = np.asarray(y_score, dtype=np.float64).ravel()
+        
+        order = np.argsort(y_score, kind='mergesort')[::-1]
+        sorted_scores = y_score[order]
+        self.sorted_labels = y_true[order] == 1
+        self._cum_pos = np.cumsum(self.sorted_labels, dtype=np.int64)
+        
+        # Negated scores are ascending, which is what searchsorted expects
+        self._neg_scores = -sorted_scores
+        
+        # Index of the last sample of every distinct score
+        distinct_idx = np.flatnonzero(np.diff(sorted_scores))
+        threshold_idx = np.r_[distinct_idx, len(sorted_scores) - 1]
+        
+        self.threshold_idx = threshold_idx
+        self.thresholds = sorted_scores[threshold_idx]
+        self.tps = self._cum_pos[threshold_idx]
+        self.fps = threshold_idx + 1 - self.tps
+        
+        self.n_samples = len(sorted_scores)
+        self.n_pos = int(self._cum_pos[-1]) if self.n_samples else 0
+        self.n_neg = self.n_samples - self.n_pos
     
-    # Separate predictions by class
-    good_scores = y_pred_proba[y_true == 0]
-    bad_scores = y_pred_proba[y_true == 1]
+    def _require_both_classes(self):
+        if self.n_pos == 0 or self.n_neg == 0:
+            raise ValueError(
+                "Only one class present in y_true. ROC AUC score is not defined in that case."
+            )
     
-    # Calculate KS statistic
-    ks_stat, _ = stats.ks_2samp(good_scores, bad_scores)
+    def roc_curve(self, drop_intermediate: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """False positive rate, true positive rate and thresholds, as ``sklearn.metrics.roc_curve``."""
+        
+        self._require_both_classes()
+        
+        fps, tps, thresholds = self.fps, self.tps, self.thresholds
+        
+        # Drop collinear points that do not change the curve
+        if drop_intermediate and len(fps) > 2:
+            keep = np.flatnonzero(np.r_[
+                True,
+                np.logical_or(np.diff(fps, 2), np.diff(tps, 2)),
+                True
+            ])
+            fps, tps, thresholds = fps[keep], tps[keep], thresholds[keep]
+        
+        fpr = np.r_[0, fps] / self.n_neg
+        tpr = np.r_[0, tps] / self.n_pos
+        thresholds = np.r_[np.inf, thresholds]
+        
+        return fpr, tpr, thresholds
     
-    return ks_stat
+    def auc(self) -> float:
+        """Area under the ROC curve."""
+        
+        fpr, tpr, _ = self.roc_curve()
+        return float(trapezoid(tpr, fpr))
+    
+    def ks_statistic(self) -> float:
+        """Two-sample Kolmogorov-Smirnov statistic between defaulters and non-defaulters."""
+        
+        self._require_both_classes()
+        return float(np.max(np.abs(self.tps / self.n_pos - self.fps / self.n_neg)))
+    
+    def precision_recall_curve(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Precision, recall and thresholds, as ``sklearn.metrics.precision_recall_curve``."""
+        
+        ps = self.tps + self.fps
+        precision = np.divide(self.tps, ps, out=np.zeros(len(ps)), where=ps != 0)
+        
+        if self.n_pos == 0:
+            recall = np.ones(len(self.tps))
+        else:
+            recall = self.tps / self.n_pos
+        
+        return (
+            np.r_[precision[::-1], 1.0],
+            np.r_[recall[::-1], 0.0],
+            self.thresholds[::-1]
+        )
+    
+    def confusion_at(self, thresholds, inclusive: bool = False) -> Dict[str, np.ndarray]:
+        """Confusion counts when flagging scores above each threshold.
+        
+        ``inclusive=False`` flags ``score > threshold`` (the ``proba > 0.5`` rule
+        used for model evaluation); ``inclusive=True`` flags ``score >= threshold``
+        (the tier rule used by ``determine_risk_tier``).
+        """
+        
+        thresholds = np.atleast_1d(np.asarray(thresholds, dtype=np.float64))
+        side = 'right' if inclusive else 'left'
+        n_flagged = np.searchsorted(self._neg_scores, -thresholds, side=side)
+        
+        tp = np.where(n_flagged > 0, self._cum_pos[np.maximum(n_flagged - 1, 0)], 0) \
+            if self.n_samples else np.zeros(len(thresholds), dtype=np.int64)
+        fp = n_flagged - tp
+        
+        return {
+            'tp': tp,
+            'fp': fp,
+            'fn': self.n_pos - tp,
+            'tn': self.n_neg - fp
+        }
+    
+    def precision_recall_f1_at(self, threshold: float = 0.5) -> Dict[str, float]:
+        """Precision, recall and F1 for ``score > threshold`` (zero when undefined)."""
+        
+        counts = self.confusion_at(threshold)
+        tp, fp, fn = (int(counts[k][0]) for k in ('tp', 'fp', 'fn'))
+        
+        return _precision_recall_f1(tp, fp, fn)
+    
+    def threshold_sweep(self) -> pd.DataFrame:
+        """Confusion counts, precision, recall and F1 at every distinct score."""
+        
+        tp, fp = self.tps, self.fps
+        fn = self.n_pos - tp
+        ps = tp + fp
+        
+        precision = np.divide(tp, ps, out=np.zeros(len(ps)), where=ps != 0)
+        recall = tp / self.n_pos if self.n_pos else np.zeros(len(tp))
+        denom = 2 * tp + fp + fn
+        f1 = np.divide(2 * tp, denom, out=np.zeros(len(denom)), where=denom != 0)
+        
+        return pd.DataFrame({
+            'threshold': self.thresholds,
+            'tp': tp,
+            'fp': fp,
+            'fn': fn,
+            'tn': self.n_neg - fp,
+            'precision': precision,
+            'recall': recall,
+            'f1': f1,
+            'fpr': fp / self.n_neg if self.n_neg else np.zeros(len(fp))
+        })
+    
+    def tier_report(self, risk_thresholds: Dict[str, float] = None) -> Dict[str, Dict[str, float]]:
+        """Applicant mix, default rate and cut-off precision/recall for each risk tier.
+        
+        Tiers follow ``determine_risk_tier``: LOW below the LOW cut, HIGH at or
+        above the MEDIUM cut, MEDIUM in between.
+        """
+        
+        risk_thresholds = risk_thresholds or RISK_THRESHOLDS
+        cuts = [risk_thresholds['LOW'], risk_thresholds['MEDIUM']]
+        counts = self.confusion_at(cuts, inclusive=True)
+        
+        # Samples and defaulters at or above each cut
+        flagged = np.r_[self.n_samples, counts['tp'] + counts['fp'], 0]
+        defaults = np.r_[self.n_pos, counts['tp'], 0]
+        
+        report = {}
+        for i, tier in enumerate(['LOW', 'MEDIUM', 'HIGH']):
+            n_tier = int(flagged[i] - flagged[i + 1])
+            n_default = int(defaults[i] - defaults[i + 1])
+            report[tier] = {
+                'count': n_tier,
+                'share': n_tier / self.n_samples if self.n_samples else 0.0,
+                'default_rate': n_default / n_tier if n_tier else 0.0
+            }
+        
+        # Precision/recall of treating each cut and above as predicted default
+        for tier, i in [('MEDIUM', 0), ('HIGH', 1)]:
+            tp, fp, fn = int(counts['tp'][i]), int(counts['fp'][i]), int(counts['fn'][i])
+            report[tier].update({
+                f'cut_{k}': v for k, v in _precision_recall_f1(tp, fp, fn).items()
+            })
+        
+        return report
+    
+    def summary(self, threshold: float = 0.5) -> Dict[str, float]:
+        """The standard evaluation metrics for ``score > threshold``."""
+        
+        return {
+            'auc': self.auc(),
+            **self.precision_recall_f1_at(threshold),
+            'ks_statistic': self.ks_statistic()
+        }
+
+
+def _precision_recall_f1(tp: int, fp: int, fn: int) -> Dict[str, float]:
+    """Precision, recall and F1 from confusion counts (zero when undefined)."""
+    
+    return {
+        'precision': tp / (tp + fp) if tp + fp else 0.0,
+        'recall': tp / (tp + fn) if tp + fn else 0.0,
+        'f1': 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 0.0
+    }
+
+
+def calculate_ks_statistic(y_true: np.ndarray, y_pred_proba: np.ndarray) -> float:
+    """Calculate Kolmogorov-Smirnov statistic."""
+    
+    return MetricsEngine(y_true, y_pred_proba).ks_statistic()
 
 
 def evaluate_model_performance(y_true: np.ndarray, y_pred: np.ndarray, 
-                             y_pred_proba: np.ndarray) -> Dict[str, float]:
+                             y_pred_proba: np.ndarray,
+                             engine: MetricsEngine = None) -> Dict[str, float]:
     """Calculate comprehensive model performance metrics."""
     
+    engine = engine or MetricsEngine(y_true, y_pred_proba)
+    
+    # Precision/recall/F1 come from the given hard predictions, which needs no sort
+    y_true = np.asarray(y_true).ravel() == 1
+    y_pred = np.asarray(y_pred).ravel() == 1
+    tp = int(np.count_nonzero(y_true & y_pred))
+    fp = int(np.count_nonzero(y_pred)) - tp
+    fn = int(np.count_nonzero(y_true)) - tp
+    
     metrics = {
-        'auc': roc_auc_score(y_true, y_pred_proba),
-        'precision': precision_score(y_true, y_pred),
-        'recall': recall_score(y_true, y_pred),
-        'f1': f1_score(y_true, y_pred),
-        'ks_statistic': calculate_ks_statistic(y_true, y_pred_proba)
+        'auc': engine.auc(),
+        **_precision_recall_f1(tp, fp, fn),
+        'ks_statistic': engine.ks_statistic()
     }
     
     return metrics
 
 
-def plot_confusion_matrix(y_true: np.ndarray, y_pred: np.ndarray, 
-                         model_name: str, save_path: str = None):
-    """Plot confusion matrix."""
-    
-    cm = confusion_matrix(y_true, y_pred)
+def thin_curve(x: np.ndarray, y: np.ndarray,
+               max_points: int = CURVE_MAX_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """Evenly spaced subset of a curve's points, always keeping both ends."""
     
-    plt.figure(figsize=(8, 6))
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
-                xticklabels=['Good', 'Bad'], 
-                yticklabels=['Good', 'Bad'])
-    plt.title(f'Confusion Matrix - {model_name}')
-    plt.xlabel('Predicted')
-    plt.ylabel('Actual')
+    if len(x) <= max_points:
+        return np.asarray(x), np.asarray(y)
     
-    if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    keep = np.unique(np.linspace(0, len(x) - 1, max_points).round().astype(np.int64))
+    return np.asarray(x)[keep], np.asarray(y)[keep]
 
 
-def plot_roc_curves(models_results: Dict[str, Dict], save_path: str = None):
-    """Plot ROC curves for multiple models."""
+def save_evaluation_curves(curves: Dict[str, Dict[str, Any]], save_path: Path):
+    """Save per-model curve data for the plotting stage as a compressed ``.npz``.
     
-    plt.figure(figsize=(10, 8))
+    ``curves`` maps a group (a model name, or ``feature_importance``) to named
+    arrays; each array is stored under ``<group>/<name>``.
+    """
     
-    for model_name, results in models_results.items():
-        fpr = results['fpr']
-        tpr = results['tpr']
-        auc = results['auc']
-        
-        plt.plot(fpr, tpr, label=f'{model_name} (AUC = {auc:.3f})')
-    
-    plt.plot([0, 1], [0, 1], 'k--', label='Random')
-    plt.xlabel('False Positive Rate')
-    plt.ylabel('True Positive Rate')
-    plt.title('ROC Curves - Model Comparison')
-    plt.legend()
-    plt.grid(True)
+    arrays = {
+        f"{group}/{name}": np.asarray(value)
+        for group, values in curves.items()
+        for name, value in values.items()
+    }
+    np.savez_compressed(save_path, **arrays)
     
-    if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    logger.info(f"Evaluation curves saved to {save_path}")
 
 
-def plot_precision_recall_curves(models_results: Dict[str, Dict], 
-                                save_path: str = None):
-    """Plot precision-recall curves for multiple models."""
-    
-    plt.figure(figsize=(10, 8))
-    
-    for model_name, results in models_results.items():
-        precision = results['precision']
-        recall = results['recall']
-        
-        plt.plot(recall, precision, label=f'{model_name}')
+def load_evaluation_curves(load_path: Path) -> Dict[str, Dict[str, np.ndarray]]:
+    """Inverse of ``save_evaluation_curves``."""
     
-    plt.xlabel('Recall')
-    plt.ylabel('Precision')
-    plt.title('Precision-Recall Curves - Model Comparison')
-    plt.legend()
-    plt.grid(True)
+    curves = {}
+    with np.load(load_path) as data:
+        for key in data.files:
+            group, name = key.split('/', 1)
+            curves.setdefault(group, {})[name] = data[key]
     
-    if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    return curves
 
 
 def generate_evaluation_report(y_true: np.ndarray, y_pred: np.ndarray, 
                              y_pred_proba: np.ndarray, model_name: str) -> Dict[str, Any]:
     """Generate comprehensive evaluation report."""
     
+    # Sort the scores once for every ranking metric and curve
+    engine = MetricsEngine(y_true, y_pred_proba)
+    
     # Calculate metrics
-    metrics = evaluate_model_performance(y_true, y_pred, y_pred_proba)
+    metrics = evaluate_model_performance(y_true, y_pred, y_pred_proba, engine)
     
     # Classification report
     class_report = classification_report(y_true, y_pred, output_dict=True)
@@ -130,10 +308,10 @@ def generate_evaluation_report(y_true: np.ndarray, y_pred: np.ndarray,
     cm = confusion_matrix(y_true, y_pred)
     
     # ROC curve
-    fpr, tpr, _ = roc_curve(y_true, y_pred_proba)
+    fpr, tpr, _ = engine.roc_curve()
     
     # Precision-recall curve
-    precision, recall, _ = precision_recall_curve(y_true, y_pred_proba)
+    precision, recall, _ = engine.precision_recall_curve()
     
     report = {
         'model_name': model_name,
@@ -147,7 +325,8 @@ def generate_evaluation_report(y_true: np.ndarray, y_pred: np.ndarray,
         'precision_recall_curve': {
             'precision': precision.tolist(),
             'recall': recall.tolist()
-        }
+        },
+        'risk_tiers': engine.tier_report()
     }
     
     return report
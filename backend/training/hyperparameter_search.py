@@ -0,0 +1,249 @@
+"""
+Successive-halving hyperparameter search for the candidate model families.
+"""
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, List
+import copy
+import logging
+import math
+import multiprocessing as mp
+import time
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import (
+    MODEL_PARAMS,
+    SEARCH_SPACE,
+    SEARCH_TRIALS_PER_MODEL,
+    SEARCH_MIN_ROUNDS,
+    SEARCH_MAX_ROUNDS,
+    SEARCH_ETA,
+    SEARCH_THREADS_PER_TRIAL,
+    SEARCH_TIME_BUDGET,
+    RANDOM_STATE,
+    N_JOBS
+)
+from app.utils import predict_default_probability
+from .dataset_cache import DatasetCache
+from .evaluate_model import MetricsEngine
+from .train_model import _fit_candidate, class_weighted_params
+
+logger = logging.getLogger(__name__)
+
+# Parameter that carries the tuned number of boosting rounds for each family
+ROUNDS_PARAM = {
+    'lightgbm': 'num_iterations',
+    'xgboost': 'n_estimators',
+    'catboost': 'iterations'
+}
+
+# Training data shipped to each worker once by the pool initializer
+_worker_data = {}
+
+
+def _init_worker(X_train: pd.DataFrame, y_train: pd.Series,
+                 X_val: pd.DataFrame, y_val: pd.Series, cache: DatasetCache):
+    """Keep the search data resident in the worker process."""
+
+    _worker_data.update(X_train=X_train, y_train=y_train,
+                        X_val=X_val, y_val=y_val, cache=cache)
+
+
+def _run_trial(name: str, params: Dict[str, Any], num_boost_round: int,
+               num_threads: int) -> Dict[str, Any]:
+    """Fit one configuration for a fixed round budget and score it on validation."""
+
+    data = _worker_data
+    model, stats = _fit_candidate(
+        name, params,
+        data['X_train'], data['y_train'], data['X_val'], data['y_val'],
+        num_threads, data['cache'], num_boost_round=num_boost_round
+    )
+
+    auc = MetricsEngine(data['y_val'], predict_default_probability(model, data['X_val'])).auc()
+
+    return {
+        'auc': float(auc),
+        'best_iteration': stats['best_iteration'],
+        'wall_time': stats['wall_time']
+    }
+
+
+class HyperparameterSearch:
+    """Successive-halving search over ``SEARCH_SPACE`` using validation AUC.
+
+    Each family starts with ``n_trials`` random configurations trained for
+    ``min_rounds`` boosting rounds. After every rung the best ``1/eta`` of each
+    family survive and are retrained with ``eta`` times more rounds, up to
+    ``max_rounds``. Trials run in a process pool where each trial gets
+    ``threads_per_trial`` threads, and the search stops at ``time_budget``
+    seconds, keeping the best configuration seen so far.
+    """
+
+    def __init__(self, search_space: Dict[str, Dict[str, List[Any]]] = None,
+                 n_trials: int = SEARCH_TRIALS_PER_MODEL,
+                 min_rounds: int = SEARCH_MIN_ROUNDS,
+                 max_rounds: int = SEARCH_MAX_ROUNDS,
+                 eta: int = SEARCH_ETA,
+                 n_jobs: int = None,
+                 threads_per_trial: int = SEARCH_THREADS_PER_TRIAL,
+                 time_budget: float = SEARCH_TIME_BUDGET,
+                 cache: DatasetCache = None):
+        self.search_space = search_space or SEARCH_SPACE
+        self.n_trials = n_trials
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+        self.eta = eta
+        self.n_jobs = n_jobs or N_JOBS
+        self.threads_per_trial = max(1, min(threads_per_trial, self.n_jobs))
+        self.time_budget = time_budget
+        self.cache = cache or DatasetCache()
+        self.rng = np.random.default_rng(RANDOM_STATE)
+        self.trials = []
+        self.best = {}
+        self.timed_out = False
+
+    def _sample_configs(self, name: str) -> List[Dict[str, Any]]:
+        """Draw distinct random configurations for one model family."""
+
+        space = self.search_space.get(name, {})
+        n_possible = math.prod(len(values) for values in space.values()) if space else 1
+
+        configs = []
+        seen = set()
+        while len(configs) < min(self.n_trials, n_possible):
+            config = {
+                param: values[self.rng.integers(len(values))]
+                for param, values in space.items()
+            }
+            signature = tuple(sorted(config.items()))
+            if signature not in seen:
+                seen.add(signature)
+                configs.append(config)
+
+        return configs
+
+    def _rung_rounds(self) -> List[int]:
+        """Boosting round budgets for each rung."""
+
+        rounds = []
+        budget = self.min_rounds
+        while budget < self.max_rounds:
+            rounds.append(budget)
+            budget *= self.eta
+        rounds.append(self.max_rounds)
+
+        return rounds
+
+    def run(self, X_train: pd.DataFrame, y_train: pd.Series,
+            X_val: pd.DataFrame, y_val: pd.Series) -> Dict[str, Dict[str, Any]]:
+        """Run the search and return tuned parameters for every model family."""
+
+        logger.info("Starting hyperparameter search")
+
+        deadline = time.monotonic() + self.time_budget
+        base_params = class_weighted_params(MODEL_PARAMS, y_train)
+
+        survivors = {
+            name: [{'config': config, 'auc': None, 'best_iteration': None}
+                   for config in self._sample_configs(name)]
+            for name in base_params
+        }
+
+        n_workers = max(1, self.n_jobs // self.threads_per_trial)
+        logger.info(f"Search pool: {n_workers} workers x {self.threads_per_trial} threads")
+
+        ctx = mp.get_context('spawn')
+        pool = ctx.Pool(
+            processes=n_workers,
+            initializer=_init_worker,
+            initargs=(X_train, y_train, X_val, y_val, self.cache)
+        )
+
+        self.timed_out = False
+        try:
+            for rung, num_rounds in enumerate(self._rung_rounds()):
+                pending = []
+                for name, candidates in survivors.items():
+                    for candidate in candidates:
+                        params = {**base_params[name], **candidate['config']}
+                        pending.append((name, candidate, pool.apply_async(
+                            _run_trial, (name, params, num_rounds, self.threads_per_trial)
+                        )))
+
+                logger.info(f"Rung {rung}: {len(pending)} trials at {num_rounds} rounds")
+
+                for name, candidate, result in pending:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        if remaining <= 0:
+                            raise mp.TimeoutError
+                        outcome = result.get(timeout=remaining)
+                    except mp.TimeoutError:
+                        self.timed_out = True
+                        break
+
+                    candidate['auc'] = outcome['auc']
+                    candidate['best_iteration'] = outcome['best_iteration']
+                    self.trials.append({
+                        'model': name,
+                        'rung': rung,
+                        'num_boost_round': num_rounds,
+                        **candidate['config'],
+                        **outcome
+                    })
+
+                if self.timed_out:
+                    logger.warning("Search time budget exhausted, keeping best trials so far")
+                    break
+
+                # Prune each family down to its best 1/eta configurations
+                for name, candidates in survivors.items():
+                    scored = sorted(
+                        (c for c in candidates if c['auc'] is not None),
+                        key=lambda c: c['auc'], reverse=True
+                    )
+                    survivors[name] = scored[:max(1, len(scored) // self.eta)]
+
+                    logger.info(f"{name} rung {rung} best AUC: {scored[0]['auc']:.4f}")
+        finally:
+            pool.terminate()
+            pool.join()
+
+        tuned_params = copy.deepcopy(MODEL_PARAMS)
+        for name in tuned_params:
+            family_trials = [t for t in self.trials if t['model'] == name]
+            if not family_trials:
+                continue
+
+            # Prefer trials that reached the deepest rung, then the highest AUC
+            winner = max(family_trials, key=lambda t: (t['rung'], t['auc']))
+            config = {param: winner[param] for param in self.search_space.get(name, {})}
+            tuned_params[name].update(config)
+            tuned_params[name][ROUNDS_PARAM[name]] = winner['best_iteration']
+
+            self.best[name] = {'auc': winner['auc'], 'rung': winner['rung'], **config}
+            logger.info(f"Best {name} config (AUC {winner['auc']:.4f}): {config}")
+
+        return tuned_params
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact description of the search for the model metadata."""
+
+        return {
+            'method': 'successive_halving',
+            'n_trials_run': len(self.trials),
+            'rung_rounds': self._rung_rounds(),
+            'eta': self.eta,
+            'time_budget': self.time_budget,
+            'timed_out': self.timed_out,
+            'best': self.best
+        }
+
+    def trials_frame(self) -> pd.DataFrame:
+        """All evaluated trials as a DataFrame."""
+
+        return pd.DataFrame(self.trials)
@@ -0,0 +1,145 @@
+"""
+Warm-start incremental retraining of the deployed model on newly arrived loans.
+"""
+import pandas as pd
+import numpy as np
+from typing import Dict, Any
+import json
+import logging
+import time
+import joblib
+from pathlib import Path
+from sklearn.model_selection import train_test_split
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import (
+    MODEL_PARAMS,
+    MODEL_PATH,
+    ARTIFACTS_ROOT,
+    RANDOM_STATE,
+    VALIDATION_SIZE,
+    INCREMENTAL_BOOST_ROUNDS,
+    N_JOBS
+)
+from app.utils import predict_default_probability
+from .data_loader import CreditDataLoader
+from .train_model import ModelTrainer, _fit_candidate, class_weighted_params, selection_score
+
+logger = logging.getLogger(__name__)
+
+
+def incremental_retrain(new_data_path: Path,
+                        num_boost_round: int = INCREMENTAL_BOOST_ROUNDS,
+                        promote: bool = True,
+                        n_jobs: int = None) -> Dict[str, Any]:
+    """Continue boosting the deployed model on new rows only.
+
+    The new rows go through the same target/feature/cleaning steps as a full
+    run and are scaled with the deployed preprocessing artifacts. A stratified
+    holdout of the new rows is used for early stopping and to compare the
+    updated model against the current champion with the usual selection score.
+    The updated model and refreshed imputer are saved only if they win.
+    """
+
+    logger.info(f"Starting incremental retraining on {new_data_path}")
+    start = time.perf_counter()
+
+    # Load deployed artifacts
+    loader = CreditDataLoader()
+    loader.load_preprocessing_artifacts()
+    champion = joblib.load(MODEL_PATH)
+
+    with open(ARTIFACTS_ROOT / "model_metadata.json", 'r') as f:
+        metadata = json.load(f)
+
+    name = metadata['model_name']
+    base_params = metadata.get('model_params') or MODEL_PARAMS[name]
+    n_seen = metadata.get('statistics_rows', int(np.max(loader.scaler.n_samples_seen_)))
+
+    # Prepare the new rows exactly like a full run
+    df = loader.load_loan_data(new_data_path)
+    df = loader.create_target_variable(df)
+    df = loader.select_features(df)
+    df = loader.clean_data(df)
+
+    mean_shift = loader.update_preprocessing_statistics(df, n_seen)
+    df = loader.preprocess_features(df, fit=False)
+
+    train, holdout = train_test_split(
+        df,
+        test_size=VALIDATION_SIZE,
+        random_state=RANDOM_STATE,
+        stratify=df['target_default']
+    )
+    X_train = train.drop('target_default', axis=1)
+    y_train = train['target_default']
+    X_holdout = holdout.drop('target_default', axis=1)
+    y_holdout = holdout['target_default']
+
+    # Continue boosting from the champion
+    params = class_weighted_params({name: base_params}, y_train)[name]
+    model, stats = _fit_candidate(
+        name, params, X_train, y_train, X_holdout, y_holdout,
+        n_jobs or N_JOBS, num_boost_round=num_boost_round, init_model=champion
+    )
+
+    # Evaluate champion and updated model on the same holdout
+    champion_trainer = ModelTrainer()
+    champion_trainer.models = {name: champion}
+    champion_metrics = champion_trainer.evaluate_models(X_holdout, y_holdout)[name]
+
+    trainer = ModelTrainer(model_params={name: base_params})
+    trainer.models = {name: model}
+    trainer.training_stats = {name: stats}
+    results = trainer.evaluate_models(X_holdout, y_holdout)
+
+    champion_score = selection_score(champion_metrics)
+    updated_score = selection_score(results[name])
+    promoted = promote and updated_score >= champion_score
+
+    summary = {
+        'new_rows': len(df),
+        'num_boost_round': num_boost_round,
+        'champion_score': champion_score,
+        'updated_score': updated_score,
+        'promoted': promoted,
+        'feature_mean_shift': mean_shift,
+        'wall_time': time.perf_counter() - start
+    }
+
+    logger.info(
+        f"Champion score: {champion_score:.4f}, updated score: {updated_score:.4f} "
+        f"({summary['wall_time']:.1f}s)"
+    )
+
+    if promoted:
+        trainer.select_best_model(results)
+        trainer.incremental_update = summary
+        trainer.statistics_rows = n_seen + len(df)
+        trainer.save_model()
+        loader.save_preprocessing_artifacts()
+        loader.merge_reference_distributions(X_train, predict_default_probability(model, X_holdout))
+        logger.info("Updated model promoted")
+    else:
+        logger.info("Champion kept, updated model discarded")
+
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Incrementally retrain the deployed model on new loans")
+    parser.add_argument("new_data", type=Path, help="CSV of newly arrived loans in the raw loan schema")
+    parser.add_argument("--rounds", type=int, default=INCREMENTAL_BOOST_ROUNDS,
+                        help="Maximum number of trees to add")
+    parser.add_argument("--no-promote", action="store_true",
+                        help="Evaluate only, never overwrite the deployed artifacts")
+    parser.add_argument("--n-jobs", type=int, default=None,
+                        help=f"Thread budget (default: {N_JOBS})")
+    args = parser.parse_args()
+
+    incremental_retrain(args.new_data, num_boost_round=args.rounds,
+                        promote=not args.no_promote, n_jobs=args.n_jobs)
@@ -0,0 +1,96 @@
+"""
+Per-run store of model predictions shared by evaluation and reporting.
+"""
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Tuple, List
+import logging
+import shutil
+import tempfile
+from pathlib import Path
+
+from app.utils import predict_default_probability
+from .evaluate_model import MetricsEngine
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionStore:
+    """Scores keyed by model and split, held in memory-mapped ``.npy`` files.
+
+    Each model is scored on each split at most once per run; evaluation,
+    report generation and threshold analysis all read the stored scores and
+    share one ``MetricsEngine`` (and therefore one sort) per model and split.
+    Without ``store_dir`` the arrays live in a private temporary directory
+    owned by the store, removed by ``clear()`` or when the store is garbage
+    collected or the process exits.
+    """
+
+    def __init__(self, store_dir: Path = None):
+        self.store_dir = Path(store_dir) if store_dir else None
+        self._tmp_dir = None
+        self._scores = {}
+        self._engines = {}
+
+    def _path(self, model_name: str, split: str) -> Path:
+        if self.store_dir is None:
+            self._tmp_dir = tempfile.TemporaryDirectory(prefix="predictions_")
+            self.store_dir = Path(self._tmp_dir.name)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        return self.store_dir / f"{model_name}_{split}.npy"
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._scores
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """(model, split) pairs currently stored."""
+
+        return list(self._scores.keys())
+
+    def put(self, model_name: str, split: str, scores: np.ndarray) -> np.ndarray:
+        """Store scores and return them as a read-only memory map."""
+
+        path = self._path(model_name, split)
+        np.save(path, np.asarray(scores, dtype=np.float64))
+
+        self._scores[(model_name, split)] = np.load(path, mmap_mode='r')
+        self._engines.pop((model_name, split), None)
+
+        return self._scores[(model_name, split)]
+
+    def get(self, model_name: str, split: str) -> np.ndarray:
+        """Stored scores for a model and split."""
+
+        return self._scores[(model_name, split)]
+
+    def predict(self, model_name: str, model, split: str, X) -> np.ndarray:
+        """Score ``X`` with ``model`` unless this model/split was already scored."""
+
+        key = (model_name, split)
+        if key not in self._scores:
+            logger.info(f"Scoring {model_name} on {split} ({len(X)} rows)")
+            self.put(model_name, split, predict_default_probability(model, X))
+
+        return self._scores[key]
+
+    def engine(self, model_name: str, split: str, y_true) -> MetricsEngine:
+        """Metrics engine over the stored scores, built once per model and split."""
+
+        key = (model_name, split)
+        if key not in self._engines:
+            self._engines[key] = MetricsEngine(y_true, self.get(model_name, split))
+
+        return self._engines[key]
+
+    def clear(self):
+        """Drop every stored prediction and remove the backing files."""
+
+        self._scores.clear()
+        self._engines.clear()
+
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+            self._tmp_dir = None
+            self.store_dir = None
+        elif self.store_dir is not None and self.store_dir.exists():
+            shutil.rmtree(self.store_dir, ignore_errors=True)
@@ -0,0 +1,246 @@
+"""
+Per-stage wall time, CPU time, peak memory and DataFrame size profiling for training runs.
+"""
+import pandas as pd
+from typing import Dict, Any, List
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import (
+    TRAINING_PROFILE_PATH,
+    TRAINING_PROFILE_HISTORY_PATH,
+    PROFILE_SAMPLE_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes."""
+
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        # No procfs: fall back to the lifetime peak (kilobytes on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _cpu_seconds() -> float:
+    """CPU time of this process and of its reaped worker processes."""
+
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class StageRecord:
+    """Measurements for one profiled stage."""
+
+    def __init__(self, name: str, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.start_rss = current_rss() if enabled else None
+        self.peak_rss = self.start_rss
+        self.frames = {}
+        self.extra = {}
+
+    def frame(self, df: pd.DataFrame, label: str = 'output'):
+        """Record the shape and in-memory size of an intermediate DataFrame."""
+
+        if not self.enabled:
+            return
+
+        self.frames[label] = {
+            'rows': int(df.shape[0]),
+            'columns': int(df.shape[1]),
+            'memory_mb': round(df.memory_usage(deep=True).sum() / 2**20, 2)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = {
+            'wall_time': round(self.wall_time, 4),
+            'cpu_time': round(self.cpu_time, 4),
+            'cpu_utilization': round(self.cpu_time / self.wall_time, 3) if self.wall_time > 0 else None
+        }
+        if self.peak_rss is not None:
+            record['start_rss_mb'] = round(self.start_rss / 2**20, 1)
+            record['peak_rss_mb'] = round(self.peak_rss / 2**20, 1)
+        if self.frames:
+            record['frames'] = self.frames
+        record.update(self.extra)
+        return record
+
+
+class TrainingProfiler:
+    """Collects per-stage measurements for a training run.
+
+    A background thread polls RSS every ``PROFILE_SAMPLE_INTERVAL`` seconds
+    and attributes it to every stage currently open, so nested stages each get
+    their own peak. When ``sample_stage`` is set, the same thread also samples
+    the main thread's Python stack while that stage runs and the counts are
+    written in folded-stack format (one ``frame;frame;... count`` per line),
+    ready for flame graph tools.
+
+    A disabled profiler hands out throwaway records, so call sites can
+    always use ``with profiler.stage(...)``.
+    """
+
+    def __init__(self, enabled: bool = True, sample_stage: str = None,
+                 interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.enabled = enabled
+        self.sample_stage = sample_stage
+        self.interval = interval
+        self.stages = {}
+        self.samples = Counter()
+        self._active = []
+        self._main_thread_id = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = time.perf_counter()
+
+        if enabled:
+            self._thread = threading.Thread(target=self._poll, name="training-profiler", daemon=True)
+            self._thread.start()
+
+    def _poll(self):
+        """Background loop: update open stages' peaks and sample stacks."""
+
+        while not self._stop.wait(self.interval):
+            active = list(self._active)
+            if not active:
+                continue
+
+            rss = current_rss()
+            for record in active:
+                record.peak_rss = max(record.peak_rss, rss)
+
+            if self.sample_stage and any(record.name == self.sample_stage for record in active):
+                frame = sys._current_frames().get(self._main_thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{Path(code.co_filename).name}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                if stack:
+                    self.samples[';'.join(reversed(stack))] += 1
+
+    @contextmanager
+    def stage(self, name: str):
+        """Measure the enclosed block as stage ``name``."""
+
+        record = StageRecord(name, self.enabled)
+        if not self.enabled:
+            yield record
+            return
+
+        self._active.append(record)
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_seconds()
+        try:
+            yield record
+        finally:
+            record.wall_time = time.perf_counter() - wall_start
+            record.cpu_time = _cpu_seconds() - cpu_start
+            record.peak_rss = max(record.peak_rss, current_rss())
+            self._active.remove(record)
+            self.stages[name] = record
+
+            logger.info(
+                f"[profile] {name}: {record.wall_time:.2f}s wall, {record.cpu_time:.2f}s CPU, "
+                f"peak RSS {record.peak_rss / 2**20:.0f} MB"
+            )
+
+    def record(self, name: str, **measurements):
+        """Add a stage measured elsewhere, e.g. inside a worker process."""
+
+        if self.enabled:
+            record = StageRecord(name, enabled=False)
+            record.wall_time = measurements.pop('wall_time', 0.0)
+            record.cpu_time = measurements.pop('cpu_time', 0.0)
+            record.extra = measurements
+            self.stages[name] = record
+
+    def close(self):
+        """Stop the background sampler."""
+
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def report(self) -> Dict[str, Any]:
+        """Whole-run profile as a JSON-serializable dict."""
+
+        return {
+            'run_date': pd.Timestamp.now().isoformat(),
+            'total_wall_time': round(time.perf_counter() - self._started, 4),
+            'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'cpu_count': os.cpu_count(),
+            'sampled_stage': self.sample_stage,
+            'stages': {name: record.to_dict() for name, record in self.stages.items()}
+        }
+
+    def save(self, path: Path = TRAINING_PROFILE_PATH,
+             history_path: Path = TRAINING_PROFILE_HISTORY_PATH) -> Dict[str, Any]:
+        """Write the profile, append it to the run history and log the change from the last run."""
+
+        self.close()
+        report = self.report()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        previous = load_profile_history(history_path)
+        if previous:
+            last = previous[-1]
+            logger.info(
+                f"[profile] total {report['total_wall_time']:.1f}s "
+                f"(previous run {last['total_wall_time']:.1f}s)"
+            )
+            for name, stage in report['stages'].items():
+                before = last['stages'].get(name)
+                if before and before['wall_time'] > 0:
+                    change = stage['wall_time'] / before['wall_time'] - 1
+                    logger.info(f"[profile]   {name}: {stage['wall_time']:.2f}s ({change:+.0%})")
+
+        with open(history_path, 'a') as f:
+            f.write(json.dumps(report) + '\n')
+
+        if self.sample_stage:
+            samples_path = path.with_name(f"{path.stem}_{self.sample_stage.replace('/', '_')}.folded")
+            with open(samples_path, 'w') as f:
+                for stack, count in self.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            logger.info(f"[profile] {sum(self.samples.values())} stack samples of "
+                        f"'{self.sample_stage}' written to {samples_path}")
+
+        logger.info(f"Training profile saved to {path}")
+
+        return report
+
+
+def load_profile_history(history_path: Path = TRAINING_PROFILE_HISTORY_PATH) -> List[Dict[str, Any]]:
+    """Profiles of earlier runs, oldest first."""
+
+    history_path = Path(history_path)
+    if not history_path.exists():
+        return []
+
+    with open(history_path) as f:
+        return [json.loads(line) for line in f if line.strip()]
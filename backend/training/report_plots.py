@@ -0,0 +1,214 @@
+"""
+Report stage: render evaluation plots from the curve data saved by training.
+
+matplotlib and seaborn are only imported inside the rendering workers, so
+training and headless runs never load them.
+"""
+import numpy as np
+from typing import Dict, Any, List, Tuple
+import logging
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import EVALUATION_CURVES_PATH, PLOTS_DIR, PLOT_DPI, N_JOBS
+from .evaluate_model import load_evaluation_curves
+
+logger = logging.getLogger(__name__)
+
+IMPORTANCE_GROUP = 'feature_importance'
+
+
+def _pyplot():
+    """Headless pyplot, imported on first use."""
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def plot_confusion_matrix(cm: np.ndarray, model_name: str, save_path: str = None):
+    """Plot confusion matrix."""
+
+    import seaborn as sns
+    plt = _pyplot()
+
+    plt.figure(figsize=(8, 6))
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
+                xticklabels=['Good', 'Bad'],
+                yticklabels=['Good', 'Bad'])
+    plt.title(f'Confusion Matrix - {model_name}')
+    plt.xlabel('Predicted')
+    plt.ylabel('Actual')
+
+    if save_path:
+        plt.savefig(save_path, dpi=PLOT_DPI, bbox_inches='tight')
+    plt.close()
+
+
+def plot_roc_curves(models_results: Dict[str, Dict], save_path: str = None):
+    """Plot ROC curves for multiple models."""
+
+    plt = _pyplot()
+    plt.figure(figsize=(10, 8))
+
+    for model_name, results in models_results.items():
+        fpr = results['roc_fpr']
+        tpr = results['roc_tpr']
+        auc = float(results['auc'])
+
+        plt.plot(fpr, tpr, label=f'{model_name} (AUC = {auc:.3f})')
+
+    plt.plot([0, 1], [0, 1], 'k--', label='Random')
+    plt.xlabel('False Positive Rate')
+    plt.ylabel('True Positive Rate')
+    plt.title('ROC Curves - Model Comparison')
+    plt.legend()
+    plt.grid(True)
+
+    if save_path:
+        plt.savefig(save_path, dpi=PLOT_DPI, bbox_inches='tight')
+    plt.close()
+
+
+def plot_precision_recall_curves(models_results: Dict[str, Dict],
+                                save_path: str = None):
+    """Plot precision-recall curves for multiple models."""
+
+    plt = _pyplot()
+    plt.figure(figsize=(10, 8))
+
+    for model_name, results in models_results.items():
+        precision = results['pr_precision']
+        recall = results['pr_recall']
+
+        plt.plot(recall, precision, label=f'{model_name}')
+
+    plt.xlabel('Recall')
+    plt.ylabel('Precision')
+    plt.title('Precision-Recall Curves - Model Comparison')
+    plt.legend()
+    plt.grid(True)
+
+    if save_path:
+        plt.savefig(save_path, dpi=PLOT_DPI, bbox_inches='tight')
+    plt.close()
+
+
+def plot_feature_importance(importance: Dict[str, np.ndarray], save_path: str = None):
+    """Plot the top features of the best model."""
+
+    plt = _pyplot()
+    plt.figure(figsize=(12, 8))
+
+    plt.barh(list(importance['features']), importance['values'])
+    plt.xlabel('Feature Importance')
+    plt.title(f"Top {len(importance['features'])} Feature Importance - "
+              f"{str(importance['model']).title()}")
+    plt.gca().invert_yaxis()
+    plt.tight_layout()
+
+    if save_path:
+        plt.savefig(save_path, dpi=PLOT_DPI, bbox_inches='tight')
+    plt.close()
+
+
+def _render_figure(kind: str, curves_path: str, save_path: str, model_name: str = None) -> str:
+    """Draw one figure from the saved curve data (runs in a worker process)."""
+
+    curves = load_evaluation_curves(curves_path)
+    models = {name: values for name, values in curves.items() if name != IMPORTANCE_GROUP}
+
+    if kind == 'roc':
+        plot_roc_curves(models, save_path)
+    elif kind == 'precision_recall':
+        plot_precision_recall_curves(models, save_path)
+    elif kind == 'feature_importance':
+        plot_feature_importance(curves[IMPORTANCE_GROUP], save_path)
+    elif kind == 'confusion_matrix':
+        plot_confusion_matrix(models[model_name]['confusion_matrix'], model_name, save_path)
+    else:
+        raise ValueError(f"Unknown figure kind: {kind}")
+
+    return save_path
+
+
+def plot_jobs(curves: Dict[str, Dict[str, np.ndarray]],
+              plots_dir: Path) -> List[Tuple[str, Path, str]]:
+    """(kind, output path, model name) for every figure the curve data supports."""
+
+    models = [name for name in curves if name != IMPORTANCE_GROUP]
+
+    jobs = [
+        ('roc', plots_dir / "roc_curves.png", None),
+        ('precision_recall', plots_dir / "precision_recall_curves.png", None)
+    ]
+    if IMPORTANCE_GROUP in curves:
+        jobs.append(('feature_importance', plots_dir / "feature_importance.png", None))
+    for name in models:
+        jobs.append(('confusion_matrix', plots_dir / f"confusion_matrix_{name}.png", name))
+
+    return jobs
+
+
+def render_plots(curves_path: Path = EVALUATION_CURVES_PATH,
+                 plots_dir: Path = PLOTS_DIR,
+                 n_jobs: int = None,
+                 force: bool = False) -> List[Path]:
+    """Render every evaluation figure, one worker process per figure.
+
+    Figures newer than the curve data are left alone unless ``force`` is set.
+    Returns the paths that were (re)drawn.
+    """
+
+    curves_path = Path(curves_path)
+    plots_dir = Path(plots_dir)
+    plots_dir.mkdir(parents=True, exist_ok=True)
+
+    curves_mtime = curves_path.stat().st_mtime
+    jobs = [
+        (kind, path, name) for kind, path, name in plot_jobs(load_evaluation_curves(curves_path), plots_dir)
+        if force or not path.exists() or path.stat().st_mtime < curves_mtime
+    ]
+
+    if not jobs:
+        logger.info("Evaluation plots are up to date")
+        return []
+
+    n_workers = max(1, min(n_jobs or N_JOBS, len(jobs)))
+    logger.info(f"Rendering {len(jobs)} plots with {n_workers} worker processes")
+
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context('spawn')) as executor:
+        futures = [
+            executor.submit(_render_figure, kind, str(curves_path), str(path), name)
+            for kind, path, name in jobs
+        ]
+        rendered = [Path(future.result()) for future in futures]
+
+    logger.info(f"Plots saved to {plots_dir}")
+
+    return rendered
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Render evaluation plots from saved curve data")
+    parser.add_argument("--curves", type=Path, default=EVALUATION_CURVES_PATH,
+                        help="Curve data written by training")
+    parser.add_argument("--output", type=Path, default=PLOTS_DIR,
+                        help="Directory for the PNG files")
+    parser.add_argument("--n-jobs", type=int, default=None,
+                        help=f"Worker processes (default: {N_JOBS})")
+    parser.add_argument("--force", action="store_true",
+                        help="Redraw figures even if they are newer than the curve data")
+    args = parser.parse_args()
+
+    render_plots(args.curves, args.output, n_jobs=args.n_jobs, force=args.force)
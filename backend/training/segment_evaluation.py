@@ -0,0 +1,186 @@
+"""
+Segmented evaluation of model scores across applicant segments.
+"""
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Tuple, List
+import logging
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import (
+    RISK_THRESHOLDS,
+    SEGMENT_FICO_BANDS,
+    SEGMENT_INCOME_QUANTILES,
+    SEGMENT_COMBINATIONS
+)
+
+logger = logging.getLogger(__name__)
+
+
+def build_segment_codes(X_raw: pd.DataFrame) -> Dict[str, Tuple[np.ndarray, List[str]]]:
+    """Integer segment codes and labels for each base segmentation.
+
+    ``X_raw`` holds unscaled features (e.g. ``scaler.inverse_transform`` of the
+    model input). Codes index into the returned label list.
+    """
+
+    segments = {}
+
+    if 'fico_score' in X_raw.columns:
+        edges = np.asarray(SEGMENT_FICO_BANDS)
+        codes = np.clip(np.searchsorted(edges, X_raw['fico_score'].to_numpy(), side='right') - 1,
+                        0, len(edges) - 2)
+        labels = [f"{int(lo)}-{int(hi) - 1}" for lo, hi in zip(edges[:-1], edges[1:])]
+        segments['fico_band'] = (codes, labels)
+
+    if 'term_length' in X_raw.columns:
+        values, codes = np.unique(np.round(X_raw['term_length'].to_numpy()), return_inverse=True)
+        segments['term_length'] = (codes, [f"{int(v)} months" for v in values])
+
+    if 'annual_income' in X_raw.columns:
+        income = X_raw['annual_income'].to_numpy()
+        edges = np.unique(np.quantile(income, np.linspace(0, 1, SEGMENT_INCOME_QUANTILES + 1)))
+        codes = np.clip(np.searchsorted(edges, income, side='right') - 1, 0, len(edges) - 2)
+        labels = [f"D{i + 1} ({lo:,.0f}-{hi:,.0f})" for i, (lo, hi) in enumerate(zip(edges[:-1], edges[1:]))]
+        segments['income_decile'] = (codes, labels)
+
+    if 'high_utilization' in X_raw.columns:
+        values, codes = np.unique(np.round(X_raw['high_utilization'].to_numpy()), return_inverse=True)
+        segments['high_utilization'] = (codes, [str(int(v)) for v in values])
+
+    return segments
+
+
+def combine_segments(segments: Dict[str, Tuple[np.ndarray, List[str]]],
+                     names: List[str]) -> Tuple[np.ndarray, List[str]]:
+    """Mixed-radix code for the cross product of several segmentations."""
+
+    codes = np.zeros(len(segments[names[0]][0]), dtype=np.int64)
+    labels = ['']
+    for name in names:
+        part_codes, part_labels = segments[name]
+        codes = codes * len(part_labels) + part_codes
+        labels = [f"{prefix} | {label}" if prefix else label
+                  for prefix in labels for label in part_labels]
+
+    return codes, labels
+
+
+class SegmentEvaluator:
+    """AUC, KS, default rate and tier mix per segment from one global score sort.
+
+    Scores are sorted once. Each segmentation then needs only a stable integer
+    sort of its segment codes over the score-sorted rows, after which every
+    segment's rows are contiguous and still score-sorted, and all per-segment
+    metrics follow from cumulative sums and grouped reductions in O(n).
+    """
+
+    def __init__(self, y_true: np.ndarray, y_score: np.ndarray,
+                 risk_thresholds: Dict[str, float] = None):
+        y_true = np.asarray(y_true).ravel() == 1
+        y_score = np.asarray(y_score, dtype=np.float64).ravel()
+        risk_thresholds = risk_thresholds or RISK_THRESHOLDS
+
+        self.order = np.argsort(y_score, kind='mergesort')[::-1]
+        self.scores = y_score[self.order]
+        self.labels = y_true[self.order]
+
+        # Tier per row in score order: 0 LOW, 1 MEDIUM, 2 HIGH (determine_risk_tier rule)
+        cuts = [risk_thresholds['LOW'], risk_thresholds['MEDIUM']]
+        self.tiers = np.searchsorted(cuts, self.scores, side='right')
+
+    def evaluate(self, codes: np.ndarray, labels: List[str], segmentation: str) -> pd.DataFrame:
+        """Metrics for every non-empty segment of one segmentation."""
+
+        n_segments = len(labels)
+        codes = np.asarray(codes)[self.order]
+        code_dtype = np.int16 if n_segments < np.iinfo(np.int16).max else np.int64
+        group_order = np.argsort(codes.astype(code_dtype), kind='stable')
+
+        seg = codes[group_order]
+        scores = self.scores[group_order]
+        cum_pos = np.cumsum(self.labels[group_order], dtype=np.int64)
+
+        counts = np.bincount(seg, minlength=n_segments)
+        score_sum = np.bincount(seg, weights=scores, minlength=n_segments)
+        tier_counts = np.bincount(seg * 3 + self.tiers[group_order],
+                                  minlength=n_segments * 3).reshape(n_segments, 3)
+
+        # Rows and positives before each segment's first row
+        seg_end = np.cumsum(counts)
+        seg_start = seg_end - counts
+        padded_cum_pos = np.r_[0, cum_pos]
+        pos_offset = padded_cum_pos[seg_start]
+        n_pos = padded_cum_pos[seg_end] - pos_offset
+        n_neg = counts - n_pos
+
+        # Last row of every run of equal (segment, score)
+        change = (seg[1:] != seg[:-1]) | (scores[1:] != scores[:-1])
+        boundary = np.r_[np.flatnonzero(change), len(seg) - 1] if len(seg) else np.array([], dtype=np.int64)
+        b_seg = seg[boundary]
+        tp = cum_pos[boundary] - pos_offset[b_seg]
+        fp = boundary + 1 - seg_start[b_seg] - tp
+
+        # Previous curve point within the segment, (0, 0) at each segment start
+        first = np.r_[True, b_seg[1:] != b_seg[:-1]] if len(boundary) else np.array([], dtype=bool)
+        tp_prev = np.where(first, 0, np.r_[0, tp[:-1]])
+        fp_prev = np.where(first, 0, np.r_[0, fp[:-1]])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            area = np.bincount(b_seg, weights=(fp - fp_prev) * (tp + tp_prev) / 2.0,
+                               minlength=n_segments)
+            auc = area / (n_pos * n_neg)
+
+            gap = np.abs(tp / n_pos[b_seg] - fp / n_neg[b_seg])
+            ks = np.full(n_segments, np.nan)
+            if len(boundary):
+                starts = np.flatnonzero(first)
+                ks[b_seg[starts]] = np.maximum.reduceat(gap, starts)
+
+            defined = (n_pos > 0) & (n_neg > 0)
+            auc[~defined] = np.nan
+            ks[~defined] = np.nan
+
+            report = pd.DataFrame({
+                'segmentation': segmentation,
+                'segment': labels,
+                'count': counts,
+                'share': counts / max(len(seg), 1),
+                'defaults': n_pos,
+                'default_rate': n_pos / counts,
+                'mean_score': score_sum / counts,
+                'auc': auc,
+                'ks_statistic': ks,
+                'tier_low_share': tier_counts[:, 0] / counts,
+                'tier_medium_share': tier_counts[:, 1] / counts,
+                'tier_high_share': tier_counts[:, 2] / counts
+            })
+
+        return report[report['count'] > 0].reset_index(drop=True)
+
+
+def evaluate_segments(X_raw: pd.DataFrame, y_true: np.ndarray, y_score: np.ndarray,
+                      combinations: List[List[str]] = None) -> pd.DataFrame:
+    """Tidy per-segment report over the base segmentations and their combinations."""
+
+    combinations = SEGMENT_COMBINATIONS if combinations is None else combinations
+
+    evaluator = SegmentEvaluator(y_true, y_score)
+    segments = build_segment_codes(X_raw)
+
+    reports = []
+    for name, (codes, labels) in segments.items():
+        reports.append(evaluator.evaluate(codes, labels, name))
+
+    for names in combinations:
+        if all(name in segments for name in names):
+            codes, labels = combine_segments(segments, names)
+            reports.append(evaluator.evaluate(codes, labels, ' x '.join(names)))
+
+    report = pd.concat(reports, ignore_index=True)
+    logger.info(f"Evaluated {len(report)} segments across {len(reports)} segmentations")
+
+    return report
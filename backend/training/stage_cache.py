@@ -0,0 +1,235 @@
+"""
+Content-addressed on-disk cache for the stages of the training pipeline.
+"""
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, List, Callable, NamedTuple, Sequence
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+import tempfile
+import joblib
+import sklearn
+from pathlib import Path
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import (
+    STAGE_CACHE_DIR,
+    LOAN_DATA_PATH,
+    RANDOM_STATE,
+    TEST_SIZE,
+    VALIDATION_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+
+def code_version(obj) -> str:
+    """Hash of a function's or method's source code."""
+
+    return hashlib.sha256(inspect.getsource(obj).encode()).hexdigest()[:16]
+
+
+def file_fingerprint(path: Path) -> Dict[str, Any]:
+    """Identify an input file by path, size and modification time."""
+
+    stat = Path(path).stat()
+    return {'path': str(Path(path).resolve()), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class Stage(NamedTuple):
+    """One pipeline stage: ``compute`` maps the previous stage's outputs to its own."""
+
+    name: str
+    compute: Callable[[Dict[str, Any]], Dict[str, Any]]
+    code: Sequence[Any] = ()
+    config: Dict[str, Any] = None
+
+
+class StageCache:
+    """Caches the outputs of each pipeline stage keyed by what produced them.
+
+    A stage's key hashes the key of the stage before it, the source of the
+    code that runs it and the config settings it reads, so keys can be worked
+    out without touching any data. Outputs are stored per key under
+    ``cache_dir/<stage>/<key>``: DataFrames as Parquet, arrays as ``.npy`` and
+    anything else with joblib.
+    """
+
+    def __init__(self, cache_dir: Path = STAGE_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.keys = {}
+        self.hits = []
+        self.misses = []
+
+    def key(self, stage: str, upstream: str = None, code: Sequence[Any] = (),
+            config: Dict[str, Any] = None) -> str:
+        """Build and remember the cache key of a stage."""
+
+        payload = json.dumps({
+            'stage': stage,
+            'upstream': upstream,
+            'code': [code_version(obj) for obj in code],
+            'config': config
+        }, sort_keys=True, default=str)
+
+        self.keys[stage] = hashlib.sha256(payload.encode()).hexdigest()[:16]
+        return self.keys[stage]
+
+    def _entry_dir(self, stage: str, key: str) -> Path:
+        return self.cache_dir / stage / key
+
+    def contains(self, stage: str, key: str) -> bool:
+        """Whether outputs for this stage and key are on disk."""
+
+        return self._entry_dir(stage, key).exists()
+
+    def load(self, stage: str, key: str) -> Dict[str, Any]:
+        """Read back every output of a cached stage."""
+
+        entry_dir = self._entry_dir(stage, key)
+        outputs = {}
+        for path in sorted(entry_dir.iterdir()):
+            if path.suffix == '.parquet':
+                outputs[path.stem] = pd.read_parquet(path)
+            elif path.suffix == '.npy':
+                outputs[path.stem] = np.load(path)
+            else:
+                outputs[path.stem] = joblib.load(path)
+
+        self.hits.append(stage)
+        logger.info(f"Stage cache hit: {stage} ({key})")
+
+        return outputs
+
+    def store(self, stage: str, key: str, outputs: Dict[str, Any]):
+        """Write a stage's outputs and atomically publish them under its key."""
+
+        entry_dir = self._entry_dir(stage, key)
+        entry_dir.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(dir=entry_dir.parent, prefix=".tmp_"))
+
+        for name, value in outputs.items():
+            if isinstance(value, pd.DataFrame):
+                try:
+                    value.to_parquet(tmp_dir / f"{name}.parquet")
+                    continue
+                except (ValueError, TypeError):
+                    # Mixed-type object columns that Arrow cannot store
+                    (tmp_dir / f"{name}.parquet").unlink(missing_ok=True)
+            if isinstance(value, np.ndarray):
+                np.save(tmp_dir / f"{name}.npy", value)
+            else:
+                joblib.dump(value, tmp_dir / f"{name}.joblib")
+
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Same entry published concurrently
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def run(self, stage: str, key: str,
+            compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return cached outputs for the key, computing and storing them on a miss."""
+
+        if self.contains(stage, key):
+            return self.load(stage, key)
+
+        self.misses.append(stage)
+        logger.info(f"Stage cache miss: {stage} ({key})")
+
+        outputs = compute()
+        self.store(stage, key, outputs)
+
+        return outputs
+
+    def run_pipeline(self, stages: List[Stage], upstream: str = None) -> Dict[str, Any]:
+        """Run a chain of stages, resuming after the last one already cached.
+
+        Earlier cached stages are not loaded at all, so an unchanged pipeline
+        only reads the final outputs.
+        """
+
+        keys = []
+        for stage in stages:
+            upstream = self.key(stage.name, upstream, stage.code, stage.config)
+            keys.append(upstream)
+
+        start = 0
+        outputs = {}
+        for i in range(len(stages) - 1, -1, -1):
+            if self.contains(stages[i].name, keys[i]):
+                outputs = self.load(stages[i].name, keys[i])
+                start = i + 1
+                break
+
+        for stage, key in zip(stages[start:], keys[start:]):
+            outputs = self.run(stage.name, key, lambda: stage.compute(outputs))
+
+        return outputs
+
+    def clear(self):
+        """Remove every cached stage output."""
+
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        logger.info(f"Cleared stage cache at {self.cache_dir}")
+
+
+def data_stages(loader, profiler=None) -> List[Stage]:
+    """Load, target, select, clean, preprocess and split as cacheable stages.
+
+    The fitted imputer and scaler travel with the data from the preprocess
+    stage on, so resuming at any later stage restores ``loader`` as well.
+    Stages that actually run are timed by ``profiler`` when one is given.
+    """
+
+    from .data_loader import CreditDataLoader
+
+    def preprocess(outputs: Dict[str, Any]) -> Dict[str, Any]:
+        df = loader.preprocess_features(outputs['df'], fit=True)
+        return {'df': df, 'imputer': loader.imputer, 'scaler': loader.scaler}
+
+    def split(outputs: Dict[str, Any]) -> Dict[str, Any]:
+        train, val, test = loader.split_data(outputs['df'])
+        return {'train': train, 'val': val, 'test': test,
+                'imputer': outputs['imputer'], 'scaler': outputs['scaler']}
+
+    stages = [
+        Stage('load', lambda outputs: {'df': loader.load_loan_data()},
+              [CreditDataLoader.load_loan_data],
+              {'data': file_fingerprint(LOAN_DATA_PATH)}),
+        Stage('target', lambda outputs: {'df': loader.create_target_variable(outputs['df'])},
+              [CreditDataLoader.create_target_variable]),
+        Stage('select', lambda outputs: {'df': loader.select_features(outputs['df'])},
+              [CreditDataLoader.select_features, CreditDataLoader._add_derived_features,
+               CreditDataLoader._convert_employment_length, CreditDataLoader._convert_term_length]),
+        Stage('clean', lambda outputs: {'df': loader.clean_data(outputs['df'])},
+              [CreditDataLoader.clean_data]),
+        Stage('preprocess', preprocess,
+              [CreditDataLoader.preprocess_features],
+              {'pandas': pd.__version__, 'sklearn': sklearn.__version__}),
+        Stage('split', split,
+              [CreditDataLoader.split_data],
+              {'test_size': TEST_SIZE, 'validation_size': VALIDATION_SIZE,
+               'random_state': RANDOM_STATE})
+    ]
+
+    if profiler is None:
+        return stages
+
+    def profiled(stage: Stage) -> Stage:
+        def compute(outputs: Dict[str, Any]) -> Dict[str, Any]:
+            with profiler.stage(stage.name) as record:
+                result = stage.compute(outputs)
+                for label, value in result.items():
+                    if isinstance(value, pd.DataFrame):
+                        record.frame(value, label)
+            return result
+        return stage._replace(compute=compute)
+
+    return [profiled(stage) for stage in stages]
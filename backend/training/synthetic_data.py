@@ -0,0 +1,248 @@
+"""
+Synthetic loans in the raw loan CSV schema and API applicants, for tests and scale benchmarks.
+"""
+import pandas as pd
+import numpy as np
+from typing import Iterator
+import logging
+import time
+from pathlib import Path
+from scipy.special import ndtr, expit
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import RANDOM_STATE, SYNTHETIC_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Latent standard normals with the correlation matrix below (a Gaussian
+# copula); each column is then mapped to its own marginal
+_LATENT = ["credit", "income", "dti", "utilization", "loan", "accounts", "age", "employment"]
+_CORRELATION = np.array([
+    #  credit income  dti   util   loan   acc    age    emp
+    [1.00, 0.15, -0.20, -0.45, 0.00, 0.05, 0.25, 0.10],  # credit quality
+    [0.15, 1.00, -0.25, -0.05, 0.45, 0.20, 0.30, 0.25],  # log income
+    [-0.20, -0.25, 1.00, 0.20, 0.15, 0.30, 0.00, 0.00],  # debt-to-income
+    [-0.45, -0.05, 0.20, 1.00, 0.05, -0.10, -0.10, 0.00],  # revolving utilization
+    [0.00, 0.45, 0.15, 0.05, 1.00, 0.15, 0.05, 0.05],  # loan size
+    [0.05, 0.20, 0.30, -0.10, 0.15, 1.00, 0.20, 0.10],  # open credit lines
+    [0.25, 0.30, 0.00, -0.10, 0.05, 0.20, 1.00, 0.50],  # age
+    [0.10, 0.25, 0.00, 0.00, 0.05, 0.10, 0.50, 1.00]  # employment length
+])
+_CHOLESKY = np.linalg.cholesky(_CORRELATION)
+
+# Employment length as Lending Club reports it: share of each of 0 ("< 1 year") to 10 ("10+ years")
+EMPLOYMENT_SHARES = np.array([0.08, 0.07, 0.09, 0.08, 0.06, 0.06, 0.05, 0.05, 0.05, 0.04, 0.37])
+EMPLOYMENT_LABELS = ["< 1 year", "1 year"] + [f"{years} years" for years in range(2, 10)] + ["10+ years"]
+EMPLOYMENT_MISSING_RATE = 0.06
+
+TERM_LABELS = [" 36 months", " 60 months"]
+
+# loan_status values of defaulted and repaid loans, with their shares within each group;
+# the defaulted ones are those CreditDataLoader.create_target_variable counts as default
+DEFAULT_STATUSES = (["Charged Off", "Late (31-120 days)", "In Grace Period", "Late (16-30 days)", "Default"],
+                    np.array([0.82, 0.08, 0.04, 0.03, 0.03]))
+REPAID_STATUSES = (["Fully Paid", "Current"], np.array([0.7, 0.3]))
+
+# Log-odds of default: intercept and weights on the latent columns, plus
+# the 60-month term and each past delinquency; about a 20% default rate
+_DEFAULT_INTERCEPT = -1.95
+_DEFAULT_WEIGHTS = {"credit": -0.9, "dti": 0.35, "utilization": 0.25, "income": -0.2, "loan": 0.15}
+_DEFAULT_TERM_60 = 0.4
+_DEFAULT_PER_DELINQUENCY = 0.25
+
+# Every "Mon-YYYY" a first credit line can fall in, up to the issue year
+_ISSUE_YEAR = 2018
+_MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+_FIRST_LINE_LABELS = [f"{month}-{year}" for year in range(_ISSUE_YEAR - 80, _ISSUE_YEAR) for month in _MONTHS]
+
+LOAN_COLUMNS = ["fico_range_high", "annual_inc", "dti", "revol_util", "open_acc", "delinq_2yrs",
+                "loan_amnt", "emp_length", "term", "loan_status", "earliest_cr_line"]
+APPLICANT_COLUMNS = ["age", "annual_income", "debt_to_income_ratio", "revolving_utilization", "open_credit_lines",
+                     "delinquencies_2yrs", "dependents", "fico_score", "loan_amount", "employment_length"]
+
+
+def _categorical(u: np.ndarray, shares: np.ndarray) -> np.ndarray:
+    """Index of the category each uniform falls into, given the categories' shares."""
+
+    cumulative = np.cumsum(shares / shares.sum())
+    return np.minimum(np.searchsorted(cumulative, u, side='right'), len(shares) - 1)
+
+
+def sample_population(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """``n`` borrowers in the units of the API, with whether each defaulted.
+
+    Correlated latent normals are mapped to skewed marginals: a Lending
+    Club-like FICO distribution in steps of 5 from 664, log-normal income,
+    debt-to-income and loan amounts, employment length in the Lending Club
+    buckets. Default is drawn from a logistic model of the latent credit
+    quality, affordability, the term and past delinquencies.
+    """
+
+    z = rng.standard_normal((n, len(_LATENT))) @ _CHOLESKY.T
+    latent = dict(zip(_LATENT, z.T))
+
+    fico_steps = np.floor(-np.log1p(-ndtr(latent["credit"])) * 7.5)
+    fico = 664 + 5 * np.minimum(fico_steps, 37).astype(np.int64)
+
+    income = np.maximum(np.round(np.exp(np.log(65000) + 0.55 * latent["income"]), -2), 4000).astype(np.int64)
+    loan_amount = np.clip(np.round(np.exp(np.log(12000) + 0.6 * latent["loan"]) / 25) * 25, 1000, 40000).astype(np.int64)
+    term_60 = rng.random(n) < expit(-1.4 + 1.8 * latent["loan"])
+    age = np.clip(np.round(np.exp(np.log(40) + 0.28 * latent["age"])), 21, 80).astype(np.int64)
+
+    delinquencies = rng.poisson(0.25 * np.exp(-0.8 * latent["credit"]))
+    logit = (_DEFAULT_INTERCEPT + _DEFAULT_TERM_60 * term_60 + _DEFAULT_PER_DELINQUENCY * delinquencies
+             + sum(weight * latent[name] for name, weight in _DEFAULT_WEIGHTS.items()))
+
+    return pd.DataFrame({
+        'age': age,
+        'annual_income': income,
+        'debt_to_income_ratio': np.clip(np.round(np.exp(np.log(0.17) + 0.5 * latent["dti"]), 4), 0, 0.999),
+        'revolving_utilization': np.clip(np.round(0.52 + 0.24 * latent["utilization"], 4), 0, 1),
+        'open_credit_lines': np.maximum(np.round(np.exp(np.log(10) + 0.45 * latent["accounts"])), 1).astype(np.int64),
+        'delinquencies_2yrs': delinquencies,
+        'dependents': rng.poisson(np.clip((age - 20) / 25, 0.1, 2)).clip(0, 10),
+        'fico_score': fico,
+        'loan_amount': loan_amount,
+        'employment_length': _categorical(ndtr(latent["employment"]), EMPLOYMENT_SHARES),
+        'term_60': term_60,
+        'default': rng.random(n) < expit(logit)
+    })
+
+
+def generate_loans(n: int, seed: int = RANDOM_STATE) -> pd.DataFrame:
+    """``n`` loans in the raw loan CSV schema ``CreditDataLoader`` reads.
+
+    ``emp_length``, ``term``, ``loan_status`` and ``earliest_cr_line`` are
+    the strings Lending Club exports; ``dti`` and ``revol_util`` are
+    fractions, as the API takes them.
+    """
+
+    rng = np.random.default_rng(seed)
+    population = sample_population(n, rng)
+
+    # String columns are categoricals over fixed labels, so no per-row strings are built
+    employment = population['employment_length'].to_numpy().copy()
+    employment[rng.random(n) < EMPLOYMENT_MISSING_RATE] = -1
+
+    status_labels = np.concatenate([DEFAULT_STATUSES[0], REPAID_STATUSES[0]])
+    statuses = np.where(
+        population['default'].to_numpy(),
+        _categorical(rng.random(n), DEFAULT_STATUSES[1]),
+        len(DEFAULT_STATUSES[0]) + _categorical(rng.random(n), REPAID_STATUSES[1])
+    )
+
+    # First credit line some time after turning 18, as "Mon-YYYY"
+    first_line_years = np.maximum(population['age'].to_numpy() - 18 - rng.integers(0, 8, n), 1)
+    first_line_months = len(_FIRST_LINE_LABELS) - 12 * first_line_years + rng.integers(0, 12, n)
+
+    return pd.DataFrame({
+        'fico_range_high': population['fico_score'],
+        'annual_inc': population['annual_income'],
+        'dti': population['debt_to_income_ratio'],
+        'revol_util': population['revolving_utilization'],
+        'open_acc': population['open_credit_lines'],
+        'delinq_2yrs': population['delinquencies_2yrs'],
+        'loan_amnt': population['loan_amount'],
+        'emp_length': pd.Categorical.from_codes(employment, EMPLOYMENT_LABELS),
+        'term': pd.Categorical.from_codes(population['term_60'].to_numpy().astype(np.int64), TERM_LABELS),
+        'loan_status': pd.Categorical.from_codes(statuses, status_labels),
+        'earliest_cr_line': pd.Categorical.from_codes(first_line_months, _FIRST_LINE_LABELS)
+    })
+
+
+def generate_applicants(n: int, seed: int = RANDOM_STATE, missing_rate: float = 0.2) -> pd.DataFrame:
+    """``n`` ApplicantRequest payloads as rows, from the same population as the loans.
+
+    ``loan_amount`` and ``employment_length`` are each left out (null) for
+    ``missing_rate`` of the applicants, like optional fields a client does
+    not send.
+    """
+
+    rng = np.random.default_rng(seed)
+    applicants = sample_population(n, rng)[APPLICANT_COLUMNS]
+
+    applicants['loan_amount'] = applicants['loan_amount'].mask(rng.random(n) < missing_rate)
+    applicants['employment_length'] = applicants['employment_length'].astype('Int64').mask(rng.random(n) < missing_rate)
+
+    return applicants
+
+
+def iter_chunks(kind: str, n_rows: int, chunk_size: int = SYNTHETIC_CHUNK_SIZE,
+                seed: int = RANDOM_STATE) -> Iterator[pd.DataFrame]:
+    """``n_rows`` of ``"loans"`` or ``"applicants"`` in chunks of ``chunk_size`` rows.
+
+    Each chunk draws from its own child of one ``SeedSequence``, so the output
+    depends only on ``seed`` and ``chunk_size``, and memory on the chunk size.
+    """
+
+    generate = {'loans': generate_loans, 'applicants': generate_applicants}[kind]
+    n_chunks = -(-n_rows // chunk_size)
+
+    for i, child in enumerate(np.random.SeedSequence(seed).spawn(n_chunks)):
+        yield generate(min(chunk_size, n_rows - i * chunk_size), seed=child)
+
+
+def write_synthetic(kind: str, n_rows: int, output_path: Path,
+                    chunk_size: int = SYNTHETIC_CHUNK_SIZE, seed: int = RANDOM_STATE) -> Path:
+    """Write ``n_rows`` synthetic rows chunk by chunk as CSV, Parquet or JSON lines (by suffix).
+
+    JSON lines hold one ApplicantRequest body per line, ready to post.
+    """
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    suffix = output_path.suffix.lower()
+    if suffix not in (".csv", ".parquet", ".jsonl"):
+        raise ValueError(f"Unsupported output format {suffix!r}, expected .csv, .parquet or .jsonl")
+
+    start = time.perf_counter()
+    written = 0
+    writer = None
+    for chunk in iter_chunks(kind, n_rows, chunk_size, seed):
+        if suffix == ".jsonl":
+            chunk.to_json(output_path, orient='records', lines=True, mode='w' if written == 0 else 'a')
+        else:
+            # pyarrow's CSV writer is several times faster than DataFrame.to_csv
+            import pyarrow as pa
+            import pyarrow.csv as pa_csv
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if suffix == ".csv":
+                table = table.cast(pa.schema([
+                    pa.field(field.name, pa.string()) if pa.types.is_dictionary(field.type) else field
+                    for field in table.schema
+                ]))
+                writer = writer or pa_csv.CSVWriter(output_path, table.schema,
+                                                    write_options=pa_csv.WriteOptions(quoting_style="needed"))
+            else:
+                writer = writer or pq.ParquetWriter(output_path, table.schema)
+            writer.write_table(table)
+
+        written += len(chunk)
+        logger.info(f"Wrote {written:,}/{n_rows:,} rows ({written / (time.perf_counter() - start):,.0f} rows/s)")
+
+    if writer is not None:
+        writer.close()
+
+    return output_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Generate synthetic loans or API applicants")
+    parser.add_argument("kind", choices=["loans", "applicants"],
+                        help="loans: the raw loan CSV schema; applicants: ApplicantRequest payloads")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--output", type=Path, required=True, help="Output file (.csv, .parquet or .jsonl)")
+    parser.add_argument("--chunk-size", type=int, default=SYNTHETIC_CHUNK_SIZE,
+                        help="Rows generated and written at a time, which bounds memory")
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE)
+    args = parser.parse_args()
+
+    write_synthetic(args.kind, args.rows, args.output, chunk_size=args.chunk_size, seed=args.seed)
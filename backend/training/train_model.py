@@ -4,27 +4,21 @@ Model training pipeline for credit risk assessment.
 import pandas as pd
 import numpy as np
 from typing import Dict, Any, Tuple, List
+import copy
 import logging
+import multiprocessing as mp
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 import joblib
 from pathlib import Path
-from sklearn.metrics import (
-    roc_auc_score, 
-    classification_report, 
-    confusion_matrix,
-    precision_recall_curve,
-    roc_curve,
-    precision_score,
-    recall_score,
-    f1_score
-)
-from sklearn.model_selection import StratifiedKFold, cross_val_score
-import matplotlib.pyplot as plt
-import seaborn as sns
+from sklearn.model_selection import StratifiedKFold
 
 # Import models
 import lightgbm as lgb
 import xgboost as xgb
-from catboost import CatBoostClassifier
+import catboost
+from catboost import CatBoostClassifier, Pool
 
 import sys
 from pathlib import Path
@@ -34,83 +28,296 @@ from app.config import (
     MODEL_PARAMS, 
     RANDOM_STATE, 
     ARTIFACTS_ROOT,
-    MODEL_PATH
+    MODEL_PATH,
+    CHALLENGERS_DIR,
+    N_JOBS,
+    CV_FOLDS,
+    PREDICTIONS_DIR,
+    EVALUATION_CURVES_PATH
 )
+from app.utils import predict_default_probability
+from .dataset_cache import DatasetCache
+from .evaluate_model import MetricsEngine, evaluate_model_performance, thin_curve, save_evaluation_curves
+from .prediction_store import PredictionStore
+from .stage_cache import StageCache
+from .profiler import TrainingProfiler
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def allocate_threads(names: List[str], n_jobs: int) -> Dict[str, int]:
+    """Split a thread budget across concurrently running jobs."""
+    
+    base, remainder = divmod(n_jobs, len(names))
+    
+    # Every job gets at least one thread, the first ones pick up the remainder
+    return {
+        name: max(1, base + (1 if i < remainder else 0))
+        for i, name in enumerate(names)
+    }
+
+
+def _fit_candidate(name: str, params: Dict[str, Any],
+                   X_train: pd.DataFrame, y_train: pd.Series,
+                   X_val: pd.DataFrame, y_val: pd.Series,
+                   num_threads: int,
+                   cache: DatasetCache = None,
+                   num_boost_round: int = None,
+                   init_model: Any = None) -> Tuple[Any, Dict[str, float]]:
+    """Fit one candidate model with an explicit thread count.
+    
+    Runs in-process for sequential training or inside a worker process for
+    parallel training, and returns the model with its timing statistics.
+    When a ``DatasetCache`` is given, binned LightGBM and CatBoost datasets
+    are loaded from it instead of being rebuilt from the frames (XGBoost
+    always builds its DMatrix). ``num_boost_round`` overrides
+    the number of boosting rounds configured in ``params``. With ``init_model``
+    boosting continues from an existing model of the same family.
+    """
+    
+    params = dict(params)
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    
+    if name == 'lightgbm':
+        params['num_threads'] = num_threads
+        rounds = params.pop('num_iterations', 1000)
+        if cache is not None:
+            lgb_train, lgb_val = cache.lightgbm(X_train, y_train, X_val, y_val, params)
+        else:
+            lgb_train = lgb.Dataset(X_train, label=y_train)
+            lgb_val = lgb.Dataset(X_val, label=y_val, reference=lgb_train)
+        
+        model = lgb.train(
+            params,
+            lgb_train,
+            valid_sets=[lgb_val],
+            num_boost_round=num_boost_round or rounds,
+            init_model=init_model,
+            callbacks=[lgb.early_stopping(100), lgb.log_evaluation(0)]
+        )
+    elif name == 'xgboost':
+        params['n_jobs'] = num_threads
+        dtrain = xgb.DMatrix(X_train, label=y_train)
+        dval = xgb.DMatrix(X_val, label=y_val)
+        
+        # Train on DMatrix objects through the native API, then hand the booster
+        # to the sklearn wrapper so inference and SHAP see an XGBClassifier.
+        # Like XGBClassifier.fit before it, all configured rounds are kept
+        model = xgb.XGBClassifier(**params)
+        booster = xgb.train(
+            model.get_xgb_params(),
+            dtrain,
+            num_boost_round=num_boost_round or model.n_estimators or 100,
+            evals=[(dval, 'validation')],
+            verbose_eval=False,
+            xgb_model=init_model.get_booster() if init_model is not None else None
+        )
+        model.load_model(bytearray(booster.save_raw('json')))
+    elif name == 'catboost':
+        params['thread_count'] = num_threads
+        # No catboost_info/ training logs in the working directory
+        params['allow_writing_files'] = False
+        if num_boost_round:
+            params['iterations'] = num_boost_round
+        if cache is not None:
+            train_data, eval_set = cache.catboost(X_train, y_train, X_val, y_val, params)
+        else:
+            train_data, eval_set = Pool(X_train, label=y_train), Pool(X_val, label=y_val)
+        
+        model = CatBoostClassifier(**params)
+        model.fit(
+            train_data,
+            eval_set=eval_set,
+            early_stopping_rounds=100,
+            verbose=False,
+            init_model=init_model
+        )
+    else:
+        raise ValueError(f"Unknown model: {name}")
+    
+    wall_time = time.perf_counter() - start_wall
+    cpu_time = time.process_time() - start_cpu
+    
+    stats = {
+        'wall_time': wall_time,
+        'cpu_time': cpu_time,
+        'num_threads': num_threads,
+        'cpu_utilization': cpu_time / (wall_time * num_threads) if wall_time > 0 else 0.0,
+        'best_iteration': _best_iteration(name, model)
+    }
+    
+    return model, stats
+
+
+def _best_iteration(name: str, model) -> int:
+    """Number of boosting rounds kept after early stopping."""
+    
+    if name == 'lightgbm':
+        return int(model.best_iteration or model.current_iteration())
+    elif name == 'xgboost':
+        booster = model.get_booster()
+        best = booster.attr('best_iteration')
+        return int(best) + 1 if best is not None else booster.num_boosted_rounds()
+    elif name == 'catboost':
+        return int(model.get_best_iteration() + 1)
+    return 0
+
+
+def class_weighted_params(model_params: Dict[str, Dict[str, Any]],
+                          y_train: pd.Series) -> Dict[str, Dict[str, Any]]:
+    """Copy model parameters and fill in class weights from the training labels (any array-like)."""
+    
+    # Calculate class weights for imbalanced data
+    class_counts = pd.Series(np.asarray(y_train)).value_counts()
+    scale_pos_weight = class_counts[0] / class_counts[1]
+    
+    logger.info(f"Class distribution: {class_counts}")
+    logger.info(f"Scale pos weight: {scale_pos_weight:.3f}")
+    
+    # Update model parameters with class weights
+    params = copy.deepcopy(model_params)
+    if 'xgboost' in params:
+        params['xgboost']['scale_pos_weight'] = scale_pos_weight
+    if 'catboost' in params:
+        params['catboost']['class_weights'] = [1, scale_pos_weight]
+    
+    return params
+
+
+def _fit_fold(name: str, params: Dict[str, Any], matrix_path: str, target_path: str,
+              columns: List[str], train_idx: np.ndarray, test_idx: np.ndarray,
+              num_threads: int) -> Dict[str, float]:
+    """Fit and score one cross-validation fold from the shared memory-mapped matrix."""
+    
+    X = np.load(matrix_path, mmap_mode='r')
+    y = np.load(target_path, mmap_mode='r')
+    
+    X_train = pd.DataFrame(X[train_idx], columns=columns)
+    y_train = pd.Series(y[train_idx])
+    X_test = pd.DataFrame(X[test_idx], columns=columns)
+    y_test = pd.Series(y[test_idx])
+    
+    params = class_weighted_params({name: params}, y_train)[name]
+    model, stats = _fit_candidate(name, params, X_train, y_train, X_test, y_test, num_threads)
+    
+    y_pred_proba = predict_default_probability(model, X_test)
+    metrics = evaluate_model_performance(y_test, (y_pred_proba > 0.5).astype(int), y_pred_proba)
+    metrics['wall_time'] = stats['wall_time']
+    
+    return metrics
+
+
+def selection_score(metrics: Dict[str, float]) -> float:
+    """Model selection score from evaluation metrics.
+    
+    Cross-validated means are used when available, otherwise the single
+    validation split metrics.
+    """
+    
+    auc = metrics.get('cv_auc_mean', metrics['auc'])
+    recall = metrics.get('cv_recall_mean', metrics['recall'])
+    
+    # Weight AUC more heavily, but also consider recall for default detection
+    return 0.7 * auc + 0.3 * recall
+
+
 class ModelTrainer:
     """Handles training and evaluation of credit risk models."""
     
-    def __init__(self):
+    def __init__(self, model_params: Dict[str, Dict[str, Any]] = None,
+                 predictions: PredictionStore = None):
+        self.model_params = model_params or MODEL_PARAMS
+        self.predictions = predictions or PredictionStore()
+        self.search_summary = None
+        self.incremental_update = None
+        self.statistics_rows = None
+        self.permutation_importance = None
+        self.stage_keys = None
+        self.profiler = TrainingProfiler(enabled=False)
         self.models = {}
         self.best_model = None
         self.best_model_name = None
         self.feature_importance = {}
+        self.training_stats = {}
         
     def train_models(self, X_train: pd.DataFrame, y_train: pd.Series, 
-                    X_val: pd.DataFrame, y_val: pd.Series) -> Dict[str, Any]:
-        """Train multiple models and select the best one."""
+                    X_val: pd.DataFrame, y_val: pd.Series,
+                    parallel: bool = False, n_jobs: int = None,
+                    cache: DatasetCache = None,
+                    distributed_workers: int = None) -> Dict[str, Any]:
+        """Train multiple models and select the best one.
+        
+        With ``parallel=True`` each candidate is fitted in its own worker
+        process and the ``n_jobs`` thread budget is split between them.
+        Passing a ``DatasetCache`` reuses binned datasets across runs.
+        With ``distributed_workers`` the LightGBM candidate is trained
+        data-parallel on that many sharded worker processes first.
+        """
         
         logger.info("Training multiple models")
         
-        # Calculate class weights for imbalanced data
-        class_counts = y_train.value_counts()
-        scale_pos_weight = class_counts[0] / class_counts[1]
-        
-        logger.info(f"Class distribution: {class_counts}")
-        logger.info(f"Scale pos weight: {scale_pos_weight:.3f}")
-        
-        # Update model parameters with class weights
-        params = MODEL_PARAMS.copy()
-        params['xgboost']['scale_pos_weight'] = scale_pos_weight
-        params['catboost']['class_weights'] = [1, scale_pos_weight]
+        params = class_weighted_params(self.model_params, y_train)
         
-        # Train LightGBM
-        logger.info("Training LightGBM...")
-        lgb_train = lgb.Dataset(X_train, label=y_train)
-        lgb_val = lgb.Dataset(X_val, label=y_val, reference=lgb_train)
+        n_jobs = n_jobs or N_JOBS
+        names = list(params.keys())
+        fitted = {}
         
-        lgb_model = lgb.train(
-            params['lightgbm'],
-            lgb_train,
-            valid_sets=[lgb_val],
-            num_boost_round=1000,
-            callbacks=[lgb.early_stopping(100), lgb.log_evaluation(0)]
-        )
-        
-        # Train XGBoost
-        logger.info("Training XGBoost...")
-        xgb_model = xgb.XGBClassifier(**params['xgboost'])
-        xgb_model.fit(
-            X_train, y_train,
-            eval_set=[(X_val, y_val)],
-            verbose=False
-        )
-        
-        # Train CatBoost
-        logger.info("Training CatBoost...")
-        cat_model = CatBoostClassifier(**params['catboost'])
-        cat_model.fit(
-            X_train, y_train,
-            eval_set=(X_val, y_val),
-            early_stopping_rounds=100,
-            verbose=False
-        )
-        
-        # Store models
-        self.models = {
-            'lightgbm': lgb_model,
-            'xgboost': xgb_model,
-            'catboost': cat_model
-        }
+        if distributed_workers and 'lightgbm' in names:
+            from .distributed import train_distributed_lightgbm
+            
+            with self.profiler.stage('train/lightgbm'):
+                fitted['lightgbm'] = train_distributed_lightgbm(
+                    params['lightgbm'], X_train, y_train, X_val, y_val,
+                    num_workers=distributed_workers, n_jobs=n_jobs
+                )
+            names.remove('lightgbm')
+        
+        if parallel and names:
+            thread_budget = allocate_threads(names, n_jobs)
+            logger.info(f"Training {len(names)} models in parallel: {thread_budget}")
+            
+            ctx = mp.get_context('spawn')
+            with self.profiler.stage('train/parallel'):
+                with ProcessPoolExecutor(max_workers=len(names), mp_context=ctx) as executor:
+                    futures = {
+                        name: executor.submit(
+                            _fit_candidate, name, params[name],
+                            X_train, y_train, X_val, y_val, thread_budget[name], cache
+                        )
+                        for name in names
+                    }
+                    fitted.update({name: future.result() for name, future in futures.items()})
+            
+            # Workers measured their own fits
+            for name in names:
+                self.profiler.record(f"train/{name}", **fitted[name][1])
+        else:
+            for name in names:
+                logger.info(f"Training {name}...")
+                with self.profiler.stage(f"train/{name}"):
+                    fitted[name] = _fit_candidate(
+                        name, params[name], X_train, y_train, X_val, y_val, n_jobs, cache
+                    )
+        
+        # Store models; scores from any previous fit are stale
+        self.models = {name: model for name, (model, _) in fitted.items()}
+        self.predictions.clear()
+        self.training_stats = {name: stats for name, (_, stats) in fitted.items()}
+        
+        for name, stats in self.training_stats.items():
+            logger.info(
+                f"{name} - wall time: {stats['wall_time']:.1f}s, "
+                f"threads: {stats['num_threads']}, "
+                f"CPU utilization: {stats['cpu_utilization']:.0%}"
+            )
         
         return self.models
     
-    def evaluate_models(self, X_val: pd.DataFrame, y_val: pd.Series) -> Dict[str, Dict[str, float]]:
+    def evaluate_models(self, X_val: pd.DataFrame, y_val: pd.Series,
+                        split: str = 'validation') -> Dict[str, Dict[str, float]]:
         """Evaluate all trained models."""
         
         logger.info("Evaluating models")
@@ -120,47 +327,82 @@ class ModelTrainer:
         for name, model in self.models.items():
             logger.info(f"Evaluating {name}")
             
-            # Get predictions
-            if name == 'lightgbm':
-                y_pred_proba = model.predict(X_val)
-            else:
-                y_pred_proba = model.predict_proba(X_val)[:, 1]
-            
-            y_pred = (y_pred_proba > 0.5).astype(int)
-            
-            # Calculate metrics
-            auc = roc_auc_score(y_val, y_pred_proba)
-            precision = precision_score(y_val, y_pred)
-            recall = recall_score(y_val, y_pred)
-            f1 = f1_score(y_val, y_pred)
+            with self.profiler.stage(f"evaluate/{split}/{name}"):
+                # Get predictions (scored once per model and split)
+                y_pred_proba = self.predictions.predict(name, model, split, X_val)
+                y_pred = (y_pred_proba > 0.5).astype(int)
+                
+                # Calculate metrics from a single sort of the scores
+                engine = self.predictions.engine(name, split, y_val)
+                results[name] = evaluate_model_performance(y_val, y_pred, y_pred_proba, engine)
             
-            # Calculate KS statistic
-            ks_stat = self._calculate_ks_statistic(y_val, y_pred_proba)
-            
-            results[name] = {
-                'auc': auc,
-                'precision': precision,
-                'recall': recall,
-                'f1': f1,
-                'ks_statistic': ks_stat
-            }
-            
-            logger.info(f"{name} - AUC: {auc:.4f}, Recall: {recall:.4f}, F1: {f1:.4f}")
+            logger.info(
+                f"{name} - AUC: {results[name]['auc']:.4f}, "
+                f"Recall: {results[name]['recall']:.4f}, F1: {results[name]['f1']:.4f}"
+            )
         
         return results
     
-    def _calculate_ks_statistic(self, y_true: pd.Series, y_pred_proba: pd.Series) -> float:
-        """Calculate Kolmogorov-Smirnov statistic."""
-        from scipy import stats
-        
-        # Separate predictions by class
-        good_scores = y_pred_proba[y_true == 0]
-        bad_scores = y_pred_proba[y_true == 1]
-        
-        # Calculate KS statistic
-        ks_stat, _ = stats.ks_2samp(good_scores, bad_scores)
-        
-        return ks_stat
+    def cross_validate(self, X: pd.DataFrame, y: pd.Series,
+                       n_splits: int = CV_FOLDS, n_jobs: int = None) -> Dict[str, Dict[str, float]]:
+        """Stratified K-fold cross-validation of every candidate, folds in parallel.
+        
+        The feature matrix is written once to a memory-mapped file shared by all
+        workers; each fold x model job receives only row indices and an equal
+        share of the ``n_jobs`` thread budget. Returns the mean and standard
+        deviation of each metric across folds as ``cv_<metric>_mean/std``.
+        """
+        
+        logger.info(f"Running {n_splits}-fold cross-validation")
+        
+        n_jobs = n_jobs or N_JOBS
+        names = list(self.model_params.keys())
+        skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=RANDOM_STATE)
+        folds = list(skf.split(X, y))
+        
+        n_tasks = len(folds) * len(names)
+        n_workers = min(n_tasks, n_jobs)
+        num_threads = max(1, n_jobs // n_workers)
+        logger.info(f"{n_tasks} fold x model jobs on {n_workers} workers x {num_threads} threads")
+        
+        fold_metrics = {name: [] for name in names}
+        with tempfile.TemporaryDirectory(prefix="cv_") as tmp_dir:
+            matrix_path = str(Path(tmp_dir) / "X.npy")
+            target_path = str(Path(tmp_dir) / "y.npy")
+            np.save(matrix_path, X.to_numpy(dtype=np.float64))
+            np.save(target_path, np.asarray(y, dtype=np.int64))
+            
+            ctx = mp.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=ctx) as executor:
+                futures = [
+                    (name, executor.submit(
+                        _fit_fold, name, self.model_params[name], matrix_path, target_path,
+                        list(X.columns), train_idx, test_idx, num_threads
+                    ))
+                    for train_idx, test_idx in folds
+                    for name in names
+                ]
+                for name, future in futures:
+                    fold_metrics[name].append(future.result())
+        
+        cv_results = {}
+        for name, metrics_list in fold_metrics.items():
+            fold_df = pd.DataFrame(metrics_list)
+            cv_results[name] = {}
+            for metric in ['auc', 'precision', 'recall', 'f1', 'ks_statistic']:
+                cv_results[name][f'cv_{metric}_mean'] = float(fold_df[metric].mean())
+                cv_results[name][f'cv_{metric}_std'] = float(fold_df[metric].std())
+            
+            logger.info(
+                f"{name} - CV AUC: {cv_results[name]['cv_auc_mean']:.4f} "
+                f"± {cv_results[name]['cv_auc_std']:.4f}, "
+                f"KS: {cv_results[name]['cv_ks_statistic_mean']:.4f} "
+                f"± {cv_results[name]['cv_ks_statistic_std']:.4f}, "
+                f"Recall: {cv_results[name]['cv_recall_mean']:.4f} "
+                f"± {cv_results[name]['cv_recall_std']:.4f}"
+            )
+        
+        return cv_results
     
     def select_best_model(self, results: Dict[str, Dict[str, float]]) -> str:
         """Select the best model based on AUC and recall."""
@@ -168,16 +410,13 @@ class ModelTrainer:
         logger.info("Selecting best model")
         
         # Score models based on AUC and recall
-        model_scores = {}
-        for name, metrics in results.items():
-            # Weight AUC more heavily, but also consider recall for default detection
-            score = 0.7 * metrics['auc'] + 0.3 * metrics['recall']
-            model_scores[name] = score
+        model_scores = {name: selection_score(metrics) for name, metrics in results.items()}
         
         # Select best model
         best_model_name = max(model_scores, key=model_scores.get)
         self.best_model = self.models[best_model_name]
         self.best_model_name = best_model_name
+        self.feature_importance = {}
         
         logger.info(f"Best model: {best_model_name} (score: {model_scores[best_model_name]:.4f})")
         
@@ -199,18 +438,68 @@ class ModelTrainer:
             'model_name': self.best_model_name,
             'model_type': type(self.best_model).__name__,
             'feature_importance': self._get_feature_importance(),
+            'training_stats': self.training_stats,
+            'model_params': self.model_params.get(self.best_model_name, {}),
             'training_date': pd.Timestamp.now().isoformat()
         }
         
+        if self.search_summary:
+            metadata['hyperparameter_search'] = self.search_summary
+        
+        if self.incremental_update:
+            metadata['incremental_update'] = self.incremental_update
+        
+        if self.statistics_rows:
+            metadata['statistics_rows'] = self.statistics_rows
+        
+        if self.permutation_importance:
+            metadata['permutation_importance'] = self.permutation_importance
+        
+        if self.stage_keys:
+            metadata['pipeline_stages'] = self.stage_keys
+        
         import json
         with open(ARTIFACTS_ROOT / "model_metadata.json", 'w') as f:
             json.dump(metadata, f, indent=2)
         
         logger.info("Model saved successfully")
     
+    def save_challengers(self):
+        """Save every candidate but the best as a challenger artifact directory for shadow scoring.
+        
+        Each directory holds the model next to copies of this run's
+        preprocessing artifacts, so it can be loaded like ``artifacts/``.
+        """
+        
+        import json
+        import shutil
+        
+        for name, model in self.models.items():
+            if name == self.best_model_name:
+                continue
+            
+            challenger_dir = CHALLENGERS_DIR / name
+            challenger_dir.mkdir(parents=True, exist_ok=True)
+            joblib.dump(model, challenger_dir / "model.pkl")
+            for artifact in ("scaler.pkl", "imputer.pkl", "feature_list.json"):
+                shutil.copy2(ARTIFACTS_ROOT / artifact, challenger_dir / artifact)
+            
+            with open(challenger_dir / "model_metadata.json", 'w') as f:
+                json.dump({
+                    'model_name': name,
+                    'model_type': type(model).__name__,
+                    'model_params': self.model_params.get(name, {}),
+                    'training_date': pd.Timestamp.now().isoformat()
+                }, f, indent=2)
+            
+            logger.info(f"Saved challenger {name} to {challenger_dir}")
+    
     def _get_feature_importance(self) -> Dict[str, float]:
         """Get feature importance from the best model."""
         
+        if self.feature_importance:
+            return self.feature_importance
+        
         if self.best_model_name == 'lightgbm':
             importance = self.best_model.feature_importance(importance_type='gain')
             feature_names = self.best_model.feature_name()
@@ -230,6 +519,7 @@ class ModelTrainer:
         feature_importance = dict(sorted(feature_importance.items(), 
                                        key=lambda x: x[1], reverse=True))
         
+        self.feature_importance = feature_importance
         return feature_importance
     
     def generate_evaluation_report(self, X_test: pd.DataFrame, y_test: pd.Series, 
@@ -238,65 +528,79 @@ class ModelTrainer:
         
         logger.info("Generating evaluation report")
         
-        # Create plots directory
-        plots_dir = ARTIFACTS_ROOT / "plots"
-        plots_dir.mkdir(exist_ok=True)
-        
-        # Plot ROC curves for all models
-        plt.figure(figsize=(10, 8))
+        # Compact curve data for the plotting stage
+        curves = {}
+        tier_analysis = {}
         for name, model in self.models.items():
-            if name == 'lightgbm':
-                y_pred_proba = model.predict(X_test)
-            else:
-                y_pred_proba = model.predict_proba(X_test)[:, 1]
+            self.predictions.predict(name, model, 'test', X_test)
+            engine = self.predictions.engine(name, 'test', y_test)
             
-            fpr, tpr, _ = roc_curve(y_test, y_pred_proba)
-            auc = results[name]['auc']
+            fpr, tpr, _ = engine.roc_curve()
+            fpr, tpr = thin_curve(fpr, tpr)
+            precision, recall, _ = engine.precision_recall_curve()
+            precision, recall = thin_curve(precision, recall)
+            counts = {k: int(v[0]) for k, v in engine.confusion_at(0.5).items()}
+            tier_analysis[name] = engine.tier_report()
             
-            plt.plot(fpr, tpr, label=f'{name} (AUC = {auc:.3f})')
-        
-        plt.plot([0, 1], [0, 1], 'k--', label='Random')
-        plt.xlabel('False Positive Rate')
-        plt.ylabel('True Positive Rate')
-        plt.title('ROC Curves - Model Comparison')
-        plt.legend()
-        plt.grid(True)
-        plt.savefig(plots_dir / "roc_curves.png", dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        # Plot feature importance for best model
+            curves[name] = {
+                'auc': results[name]['auc'],
+                'roc_fpr': fpr,
+                'roc_tpr': tpr,
+                'pr_precision': precision,
+                'pr_recall': recall,
+                'confusion_matrix': [[counts['tn'], counts['fp']], [counts['fn'], counts['tp']]]
+            }
+        
+        # Top 15 features of the best model
         if self.best_model_name:
             feature_importance = self._get_feature_importance()
+            features = list(feature_importance.keys())[:15]
             
-            plt.figure(figsize=(12, 8))
-            features = list(feature_importance.keys())[:15]  # Top 15 features
-            importance_values = [feature_importance[f] for f in features]
-            
-            plt.barh(features, importance_values)
-            plt.xlabel('Feature Importance')
-            plt.title(f'Top 15 Feature Importance - {self.best_model_name.title()}')
-            plt.gca().invert_yaxis()
-            plt.tight_layout()
-            plt.savefig(plots_dir / "feature_importance.png", dpi=300, bbox_inches='tight')
-            plt.close()
+            curves['feature_importance'] = {
+                'model': self.best_model_name,
+                'features': features,
+                'values': [feature_importance[f] for f in features]
+            }
+        
+        save_evaluation_curves(curves, EVALUATION_CURVES_PATH)
         
         # Save detailed results
         results_df = pd.DataFrame(results).T
         results_df.to_csv(ARTIFACTS_ROOT / "model_evaluation_results.csv")
         
+        # Save test-set risk tier analysis
+        import json
+        with open(ARTIFACTS_ROOT / "threshold_analysis.json", 'w') as f:
+            json.dump(tier_analysis, f, indent=2)
+        
         logger.info("Evaluation report generated")
 
 
-def train_credit_risk_model():
-    """Main function to train the credit risk model."""
+def train_credit_risk_model(parallel: bool = False, n_jobs: int = None,
+                            use_cache: bool = False, search: bool = False,
+                            search_budget: float = None, cv: bool = False,
+                            bootstrap: bool = False, permutation: bool = False,
+                            segments: bool = False, plots: bool = True,
+                            use_stage_cache: bool = False, profile: bool = False,
+                            profile_stage: str = None, distributed: int = None):
+    """Main function to train the credit risk model.
+    
+    With ``profile=True`` every stage is timed and a JSON profile is written
+    next to ``model_metadata.json``; ``profile_stage`` additionally samples
+    the Python stack of that one stage.
+    """
     
     logger.info("Starting credit risk model training")
     
+    profiler = TrainingProfiler(enabled=profile or profile_stage is not None,
+                                sample_stage=profile_stage)
+    
     # Import data loader
     from .data_loader import load_and_preprocess_data
     
-    # Load and preprocess data
-    train, val, test = load_and_preprocess_data()
+    # Load and preprocess data, resuming from cached stages when enabled
+    stage_cache = StageCache() if use_stage_cache else None
+    train, val, test = load_and_preprocess_data(cache=stage_cache, profiler=profiler)
     
     # Prepare features and target
     X_train = train.drop('target_default', axis=1)
@@ -310,21 +614,134 @@ def train_credit_risk_model():
     logger.info(f"Validation data shape: {X_val.shape}")
     logger.info(f"Test data shape: {X_test.shape}")
     
+    cache = DatasetCache() if use_cache or search else None
+    
+    # Tune hyperparameters with successive halving
+    model_params = None
+    search_summary = None
+    if search:
+        from .hyperparameter_search import HyperparameterSearch
+        
+        searcher = HyperparameterSearch(n_jobs=n_jobs, cache=cache)
+        if search_budget is not None:
+            searcher.time_budget = search_budget
+        with profiler.stage('search'):
+            model_params = searcher.run(X_train, y_train, X_val, y_val)
+        search_summary = searcher.summary()
+    
     # Train models
-    trainer = ModelTrainer()
-    models = trainer.train_models(X_train, y_train, X_val, y_val)
+    trainer = ModelTrainer(model_params=model_params,
+                           predictions=PredictionStore(PREDICTIONS_DIR))
+    trainer.search_summary = search_summary
+    trainer.profiler = profiler
+    if stage_cache is None:
+        trainer.train_models(X_train, y_train, X_val, y_val,
+                             parallel=parallel, n_jobs=n_jobs, cache=cache,
+                             distributed_workers=distributed)
+        
+        # Evaluate models
+        results = trainer.evaluate_models(X_val, y_val)
+    else:
+        # Training is keyed on the split, the parameters and the training code
+        train_key = stage_cache.key(
+            'train', stage_cache.keys['split'],
+            [_fit_candidate, class_weighted_params, ModelTrainer.train_models],
+            {
+                'model_params': trainer.model_params,
+                'distributed_workers': distributed,
+                'versions': [lgb.__version__, xgb.__version__, catboost.__version__]
+            }
+        )
+        fitted = stage_cache.run('train', train_key, lambda: {
+            'models': trainer.train_models(X_train, y_train, X_val, y_val,
+                                           parallel=parallel, n_jobs=n_jobs, cache=cache,
+                                           distributed_workers=distributed),
+            'training_stats': trainer.training_stats
+        })
+        trainer.models = fitted['models']
+        trainer.training_stats = fitted['training_stats']
+        
+        # Evaluate models
+        evaluate_key = stage_cache.key(
+            'evaluate', train_key,
+            [ModelTrainer.evaluate_models, evaluate_model_performance, MetricsEngine]
+        )
+        results = stage_cache.run('evaluate', evaluate_key, lambda: {
+            'results': trainer.evaluate_models(X_val, y_val)
+        })['results']
+        trainer.stage_keys = dict(stage_cache.keys)
     
-    # Evaluate models
-    results = trainer.evaluate_models(X_val, y_val)
+    # Cross-validate on train + validation for a less noisy model selection
+    if cv:
+        with profiler.stage('cross_validate'):
+            cv_results = trainer.cross_validate(
+                pd.concat([X_train, X_val]), pd.concat([y_train, y_val]), n_jobs=n_jobs
+            )
+        for name, cv_metrics in cv_results.items():
+            results[name].update(cv_metrics)
+    
+    # Bootstrap confidence intervals on the validation metrics
+    if bootstrap:
+        from .resampling import bootstrap_confidence_intervals
+        
+        with profiler.stage('bootstrap'):
+            for name, model in trainer.models.items():
+                # Scored already unless evaluation came from the stage cache
+                trainer.predictions.predict(name, model, 'validation', X_val)
+                engine = trainer.predictions.engine(name, 'validation', y_val)
+                results[name].update(bootstrap_confidence_intervals(engine))
     
     # Select best model
     best_model_name = trainer.select_best_model(results)
     
+    # Permutation importance of the best model on the test set
+    if permutation:
+        from .resampling import permutation_importance
+        
+        # Test scores go through the store so the report reuses them
+        trainer.predictions.predict(best_model_name, trainer.best_model, 'test', X_test)
+        baseline_auc = trainer.predictions.engine(best_model_name, 'test', y_test).auc()
+        with profiler.stage('permutation_importance'):
+            trainer.permutation_importance = permutation_importance(
+                trainer.best_model, X_test, y_test, baseline_auc=baseline_auc, n_jobs=n_jobs
+            )
+    
     # Generate evaluation report
-    trainer.generate_evaluation_report(X_test, y_test, results)
+    with profiler.stage('report'):
+        trainer.generate_evaluation_report(X_test, y_test, results)
+    
+    # Break the best model's test performance down by applicant segment
+    if segments:
+        from .segment_evaluation import evaluate_segments
+        
+        scaler = joblib.load(ARTIFACTS_ROOT / "scaler.pkl")
+        X_raw = pd.DataFrame(scaler.inverse_transform(X_test), columns=X_test.columns)
+        y_score = trainer.predictions.predict(best_model_name, trainer.best_model, 'test', X_test)
+        
+        with profiler.stage('segments'):
+            segment_report = evaluate_segments(X_raw, y_test, y_score)
+        segment_report.to_csv(ARTIFACTS_ROOT / "segment_evaluation.csv", index=False)
     
     # Save best model
-    trainer.save_model()
+    with profiler.stage('save'):
+        trainer.save_model()
+        trainer.save_challengers()
+        
+        # Training histograms the serving drift monitor compares live traffic with
+        from .data_loader import CreditDataLoader
+        
+        y_val_score = trainer.predictions.predict(best_model_name, trainer.best_model, 'validation', X_val)
+        CreditDataLoader().save_reference_distributions(X_train, y_val_score)
+    
+    # Render plots from the saved curve data once the artifacts are on disk
+    if plots:
+        from .report_plots import render_plots
+        
+        with profiler.stage('plots'):
+            render_plots(n_jobs=n_jobs)
+    
+    if profiler.enabled:
+        profiler.save()
     
     logger.info("Model training completed successfully")
     
@@ -332,4 +749,48 @@ def train_credit_risk_model():
 
 
 if __name__ == "__main__":
-    train_credit_risk_model()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Train the credit risk model")
+    parser.add_argument("--parallel", action="store_true",
+                        help="Train the candidate models concurrently in worker processes")
+    parser.add_argument("--n-jobs", type=int, default=None,
+                        help=f"Total thread budget (default: {N_JOBS})")
+    parser.add_argument("--distributed", type=int, default=None, metavar="N",
+                        help="Train LightGBM data-parallel on N local worker processes")
+    parser.add_argument("--cache-datasets", action="store_true",
+                        help="Reuse binned LightGBM/CatBoost datasets from artifacts/dataset_cache")
+    parser.add_argument("--search", action="store_true",
+                        help="Tune MODEL_PARAMS with successive halving before training")
+    parser.add_argument("--search-budget", type=float, default=None,
+                        help="Wall-clock budget for the search in seconds")
+    parser.add_argument("--cv", action="store_true",
+                        help=f"Select the best model on {CV_FOLDS}-fold cross-validation")
+    parser.add_argument("--bootstrap", action="store_true",
+                        help="Add bootstrap confidence intervals for AUC/KS/recall to the results")
+    parser.add_argument("--permutation-importance", action="store_true",
+                        help="Save permutation importance of the best model to the metadata")
+    parser.add_argument("--segments", action="store_true",
+                        help="Write per-segment test metrics to artifacts/segment_evaluation.csv")
+    parser.add_argument("--stage-cache", action="store_true",
+                        help="Reuse unchanged pipeline stages from artifacts/stage_cache")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write per-stage wall/CPU time, peak RSS and frame sizes to artifacts/training_profile.json")
+    parser.add_argument("--profile-stage", default=None,
+                        help="Also sample the Python stack of one stage (e.g. load, train/lightgbm) "
+                             "into a folded-stack file")
+    parser.add_argument("--no-plots", action="store_true",
+                        help="Skip plot rendering; curve data is still saved for training.report_plots")
+    args = parser.parse_args()
+    
+    train_credit_risk_model(parallel=args.parallel, n_jobs=args.n_jobs,
+                            use_cache=args.cache_datasets, search=args.search,
+                            search_budget=args.search_budget, cv=args.cv,
+                            bootstrap=args.bootstrap,
+                            permutation=args.permutation_importance,
+                            segments=args.segments,
+                            plots=not args.no_plots,
+                            use_stage_cache=args.stage_cache,
+                            profile=args.profile,
+                            profile_stage=args.profile_stage,
+                            distributed=args.distributed)
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Load-test the API in-process over ASGI or against a local uvicorn server, and check latency against a baseline.
+"""
+import sys
+import os
+import json
+import time
+import socket
+import asyncio
+import argparse
+import platform
+import subprocess
+from pathlib import Path
+import logging
+
+import numpy as np
+import httpx
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent / "backend"
+sys.path.append(str(backend_path))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Per-request logging from the client and the app would dominate the output and the timings
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("app").setLevel(logging.WARNING)
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "api_latency.json"
+
+
+def random_applicant(rng, optional: bool) -> dict:
+    """An ApplicantRequest payload, with or without the optional fields."""
+
+    income = float(np.round(rng.lognormal(11, 0.5), 2))
+    applicant = {
+        'age': int(rng.integers(21, 70)),
+        'annual_income': min(max(income, 12000.0), 2_000_000.0),
+        'debt_to_income_ratio': float(np.round(rng.beta(2, 5), 3)),
+        'revolving_utilization': float(np.round(rng.beta(2, 3), 3)),
+        'open_credit_lines': int(rng.integers(1, 25)),
+        'delinquencies_2yrs': int(rng.poisson(0.3)),
+        'dependents': int(rng.integers(0, 5)),
+        'fico_score': int(rng.integers(580, 850))
+    }
+    if optional:
+        applicant['loan_amount'] = float(np.round(rng.uniform(1000, 40000), 2))
+        applicant['employment_length'] = int(rng.integers(0, 30))
+    return applicant
+
+
+def _predict(optional_share: float):
+    def request(rng):
+        return "/api/predict", random_applicant(rng, rng.random() < optional_share)
+    return request
+
+
+def _sensitivity(points: int, explain: bool):
+    def request(rng):
+        applicant = random_applicant(rng, True)
+        sweep = {'feature': 'annual_income',
+                 'values': np.linspace(20000, 200000, points).round(2).tolist()}
+        return "/api/sensitivity", {'applicant': applicant, 'sweeps': [sweep], 'explain': explain}
+    return request
+
+
+# Payload mixes: single predictions with and without the optional fields, and
+# what-if sweeps as the batched request, each with and without explanations
+SCENARIOS = {
+    'predict_full': _predict(1.0),
+    'predict_minimal': _predict(0.0),
+    'predict_mixed': _predict(0.5),
+    'sweep_10': _sensitivity(10, explain=False),
+    'sweep_10_explain': _sensitivity(10, explain=True),
+    'sweep_100': _sensitivity(100, explain=False),
+    'sweep_100_explain': _sensitivity(100, explain=True)
+}
+
+
+async def run_load(client: httpx.AsyncClient, scenario: str, concurrency: int,
+                   n_requests: int, warmup: int, seed: int) -> dict:
+    """Send ``n_requests`` from ``concurrency`` concurrent clients and summarize the latencies."""
+
+    make_request = SCENARIOS[scenario]
+    rng = np.random.default_rng(seed)
+    payloads = [make_request(rng) for _ in range(warmup + n_requests)]
+
+    for path, body in payloads[:warmup]:
+        await client.post(path, json=body)
+
+    queue = iter(payloads[warmup:])
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for path, body in queue:
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_time = time.perf_counter() - start
+
+    latency_ms = np.array(latencies) * 1000
+    return {
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'requests': n_requests,
+        'errors': errors,
+        'throughput_rps': n_requests / wall_time,
+        'mean_ms': float(latency_ms.mean()),
+        'p50_ms': float(np.percentile(latency_ms, 50)),
+        'p95_ms': float(np.percentile(latency_ms, 95)),
+        'p99_ms': float(np.percentile(latency_ms, 99)),
+        'max_ms': float(latency_ms.max())
+    }
+
+
+async def run_suite(client: httpx.AsyncClient, target: str, args) -> list:
+    results = []
+    for scenario in args.scenarios:
+        for concurrency in args.concurrency:
+            result = await run_load(client, scenario, concurrency, args.requests, args.warmup, args.seed)
+            result['target'] = target
+            results.append(result)
+            logger.info(f"{target:>7} {scenario:>18} x{concurrency:<3}: "
+                        f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+                        f"p99 {result['p99_ms']:.1f} ms, {result['throughput_rps']:.0f} req/s, "
+                        f"{result['errors']} errors")
+    return results
+
+
+async def bench_asgi(args) -> list:
+    """Drive the app in this process through httpx's ASGI transport, startup and shutdown included."""
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://asgi", timeout=60) as client:
+            return await run_suite(client, 'asgi', args)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def bench_uvicorn(args) -> list:
+    """Start ``uvicorn app.main:app`` on a free local port and drive it over HTTP."""
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=backend_path, env={**os.environ, 'PYTHONPATH': str(backend_path)}
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            deadline = time.monotonic() + args.startup_timeout
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+                try:
+                    if (await client.get("/api/health")).json().get('model_loaded'):
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"uvicorn did not become healthy within {args.startup_timeout}s")
+                await asyncio.sleep(0.2)
+
+            return await run_suite(client, 'uvicorn', args)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def compare_to_baseline(results: list, baseline: dict, tolerance: float) -> list:
+    """Scenarios whose p50/p95/p99 latency grew past ``tolerance`` relative to the baseline."""
+
+    previous = {(r['target'], r['scenario'], r['concurrency']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        reference = previous.get((result['target'], result['scenario'], result['concurrency']))
+        if reference is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if result[metric] > reference[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{result['target']} {result['scenario']} x{result['concurrency']}: {metric} "
+                    f"{result[metric]:.1f} vs baseline {reference[metric]:.1f} (+{tolerance:.0%} allowed)"
+                )
+        if result['errors'] > reference['errors']:
+            regressions.append(
+                f"{result['target']} {result['scenario']} x{result['concurrency']}: "
+                f"{result['errors']} errors vs baseline {reference['errors']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/predict latency and throughput")
+    parser.add_argument("--targets", nargs="+", choices=["asgi", "uvicorn"], default=["asgi"])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS),
+                        default=["predict_full", "predict_minimal", "sweep_100"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario and concurrency")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, default=None, help="Write the results as JSON")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative latency increase over the baseline")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store these results as the new baseline instead of comparing")
+    args = parser.parse_args()
+
+    results = []
+    for target in args.targets:
+        bench = bench_asgi if target == "asgi" else bench_uvicorn
+        results.extend(asyncio.run(bench(args)))
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'uvicorn_workers': args.workers
+        },
+        'results': results
+    }
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Baseline saved to {args.baseline}")
+        return
+
+    # Without a baseline there is nothing to gate on, which must not pass as "no regressions"
+    if not args.baseline.exists():
+        logger.error(f"No baseline at {args.baseline}; run with --update-baseline on this machine to create one")
+        sys.exit(2)
+
+    with open(args.baseline) as f:
+        regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+
+    if regressions:
+        for regression in regressions:
+            logger.error(f"Regression: {regression}")
+        sys.exit(1)
+    logger.info(f"No latency regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
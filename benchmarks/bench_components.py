@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark each step of a prediction in isolation and compare the timings with a stored baseline.
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+from importlib import metadata
+from pathlib import Path
+import logging
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent / "backend"
+sys.path.append(str(backend_path))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+logging.getLogger("app").setLevel(logging.WARNING)
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "components.json"
+
+PACKAGES = ["numpy", "pandas", "scikit-learn", "shap", "lightgbm", "xgboost", "catboost"]
+
+
+def sample_applicants(n: int, seed: int = 42) -> list:
+    """``n`` ApplicantRequest-shaped dicts, about one in five without the optional fields."""
+
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'age': rng.integers(21, 70, n),
+        'annual_income': np.clip(rng.lognormal(11, 0.5, n), 12000, 2_000_000).round(2),
+        'debt_to_income_ratio': rng.beta(2, 5, n).round(3),
+        'revolving_utilization': rng.beta(2, 3, n).round(3),
+        'open_credit_lines': rng.integers(1, 25, n),
+        'delinquencies_2yrs': rng.poisson(0.3, n),
+        'dependents': rng.integers(0, 5, n),
+        'fico_score': rng.integers(580, 850, n),
+        'loan_amount': rng.uniform(1000, 40000, n).round(2),
+        'employment_length': rng.integers(0, 30, n)
+    })
+    applicants = frame.to_dict('records')
+    for applicant in applicants[::5]:
+        applicant['loan_amount'] = None
+        applicant['employment_length'] = None
+    return applicants
+
+
+def build_benchmarks(artifacts_dir: Path = None) -> dict:
+    """Zero-argument callables for every hot function of /api/predict, keyed by name.
+
+    Inputs are built once here, so each callable times only the function
+    itself, on the same data in every run.
+    """
+    from app.config import ARTIFACTS_ROOT
+    from app.inference import SHAPExplainer
+    from app.preprocessing import Preprocessor
+    from app.utils import (
+        load_model_artifacts,
+        predict_default_probability,
+        validate_applicant_data,
+        format_prediction_response
+    )
+
+    artifacts_dir = Path(artifacts_dir or ARTIFACTS_ROOT)
+    artifacts = load_model_artifacts(artifacts_dir)
+    model = artifacts['model']
+    preprocessor = Preprocessor()
+    preprocessor.load_artifacts(artifacts_dir)
+    explainer = SHAPExplainer()
+    explainer.load_model_and_setup(model, artifacts['feature_names'])
+
+    applicants = sample_applicants(10_000)
+    applicant = applicants[1]
+    X_all = preprocessor.transform_batch(pd.DataFrame(applicants))
+    X = preprocessor.transform_applicant_data(applicant)
+    explanation = explainer.explain_prediction(X)
+    shap_values = np.asarray(explanation['shap_values'])
+    risk_factors = explanation['feature_impacts'][:5]
+    probability = float(explanation['prediction'])
+
+    benchmarks = {
+        'validate_applicant_data': lambda: validate_applicant_data(applicant),
+        'transform_applicant_data': lambda: preprocessor.transform_applicant_data(applicant)
+    }
+    for rows in (1, 100, 10_000):
+        X_rows = X_all[:rows]
+        benchmarks[f'predict_proba[{rows}]'] = lambda X_rows=X_rows: predict_default_probability(model, X_rows)
+    benchmarks.update({
+        'explain_prediction': lambda: explainer.explain_prediction(X),
+        'analyze_feature_impacts': lambda: explainer.analyze_feature_impacts(shap_values),
+        'format_prediction_response': lambda: format_prediction_response(probability, risk_factors, artifacts['model_version'])
+    })
+    return benchmarks
+
+
+def measure(func, warmup: float, repeats: int, min_sample_time: float) -> dict:
+    """Per-call times in microseconds, one sample per batch of calls, ``timeit``-style.
+
+    After ``warmup`` seconds of calls, the calls per sample are doubled
+    until one sample takes ``min_sample_time``, so that timer resolution and
+    loop overhead do not dominate fast functions.
+    """
+
+    deadline = time.perf_counter() + warmup
+    while time.perf_counter() < deadline:
+        func()
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_sample_time:
+            break
+        number *= 2
+
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+
+    samples = np.array(samples)
+    q1, median, q3 = np.percentile(samples, [25, 50, 75])
+    return {
+        'calls_per_sample': number,
+        'min_us': float(samples.min()),
+        'median_us': float(median),
+        'mean_us': float(samples.mean()),
+        'iqr_us': float(q3 - q1),
+        'p95_us': float(np.percentile(samples, 95)),
+        'samples_us': samples.round(3).tolist()
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float, alpha: float) -> list:
+    """Per-benchmark comparison of two runs.
+
+    A change counts only if the median moved by more than ``threshold`` and
+    a two-sided Mann-Whitney U test on the samples rejects equal
+    distributions at ``alpha``, so noise in either run is not reported as
+    a regression.
+    """
+
+    comparisons = []
+    for name, result in current.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        ratio = result['median_us'] / reference['median_us']
+        p_value = float(stats.mannwhitneyu(result['samples_us'], reference['samples_us'],
+                                           alternative='two-sided').pvalue)
+        if p_value < alpha and ratio > 1 + threshold:
+            verdict = "slower"
+        elif p_value < alpha and ratio < 1 / (1 + threshold):
+            verdict = "faster"
+        else:
+            verdict = "unchanged"
+        comparisons.append({
+            'benchmark': name,
+            'baseline_median_us': reference['median_us'],
+            'median_us': result['median_us'],
+            'ratio': ratio,
+            'p_value': p_value,
+            'verdict': verdict
+        })
+    return comparisons
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark the prediction components")
+    parser.add_argument("--artifacts", type=Path, default=None, help="Model artifact directory (default: deployed)")
+    parser.add_argument("--only", nargs="+", default=None, help="Run only benchmarks whose name starts with these")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Warmup seconds per benchmark")
+    parser.add_argument("--repeats", type=int, default=50, help="Timed samples per benchmark")
+    parser.add_argument("--min-sample-time", type=float, default=0.02, help="Seconds per sample at least")
+    parser.add_argument("--output", type=Path, default=None, help="Write the results as JSON")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative change of the median that counts as slower or faster")
+    parser.add_argument("--alpha", type=float, default=0.01, help="Significance level of the Mann-Whitney U test")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store these results as the new baseline instead of comparing")
+    args = parser.parse_args()
+
+    benchmarks = build_benchmarks(args.artifacts)
+    if args.only:
+        benchmarks = {name: func for name, func in benchmarks.items() if name.startswith(tuple(args.only))}
+
+    results = {}
+    for name, func in benchmarks.items():
+        results[name] = measure(func, args.warmup, args.repeats, args.min_sample_time)
+        logger.info(f"{name:>26}: median {results[name]['median_us']:>10.1f} us, "
+                    f"IQR {results[name]['iqr_us']:.1f} us ({args.repeats} x {results[name]['calls_per_sample']} calls)")
+
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            pass
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'packages': versions,
+            'repeats': args.repeats
+        },
+        'results': results
+    }
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Baseline saved to {args.baseline}")
+    elif args.baseline.exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        baseline_versions = baseline['meta'].get('packages', {})
+        for package, version in versions.items():
+            if baseline_versions.get(package) != version:
+                logger.info(f"{package} changed since the baseline: {baseline_versions.get(package)} -> {version}")
+
+        report['comparison'] = compare(results, baseline['results'], args.threshold, args.alpha)
+        for comparison in report['comparison']:
+            log = logger.error if comparison['verdict'] == "slower" else logger.info
+            log(f"{comparison['benchmark']:>26}: {comparison['ratio']:.2f}x baseline "
+                f"(p={comparison['p_value']:.3g}), {comparison['verdict']}")
+    else:
+        logger.error(f"No baseline at {args.baseline}; run with --update-baseline on this machine to create one")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Results written to {args.output}")
+
+    # Without a baseline there is nothing to gate on, which must not pass as "unchanged"
+    if not args.update_baseline and 'comparison' not in report:
+        sys.exit(2)
+    if any(comparison['verdict'] == "slower" for comparison in report.get('comparison', [])):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
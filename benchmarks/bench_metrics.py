@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-sort metrics engine against the per-metric sklearn/scipy calls.
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+import logging
+
+import numpy as np
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent / "backend"
+sys.path.append(str(backend_path))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def baseline_metrics(y_true, y_score):
+    """The metric calls evaluate_models and generate_evaluation_report made before the engine."""
+    from scipy import stats
+    from sklearn.metrics import (
+        roc_auc_score, roc_curve, precision_recall_curve,
+        precision_score, recall_score, f1_score
+    )
+
+    y_pred = (y_score > 0.5).astype(int)
+    roc_auc_score(y_true, y_score)
+    precision_score(y_true, y_pred)
+    recall_score(y_true, y_pred)
+    f1_score(y_true, y_pred)
+    stats.ks_2samp(y_score[y_true == 0], y_score[y_true == 1])
+    roc_curve(y_true, y_score)
+    precision_recall_curve(y_true, y_score)
+
+
+def engine_metrics(y_true, y_score):
+    """The same metrics, plus tier cuts, from one MetricsEngine."""
+    from training.evaluate_model import MetricsEngine
+
+    engine = MetricsEngine(y_true, y_score)
+    engine.summary()
+    engine.roc_curve()
+    engine.precision_recall_curve()
+    engine.tier_report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the metrics engine")
+    parser.add_argument("--n-samples", type=int, default=10_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--min-speedup", type=float, default=1.0,
+                        help="Fail unless the engine is at least this many times faster than sklearn/scipy")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    y_true = (rng.random(args.n_samples) < 0.2).astype(int)
+    y_score = np.clip(rng.normal(0.35 + 0.2 * y_true, 0.2), 0, 1).astype(np.float32)
+
+    best = {}
+    for label, func in [("sklearn/scipy", baseline_metrics), ("MetricsEngine", engine_metrics)]:
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            func(y_true, y_score)
+            timings.append(time.perf_counter() - start)
+        best[label] = min(timings)
+        logger.info(f"{label:>14}: best {best[label]:.2f}s over {args.repeats} runs "
+                    f"({args.n_samples:,} scores)")
+
+    # The baseline is the sklearn/scipy path timed in the same run, so no stored file is needed
+    speedup = best["sklearn/scipy"] / best["MetricsEngine"]
+    if speedup < args.min_speedup:
+        logger.error(f"MetricsEngine is {speedup:.2f}x the sklearn/scipy speed, below --min-speedup {args.min_speedup}")
+        sys.exit(1)
+    logger.info(f"MetricsEngine speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
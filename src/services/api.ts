@@ -31,6 +31,110 @@ export interface PredictionResponse {
   model_version: string;
 }
 
+export interface FeatureSweep {
+  feature: keyof Omit<ApplicantData, 'name'>;
+  values: number[];
+}
+
+export interface SensitivityPoint {
+  values: Record<string, number>;
+  default_probability: number;
+  risk_label: string;
+  top_factors: RiskFactor[] | null;
+}
+
+export interface SensitivityResponse {
+  features: string[];
+  base_probability: number;
+  base_risk_label: string;
+  points: SensitivityPoint[];
+  model_version: string;
+}
+
+export interface FeatureChange {
+  feature: string;
+  from_value: number;
+  to_value: number;
+}
+
+export interface Counterfactual {
+  changes: FeatureChange[];
+  default_probability: number;
+  risk_label: string;
+  distance: number;
+}
+
+export interface CounterfactualResponse {
+  base_probability: number;
+  base_risk_label: string;
+  target_tier: string;
+  counterfactuals: Counterfactual[];
+  candidates_evaluated: number;
+  iterations: number;
+  elapsed_ms: number;
+  budget_exhausted: boolean;
+}
+
+export interface SessionResponse extends PredictionResponse {
+  session_id: string;
+  changed_features: string[];
+  trees_evaluated: number;
+  total_trees: number;
+  elapsed_ms: number;
+}
+
+export interface DistributionDrift {
+  feature: string;
+  psi: number;
+  ks: number;
+  status: 'insufficient_data' | 'stable' | 'warning' | 'alert';
+}
+
+export interface DriftResponse {
+  status: DistributionDrift['status'];
+  observations: number;
+  reference_rows: number;
+  workers: number;
+  probability: DistributionDrift;
+  features: DistributionDrift[];
+}
+
+export interface AuditStatsResponse {
+  accepted: number;
+  dropped: number;
+  written: number;
+  queued: number;
+  queue_high_water: number;
+  queue_size: number;
+  segments: number;
+  bytes_written: number;
+  write_errors: number;
+  current_segment: string | null;
+}
+
+export interface ChallengerAgreement {
+  name: string;
+  scored: number;
+  tier_agreement: number;
+  tier_flips: number;
+  tier_transitions: Record<string, Record<string, number>>;
+  mean_delta: number;
+  mean_abs_delta: number;
+  p95_abs_delta: number;
+  p99_abs_delta: number;
+  max_abs_delta: number;
+}
+
+export interface ShadowResponse {
+  sample_rate: number;
+  requests: number;
+  sampled: number;
+  dropped: number;
+  errors: number;
+  pending: number;
+  challengers: ChallengerAgreement[];
+}
+
 export interface HealthResponse {
   status: string;
   model_loaded: boolean;
@@ -97,6 +201,110 @@ export const apiService = {
     return handleResponse<PredictionResponse>(response);
   },
 
+  /**
+   * Score a what-if grid over one or two applicant fields in a single request
+   */
+  async sensitivitySweep(
+    applicantData: ApplicantData,
+    sweeps: FeatureSweep[],
+    explain = false
+  ): Promise<SensitivityResponse> {
+    const response = await fetch(`${API_BASE_URL}/sensitivity`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ applicant: applicantData, sweeps, explain }),
+    });
+    
+    return handleResponse<SensitivityResponse>(response);
+  },
+
+  /**
+   * Find the smallest changes that bring an applicant to the target risk tier
+   */
+  async findCounterfactuals(
+    applicantData: ApplicantData,
+    targetTier: 'LOW' | 'MEDIUM' = 'LOW'
+  ): Promise<CounterfactualResponse> {
+    const response = await fetch(`${API_BASE_URL}/counterfactual`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ applicant: applicantData, target_tier: targetTier }),
+    });
+    
+    return handleResponse<CounterfactualResponse>(response);
+  },
+
+  /**
+   * Score an applicant and open a session for field-by-field edits
+   */
+  async createScoringSession(applicantData: ApplicantData): Promise<SessionResponse> {
+    const response = await fetch(`${API_BASE_URL}/sessions`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(applicantData),
+    });
+    
+    return handleResponse<SessionResponse>(response);
+  },
+
+  /**
+   * Rescore a session after changing some fields; only affected trees are re-evaluated
+   */
+  async editScoringSession(
+    sessionId: string,
+    changes: Partial<Omit<ApplicantData, 'name'>>
+  ): Promise<SessionResponse> {
+    const response = await fetch(`${API_BASE_URL}/sessions/${sessionId}`, {
+      method: 'PATCH',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(changes),
+    });
+    
+    return handleResponse<SessionResponse>(response);
+  },
+
+  /**
+   * Close a scoring session
+   */
+  async closeScoringSession(sessionId: string): Promise<void> {
+    const response = await fetch(`${API_BASE_URL}/sessions/${sessionId}`, { method: 'DELETE' });
+    if (!response.ok && response.status !== 404) {
+      throw new ApiError(response.status, `HTTP ${response.status}`);
+    }
+  },
+
+  /**
+   * Drift of live traffic from the training distributions
+   */
+  async getDrift(): Promise<DriftResponse> {
+    const response = await fetch(`${API_BASE_URL}/drift`);
+    return handleResponse<DriftResponse>(response);
+  },
+
+  /**
+   * Audit log queue, drop and write counters
+   */
+  async getAuditStats(): Promise<AuditStatsResponse> {
+    const response = await fetch(`${API_BASE_URL}/audit/stats`);
+    return handleResponse<AuditStatsResponse>(response);
+  },
+
+  /**
+   * Champion/challenger agreement from shadow scoring
+   */
+  async getShadowAgreement(): Promise<ShadowResponse> {
+    const response = await fetch(`${API_BASE_URL}/shadow`);
+    return handleResponse<ShadowResponse>(response);
+  },
+
   /**
    * Check if backend is available
    */
@@ -75,6 +75,48 @@ def test_prediction_endpoint():
         print(f"❌ Prediction failed: {e}")
         return False
 
+def test_sensitivity_endpoint():
+    """Test the what-if sensitivity endpoint with an income sweep"""
+    print("\n🔍 Testing sensitivity endpoint...")
+    
+    sample_data = {
+        "age": 35,
+        "annual_income": 75000,
+        "debt_to_income_ratio": 0.45,
+        "revolving_utilization": 0.6,
+        "open_credit_lines": 5,
+        "delinquencies_2yrs": 2,
+        "dependents": 1,
+        "fico_score": 720,
+        "loan_amount": 25000,
+        "employment_length": 5
+    }
+    incomes = [20000 + 2000 * i for i in range(100)]
+    
+    try:
+        response = requests.post(
+            f"{API_BASE_URL}/sensitivity",
+            json={"applicant": sample_data, "sweeps": [{"feature": "annual_income", "values": incomes}]},
+            timeout=10
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            points = data['points']
+            print("✅ Sensitivity sweep successful!")
+            print(f"   Base: {data['base_probability']:.3f} ({data['base_risk_label']})")
+            print(f"   {len(points)} points, probability "
+                  f"{points[0]['default_probability']:.3f} -> {points[-1]['default_probability']:.3f}")
+            return len(points) == len(incomes)
+        else:
+            print(f"❌ Sensitivity sweep failed: {response.status_code}")
+            print(f"   Response: {response.text}")
+            return False
+            
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Sensitivity sweep failed: {e}")
+        return False
+
 def test_schema_endpoint():
     """Test the schema endpoint"""
     print("\n🔍 Testing schema endpoint...")
@@ -161,12 +203,14 @@ def main():
     health_ok = test_health_endpoint()
     prediction_ok = test_prediction_endpoint()
     schema_ok = test_schema_endpoint()
+    sensitivity_ok = test_sensitivity_endpoint()
     
     print("\n" + "=" * 50)
     print("📊 Test Results Summary:")
     print(f"   Health Endpoint: {'✅ PASS' if health_ok else '❌ FAIL'}")
     print(f"   Prediction Endpoint: {'✅ PASS' if prediction_ok else '❌ FAIL'}")
     print(f"   Schema Endpoint: {'✅ PASS' if schema_ok else '❌ FAIL'}")
+    print(f"   Sensitivity Endpoint: {'✅ PASS' if sensitivity_ok else '❌ FAIL'}")
     
     if health_ok and prediction_ok:
         print("\n🎉 Backend is ready for frontend integration!")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the single-sort metrics engine matches scikit-learn.
+"""
+import sys
+from pathlib import Path
+import logging
+
+import numpy as np
+
+# Add backend to path
+backend_path = Path(__file__).parent / "backend"
+sys.path.append(str(backend_path))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def _sample_scores(n_samples=20000, seed=42, rounded=False):
+    """Synthetic labels and scores; rounding creates many tied scores."""
+    rng = np.random.default_rng(seed)
+    y_true = (rng.random(n_samples) < 0.2).astype(int)
+    y_score = np.clip(rng.normal(0.35 + 0.2 * y_true, 0.2), 0, 1)
+    if rounded:
+        y_score = np.round(y_score, 2)
+    return y_true, y_score
+
+
+def test_metrics_engine_matches_sklearn():
+    """AUC, KS, curves and threshold metrics equal their sklearn/scipy counterparts."""
+    from scipy import stats
+    from sklearn.metrics import (
+        roc_auc_score, roc_curve, precision_recall_curve,
+        precision_score, recall_score, f1_score
+    )
+    from training.evaluate_model import MetricsEngine
+
+    for rounded in (False, True):
+        y_true, y_score = _sample_scores(rounded=rounded)
+        engine = MetricsEngine(y_true, y_score)
+
+        assert np.isclose(engine.auc(), roc_auc_score(y_true, y_score), rtol=0, atol=1e-12)
+
+        ks_expected = stats.ks_2samp(y_score[y_true == 0], y_score[y_true == 1]).statistic
+        assert np.isclose(engine.ks_statistic(), ks_expected, rtol=0, atol=1e-12)
+
+        for ours, theirs in zip(engine.roc_curve(), roc_curve(y_true, y_score)):
+            np.testing.assert_allclose(ours, theirs)
+
+        for ours, theirs in zip(engine.precision_recall_curve(),
+                                precision_recall_curve(y_true, y_score)):
+            np.testing.assert_allclose(ours, theirs)
+
+        for threshold in (0.0, 0.33, 0.5, 0.66, 0.99):
+            y_pred = (y_score > threshold).astype(int)
+            metrics = engine.precision_recall_f1_at(threshold)
+            assert np.isclose(metrics['precision'], precision_score(y_true, y_pred, zero_division=0))
+            assert np.isclose(metrics['recall'], recall_score(y_true, y_pred))
+            assert np.isclose(metrics['f1'], f1_score(y_true, y_pred))
+
+    logger.info("✅ Metrics engine matches sklearn")
+
+
+def test_tier_report():
+    """Tier mix follows determine_risk_tier applied row by row."""
+    from app.utils import determine_risk_tier
+    from training.evaluate_model import MetricsEngine
+
+    y_true, y_score = _sample_scores(n_samples=5000, rounded=True)
+    report = MetricsEngine(y_true, y_score).tier_report()
+
+    tiers = np.array([determine_risk_tier(p) for p in y_score])
+    for tier in ('LOW', 'MEDIUM', 'HIGH'):
+        mask = tiers == tier
+        assert report[tier]['count'] == mask.sum()
+        if mask.any():
+            assert np.isclose(report[tier]['default_rate'], y_true[mask].mean())
+
+    logger.info("✅ Tier report matches determine_risk_tier")
+
+
+def test_segment_evaluation_matches_per_segment_engine():
+    """Grouped segment metrics equal a MetricsEngine run on each segment separately."""
+    import pandas as pd
+    from training.evaluate_model import MetricsEngine
+    from training.segment_evaluation import evaluate_segments
+
+    rng = np.random.default_rng(7)
+    n_samples = 20000
+    y_true, y_score = _sample_scores(n_samples=n_samples, rounded=True)
+    X_raw = pd.DataFrame({
+        'fico_score': rng.integers(550, 850, n_samples),
+        'term_length': rng.choice([36.0, 60.0], n_samples),
+        'annual_income': rng.lognormal(11, 0.5, n_samples),
+        'high_utilization': rng.integers(0, 2, n_samples)
+    })
+
+    report = evaluate_segments(X_raw, y_true, y_score)
+    combo = report[report['segmentation'] == 'fico_band x term_length']
+    assert combo['count'].sum() == n_samples
+
+    for _, row in combo.iterrows():
+        band, term = row['segment'].split(' | ')
+        lo, hi = map(int, band.split('-'))
+        mask = ((X_raw['fico_score'] >= lo) & (X_raw['fico_score'] <= hi) &
+                (X_raw['term_length'] == float(term.split()[0]))).to_numpy()
+        assert row['count'] == mask.sum()
+        engine = MetricsEngine(y_true[mask], y_score[mask])
+        assert np.isclose(row['auc'], engine.auc())
+        assert np.isclose(row['ks_statistic'], engine.ks_statistic())
+        assert np.isclose(row['default_rate'], y_true[mask].mean())
+
+    logger.info("✅ Segment evaluation matches per-segment metrics")
+
+
+def main():
+    """Run all tests."""
+    test_metrics_engine_matches_sklearn()
+    test_tier_report()
+    test_segment_evaluation_matches_per_segment_engine()
+    logger.info("🎉 All metrics tests passed!")
+
+
+if __name__ == "__main__":
+    main()